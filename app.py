@@ -2,10 +2,18 @@ from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from config import config
-from extensions import db, migrate
+from extensions import db, migrate, senhas, revogacao
+from servicos.senhas import ServicoSenhasIndisponivel
+from servicos.tokens import ListaRevogacaoCheia
+from servicos.resumos import ResumosAnaliticos
+from servicos.cache_analises import CacheAnalises
+from servicos.graficos import ServicoGraficos
+from servicos.importacao import ImportacaoPacientes
+from servicos.instrumentacao import InstrumentacaoSQL
 from routes.autenticacao import auth_bp
 from routes.usuarios import users_bp
 from routes.agendamentos import appointments_bp
+from routes.series_agendamentos import series_bp
 from routes.prontuarios_medicos import medical_records_bp
 from routes.analises import analytics_bp
 from swagger import configure_swagger
@@ -18,7 +26,14 @@ def create_app(config_name='development'):
     CORS(app, resources={r"/*": {"origins": "*"}})
     db.init_app(app)
     migrate.init_app(app, db)
+    senhas.init_app(app)
     jwt = JWTManager(app)
+    revogacao.init_app(app, jwt)
+    ResumosAnaliticos().init_app(app)
+    CacheAnalises().init_app(app)
+    ServicoGraficos().init_app(app)
+    ImportacaoPacientes().init_app(app)
+    InstrumentacaoSQL().init_app(app)
     
     # Configurar Swagger
     if config_name != 'testing':
@@ -28,9 +43,20 @@ def create_app(config_name='development'):
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(users_bp, url_prefix='/api/users')
     app.register_blueprint(appointments_bp, url_prefix='/api/appointments')
+    app.register_blueprint(series_bp, url_prefix='/api/appointments')
     app.register_blueprint(medical_records_bp, url_prefix='/api/medical-records')
     app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
     
+    # Pool de hashing de senhas sem vagas
+    @app.errorhandler(ServicoSenhasIndisponivel)
+    def servico_senhas_indisponivel(erro):
+        return jsonify({'mensagem': str(erro)}), 503, {'Retry-After': '1'}
+    
+    # Lista de revogação sem espaço para novas entradas
+    @app.errorhandler(ListaRevogacaoCheia)
+    def lista_revogacao_cheia(erro):
+        return jsonify({'mensagem': str(erro)}), 503
+    
     # Rota de teste
     @app.route('/api/health')
     def health_check():
@@ -0,0 +1,81 @@
+"""Criação de agendamentos: 500 POSTs individuais contra um único POST em lote.
+
+Uso: python benchmarks/bench_agendamentos_lote.py [--quantidade 500]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from config import config, Config
+from extensions import db
+from models.usuario import Usuario
+from models.psicologo import Psicologo
+from models.paciente import Paciente
+
+def criar_app(banco):
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{banco}'
+        SENHA_PBKDF2_ROUNDS = 1000
+        SENHA_POOL_PROCESSOS = 0
+
+    config['benchmark'] = BenchmarkConfig
+    app = create_app('benchmark')
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        psicologo = Usuario(nome_usuario='psi', email='psi@teste.com', nome='Psi', tipo_usuario='psicologo')
+        psicologo.definir_senha('senha123')
+        psicologo.psicologo = Psicologo(registro='CRP', especializacao='TCC')
+        paciente = Usuario(nome_usuario='pac', email='pac@teste.com', nome='Pac', tipo_usuario='paciente')
+        paciente.definir_senha('senha123')
+        paciente.paciente = Paciente()
+        db.session.add_all([psicologo, paciente])
+        db.session.commit()
+
+    return app
+
+def gerar_itens(quantidade, paciente_id):
+    # Horários consecutivos de uma hora, das 8h às 18h
+    itens = []
+    horario = datetime(2024, 1, 1, 8, 0)
+    while len(itens) < quantidade:
+        if 8 <= horario.hour < 18:
+            itens.append({'data': horario.strftime('%Y-%m-%d'), 'hora': horario.strftime('%H:%M'), 'paciente_id': paciente_id})
+        horario += timedelta(hours=1)
+    return itens
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--quantidade', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        for nome in ['individual', 'lote']:
+            app = criar_app(os.path.join(diretorio, f'{nome}.db'))
+            cliente = app.test_client()
+            resposta = cliente.post('/api/auth/login', json={'nome_usuario': 'psi', 'senha': 'senha123'})
+            headers = {'Authorization': f"Bearer {resposta.get_json()['token']}"}
+            itens = gerar_itens(args.quantidade, 1)
+
+            inicio = time.perf_counter()
+            if nome == 'individual':
+                for item in itens:
+                    resposta = cliente.post('/api/appointments/agendamentos', json=item, headers=headers)
+                    assert resposta.status_code == 201, resposta.data
+            else:
+                resposta = cliente.post('/api/appointments/agendamentos/lote', json={'agendamentos': itens}, headers=headers)
+                assert resposta.get_json()['criados'] == len(itens), resposta.data
+            duracao = time.perf_counter() - inicio
+
+            print(f'{nome:<12} {len(itens)} agendamentos em {duracao * 1000:9.1f} ms')
+
+if __name__ == '__main__':
+    main()
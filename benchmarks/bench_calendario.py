@@ -0,0 +1,85 @@
+"""Visão de mês: listagem completa de agendamentos contra o endpoint de calendário.
+
+Uso: python benchmarks/bench_calendario.py [--por-dia 10] [--repeticoes 20]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from config import config, Config
+from extensions import db
+from models.usuario import Usuario
+from models.psicologo import Psicologo
+from models.paciente import Paciente
+from models.agendamento import Agendamento
+
+def criar_app(banco, por_dia):
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{banco}'
+        SENHA_PBKDF2_ROUNDS = 1000
+        SENHA_POOL_PROCESSOS = 0
+
+    config['benchmark'] = BenchmarkConfig
+    app = create_app('benchmark')
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        psicologo = Usuario(nome_usuario='psi', email='psi@teste.com', nome='Psi', tipo_usuario='psicologo')
+        psicologo.definir_senha('senha123')
+        psicologo.psicologo = Psicologo(registro='CRP', especializacao='TCC')
+        db.session.add(psicologo)
+        for i in range(20):
+            paciente = Usuario(nome_usuario=f'pac{i}', email=f'pac{i}@teste.com', nome=f'Paciente {i}', tipo_usuario='paciente', senha_hash='x')
+            paciente.paciente = Paciente()
+            db.session.add(paciente)
+        db.session.flush()
+
+        dia = datetime(2024, 3, 1)
+        while dia.month == 3:
+            for n in range(por_dia):
+                db.session.add(Agendamento(
+                    inicio=dia.replace(hour=8) + timedelta(minutes=50 * n), status='pendente',
+                    psicologo_id=psicologo.psicologo.id, paciente_id=1 + n % 20
+                ))
+            dia += timedelta(days=1)
+        db.session.commit()
+
+    return app
+
+def medir(cliente, url, headers, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resposta = cliente.get(url, headers=headers)
+        assert resposta.status_code == 200, resposta.data
+    return (time.perf_counter() - inicio) / repeticoes * 1000, len(resposta.data)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--por-dia', type=int, default=10)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        app = criar_app(os.path.join(diretorio, 'bench.db'), args.por_dia)
+        cliente = app.test_client()
+        resposta = cliente.post('/api/auth/login', json={'nome_usuario': 'psi', 'senha': 'senha123'})
+        headers = {'Authorization': f"Bearer {resposta.get_json()['token']}"}
+        periodo = 'inicio=2024-03-01&fim=2024-03-31'
+
+        for nome, url in [
+            ('listagem completa', f'/api/appointments/agendamentos?{periodo}'),
+            ('calendário', f'/api/appointments/agendamentos/calendario?{periodo}')
+        ]:
+            tempo, tamanho = medir(cliente, url, headers, args.repeticoes)
+            print(f'{nome:<18} {tempo:8.2f} ms/requisição   {tamanho / 1024:8.1f} KiB')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,346 @@
+"""Latência, consultas SQL e memória dos endpoints, com bases pequena, média e grande.
+
+Cada base é gerada por init_db.gerar_dados_sinteticos (sempre com os mesmos
+dados) em um SQLite temporário, e cada endpoint é chamado pelo test client do
+Flask: uma chamada de aquecimento, --repeticoes chamadas medindo latência e
+consultas SQL e uma chamada com tracemalloc para o pico de memória. O cache
+das análises fica desligado, para que todas as chamadas façam o cálculo.
+
+Com --salvar os resultados viram a nova baseline. Sem ele, os resultados são
+comparados com a baseline e a execução termina com código 1 se algum endpoint
+piorar: p95 acima de (1 + --limite) × baseline + --tolerancia-ms, pico de
+memória acima de (1 + --limite) × baseline + 32 KB ou mais consultas SQL.
+Sem o arquivo de baseline a comparação também termina com código 1.
+
+Como a latência depende da máquina, nenhuma baseline é versionada. Com
+--referencia (um commit ou branch do git), a baseline é criada na hora: o
+benchmark da referência roda antes, em um worktree temporário e com os mesmos
+parâmetros, e a execução atual é comparada com ele. É o modo usado na CI.
+
+Em máquinas compartilhadas o p95 de uma execução varia alguns milissegundos
+de uma vez para outra. Com --rodadas N, referência e código atual são medidos
+N vezes, alternadamente, e vale o menor valor de cada métrica.
+
+Uso: python benchmarks/bench_endpoints.py [--tamanhos pequeno medio grande] [--repeticoes 30]
+                                          [--baseline benchmarks/baselines/endpoints.json]
+                                          [--salvar | --referencia origin/main] [--rodadas 3]
+                                          [--limite 0.25] [--tolerancia-ms 2]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from config import config, Config
+from extensions import db
+from init_db import gerar_dados_sinteticos
+from models import Usuario, Psicologo, Paciente, Agendamento, ProntuarioMedico
+
+TAMANHOS = {
+    'pequeno': {'psicologos': 2, 'pacientes_por_psicologo': 10, 'anos': 0.5},
+    'medio': {'psicologos': 20, 'pacientes_por_psicologo': 30, 'anos': 1},
+    'grande': {'psicologos': 50, 'pacientes_por_psicologo': 40, 'anos': 2}
+}
+
+# Data de referência fixa: as mesmas bases e as mesmas consultas a cada execução
+HOJE = date(2024, 6, 30)
+
+BASELINE_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'endpoints.json')
+TOLERANCIA_MEMORIA_KB = 32
+
+def criar_app(banco, rounds):
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{banco}'
+        SENHA_PBKDF2_ROUNDS = rounds
+        SENHA_POOL_PROCESSOS = 0
+        ANALISES_CACHE_BACKEND = 'nenhum'
+    
+    config['benchmark'] = BenchmarkConfig
+    app = create_app('benchmark')
+    
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    
+    return app
+
+def preparar(app, tamanho):
+    # Base gerada e dados usados pelos cenários: o primeiro psicólogo, um paciente dele
+    # e um agendamento e um prontuário existentes
+    with app.app_context():
+        gerar_dados_sinteticos(**TAMANHOS[tamanho], hoje=HOJE)
+        
+        psicologo_id, nome_usuario = db.session.query(Psicologo.id, Usuario.nome_usuario).join(Usuario).order_by(Psicologo.id).first()
+        paciente_id = db.session.query(Agendamento.paciente_id).filter_by(psicologo_id=psicologo_id).first()[0]
+        nome_paciente = db.session.query(Usuario.nome_usuario).join(Paciente).filter(Paciente.id == paciente_id).scalar()
+        agendamento_id = db.session.query(Agendamento.id).filter_by(psicologo_id=psicologo_id).order_by(Agendamento.id.desc()).first()[0]
+        prontuario_id = db.session.query(ProntuarioMedico.id).filter_by(psicologo_id=psicologo_id).order_by(ProntuarioMedico.id.desc()).first()[0]
+    
+    cliente = app.test_client()
+    tokens = {}
+    for papel, usuario in (('psicologo', nome_usuario), ('paciente', nome_paciente)):
+        resposta = cliente.post('/api/auth/login', json={'nome_usuario': usuario, 'senha': 'senha123'})
+        tokens[papel] = {'Authorization': f"Bearer {resposta.get_json()['token']}"}
+    
+    return {
+        'cliente': cliente,
+        'tokens': tokens,
+        'nome_usuario': nome_usuario,
+        'paciente_id': paciente_id,
+        'agendamento_id': agendamento_id,
+        'prontuario_id': prontuario_id,
+        'criados': {'agendamentos': [], 'prontuarios': []}
+    }
+
+def cenarios(contexto):
+    """Endpoints medidos: nome -> (função que faz a i-ésima chamada, status esperado)."""
+    cliente = contexto['cliente']
+    psicologo = contexto['tokens']['psicologo']
+    paciente = contexto['tokens']['paciente']
+    criados = contexto['criados']
+    mes = f'inicio={HOJE - timedelta(days=30)}&fim={HOJE}'
+    trimestre = f'inicio={HOJE - timedelta(days=90)}&fim={HOJE}'
+    
+    def criar_agendamento(i):
+        # Domingos futuros, sem sessões geradas: um horário livre por chamada
+        dia = HOJE + timedelta(weeks=1 + i // 12)
+        resposta = cliente.post('/api/appointments/agendamentos', headers=psicologo, json={
+            'data': dia.isoformat(), 'hora': f'{8 + i % 12:02d}:00', 'paciente_id': contexto['paciente_id']
+        })
+        criados['agendamentos'].append(resposta.get_json()['agendamento']['id'])
+        return resposta
+    
+    def criar_prontuario(i):
+        resposta = cliente.post('/api/medical-records/prontuarios', headers=psicologo, json={
+            'data': HOJE.isoformat(), 'conteudo': f'Prontuário {i}', 'paciente_id': contexto['paciente_id']
+        })
+        criados['prontuarios'].append(resposta.get_json()['prontuario']['id'])
+        return resposta
+    
+    return {
+        'login': (lambda i: cliente.post('/api/auth/login', json={
+            'nome_usuario': contexto['nome_usuario'], 'senha': 'senha123'
+        }), 200),
+        'agendamentos_listar_mes': (lambda i: cliente.get(f'/api/appointments/agendamentos?{mes}', headers=psicologo), 200),
+        'agendamentos_listar_paciente': (lambda i: cliente.get('/api/appointments/agendamentos', headers=paciente), 200),
+        'agendamentos_listar_pagina': (lambda i: cliente.get('/api/appointments/agendamentos?limit=50', headers=psicologo), 200),
+        'agendamentos_obter': (lambda i: cliente.get(
+            f"/api/appointments/agendamentos/{contexto['agendamento_id']}", headers=psicologo
+        ), 200),
+        'agendamentos_criar': (criar_agendamento, 201),
+        'agendamentos_atualizar': (lambda i: cliente.put(
+            f"/api/appointments/agendamentos/{criados['agendamentos'][i]}", headers=psicologo,
+            json={'status': 'confirmado', 'observacoes': f'Atualizado {i}'}
+        ), 200),
+        'agendamentos_excluir': (lambda i: cliente.delete(
+            f"/api/appointments/agendamentos/{criados['agendamentos'][i]}", headers=psicologo
+        ), 200),
+        'prontuarios_listar_trimestre': (lambda i: cliente.get(f'/api/medical-records/prontuarios?{trimestre}', headers=psicologo), 200),
+        'prontuarios_listar_pagina': (lambda i: cliente.get('/api/medical-records/prontuarios?limit=50', headers=psicologo), 200),
+        'prontuarios_obter': (lambda i: cliente.get(
+            f"/api/medical-records/prontuarios/{contexto['prontuario_id']}", headers=psicologo
+        ), 200),
+        'prontuarios_criar': (criar_prontuario, 201),
+        'prontuarios_atualizar': (lambda i: cliente.put(
+            f"/api/medical-records/prontuarios/{criados['prontuarios'][i]}", headers=psicologo,
+            json={'conteudo': f'Prontuário {i} revisado'}
+        ), 200),
+        'prontuarios_excluir': (lambda i: cliente.delete(
+            f"/api/medical-records/prontuarios/{criados['prontuarios'][i]}", headers=psicologo
+        ), 200),
+        'analises_agendamentos': (lambda i: cliente.get('/api/analytics/analises/agendamentos', headers=psicologo), 200),
+        'analises_prontuarios': (lambda i: cliente.get('/api/analytics/analises/prontuarios', headers=psicologo), 200),
+        'analises_pacientes': (lambda i: cliente.get('/api/analytics/analises/pacientes', headers=psicologo), 200)
+    }
+
+def medir(app, chamar, status, repeticoes):
+    consultas = []
+    
+    def contar(*args):
+        consultas[-1] += 1
+    
+    def executar(i):
+        consultas.append(0)
+        resposta = chamar(i)
+        assert resposta.status_code == status, (resposta.status_code, resposta.get_data(as_text=True)[:200])
+        return resposta
+    
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', contar)
+    try:
+        # Aquecimento (consultas compiladas, caches do Flask) fora das medidas
+        executar(0)
+        
+        latencias = []
+        for i in range(1, repeticoes + 1):
+            inicio = time.perf_counter()
+            executar(i)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+        
+        # Pico de memória em uma chamada separada: o tracemalloc deixa as chamadas mais lentas
+        tracemalloc.start()
+        executar(repeticoes + 1)
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        event.remove(engine, 'before_cursor_execute', contar)
+    
+    p50, p95, p99 = np.percentile(latencias, [50, 95, 99]).tolist()
+    return {
+        'p50_ms': round(p50, 2),
+        'p95_ms': round(p95, 2),
+        'p99_ms': round(p99, 2),
+        'consultas': max(consultas[1:repeticoes + 1]),
+        'memoria_kb': round(pico / 1024, 1)
+    }
+
+def comparar(resultados, baseline, limite, tolerancia_ms):
+    regressoes = []
+    for tamanho, endpoints in resultados.items():
+        for nome, atual in endpoints.items():
+            anterior = baseline.get(tamanho, {}).get(nome)
+            if not anterior:
+                continue
+            
+            if atual['p95_ms'] > anterior['p95_ms'] * (1 + limite) + tolerancia_ms:
+                regressoes.append(f"{tamanho}/{nome}: p95 {anterior['p95_ms']} -> {atual['p95_ms']} ms")
+            if atual['consultas'] > anterior['consultas']:
+                regressoes.append(f"{tamanho}/{nome}: consultas {anterior['consultas']} -> {atual['consultas']}")
+            if atual['memoria_kb'] > anterior['memoria_kb'] * (1 + limite) + TOLERANCIA_MEMORIA_KB:
+                regressoes.append(f"{tamanho}/{nome}: memória {anterior['memoria_kb']} -> {atual['memoria_kb']} KB")
+    return regressoes
+
+def medir_tamanhos(tamanhos, repeticoes, rounds, diretorio):
+    resultados = {}
+    for tamanho in tamanhos:
+        app = criar_app(os.path.join(diretorio, f'{tamanho}.db'), rounds)
+        contexto = preparar(app, tamanho)
+        
+        print(f'\n{tamanho}: ' + ', '.join(f'{chave} {valor}' for chave, valor in TAMANHOS[tamanho].items()))
+        print(f"{'endpoint':<32}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'consultas':>11}{'memória KB':>12}")
+        resultados[tamanho] = {}
+        for nome, (chamar, status) in cenarios(contexto).items():
+            metricas = medir(app, chamar, status, repeticoes)
+            resultados[tamanho][nome] = metricas
+            print(f"{nome:<32}{metricas['p50_ms']:>9.2f}{metricas['p95_ms']:>9.2f}{metricas['p99_ms']:>9.2f}"
+                  f"{metricas['consultas']:>11}{metricas['memoria_kb']:>12.1f}")
+        
+        with app.app_context():
+            db.engine.dispose()
+    return resultados
+
+def melhor_rodada(rodadas):
+    # Menor valor de cada métrica entre as rodadas: interferências da máquina só
+    # aumentam as medidas, então o mínimo é a estimativa mais estável
+    melhor = {}
+    for resultados in rodadas:
+        for tamanho, endpoints in resultados.items():
+            for nome, metricas in endpoints.items():
+                atual = melhor.setdefault(tamanho, {}).setdefault(nome, dict(metricas))
+                for chave, valor in metricas.items():
+                    atual[chave] = min(atual[chave], valor)
+    return melhor
+
+@contextmanager
+def worktree_referencia(referencia, diretorio):
+    # Baseline criada na mesma máquina: o benchmark da referência roda em um
+    # worktree temporário do git, com os mesmos tamanhos e repetições
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    worktree = os.path.join(diretorio, 'referencia')
+    
+    subprocess.run(['git', '-C', raiz, 'worktree', 'add', '--detach', worktree, referencia], check=True)
+    # Gravações pendentes do checkout atrasariam os commits medidos em seguida
+    os.sync()
+    try:
+        yield worktree
+    finally:
+        subprocess.run(['git', '-C', raiz, 'worktree', 'remove', '--force', worktree], check=True)
+
+def medir_referencia(worktree, args, baseline):
+    subprocess.run([
+        sys.executable, os.path.join('benchmarks', 'bench_endpoints.py'), '--salvar', '--baseline', baseline,
+        '--tamanhos', *args.tamanhos, '--repeticoes', str(args.repeticoes), '--rounds', str(args.rounds)
+    ], cwd=worktree, check=True)
+    
+    with open(baseline, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tamanhos', nargs='+', choices=list(TAMANHOS), default=list(TAMANHOS))
+    parser.add_argument('--repeticoes', type=int, default=30)
+    parser.add_argument('--rounds', type=int, default=29000, help='Rounds do PBKDF2 (afeta o login)')
+    parser.add_argument('--rodadas', type=int, default=1, help='Execuções completas; vale o menor valor de cada métrica')
+    parser.add_argument('--baseline', default=BASELINE_PADRAO)
+    parser.add_argument('--salvar', action='store_true', help='Grava os resultados como nova baseline')
+    parser.add_argument('--referencia', help='Commit ou branch do git medido antes, como baseline desta execução')
+    parser.add_argument('--limite', type=float, default=0.25, help='Piora relativa tolerada (0.25 = 25%%)')
+    parser.add_argument('--tolerancia-ms', type=float, default=2, help='Piora absoluta tolerada no p95')
+    args = parser.parse_args()
+    if args.salvar and args.referencia:
+        parser.error('--salvar e --referencia não podem ser usados juntos')
+    
+    rodadas = []
+    referencias = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        with worktree_referencia(args.referencia, diretorio) if args.referencia else nullcontext() as worktree:
+            # Referência e execução atual se alternam, para que uma mudança de carga
+            # da máquina afete as duas
+            for rodada in range(args.rodadas):
+                if worktree:
+                    baseline = os.path.join(diretorio, f'referencia_{rodada}.json')
+                    referencias.append(medir_referencia(worktree, args, baseline))
+                
+                diretorio_rodada = os.path.join(diretorio, f'rodada_{rodada}')
+                os.makedirs(diretorio_rodada)
+                rodadas.append(medir_tamanhos(args.tamanhos, args.repeticoes, args.rounds, diretorio_rodada))
+    
+    resultados = melhor_rodada(rodadas)
+    baseline = melhor_rodada(referencias) if referencias else None
+    
+    if args.salvar:
+        # Tamanhos não executados agora mantêm a baseline anterior
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as arquivo:
+                baseline = json.load(arquivo)
+        baseline.update(resultados)
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as arquivo:
+            json.dump(baseline, arquivo, indent=2, ensure_ascii=False, sort_keys=True)
+        print(f'\nBaseline gravada em {args.baseline}')
+        return
+    
+    if baseline is None:
+        # Sem baseline não há com o que comparar: falha em vez de aprovar a execução
+        if not os.path.exists(args.baseline):
+            print(f'\nSem baseline em {args.baseline}; crie-a com --salvar ou compare com --referencia')
+            sys.exit(1)
+        
+        with open(args.baseline, encoding='utf-8') as arquivo:
+            baseline = json.load(arquivo)
+    
+    regressoes = comparar(resultados, baseline, args.limite, args.tolerancia_ms)
+    
+    if regressoes:
+        print('\nRegressões em relação à baseline:')
+        for regressao in regressoes:
+            print(f'  {regressao}')
+        sys.exit(1)
+    print('\nSem regressões em relação à baseline')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Cadastro de pacientes: POSTs individuais em /registro contra a importação em blocos.
+
+Uso: python benchmarks/bench_importacao.py [--pacientes 10000] [--registros 300] [--rounds 29000] [--processos N]
+
+O registro individual é medido em uma amostra (--registros) e extrapolado
+para o total, já que 10 mil POSTs com PBKDF2 na própria thread levam minutos.
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from config import config, Config
+from extensions import db
+from models.paciente import Paciente
+from servicos.importacao import importar_pacientes
+
+def criar_app(banco, rounds, processos):
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{banco}'
+        SENHA_PBKDF2_ROUNDS = rounds
+        SENHA_POOL_PROCESSOS = processos
+        SENHA_TIMEOUT_FILA = 600
+
+    config['benchmark'] = BenchmarkConfig
+    app = create_app('benchmark')
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+    return app
+
+def gerar_csv(quantidade):
+    linhas = ['nome_usuario,email,nome,telefone,senha']
+    linhas += [f'paciente{i},paciente{i}@teste.com,Paciente {i},11{i:09d},senha{i}' for i in range(quantidade)]
+    return '\n'.join(linhas) + '\n'
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pacientes', type=int, default=10000)
+    parser.add_argument('--registros', type=int, default=300)
+    parser.add_argument('--rounds', type=int, default=29000)
+    parser.add_argument('--processos', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        app = criar_app(os.path.join(diretorio, 'registro.db'), args.rounds, 0)
+        cliente = app.test_client()
+        inicio = time.perf_counter()
+        for i in range(args.registros):
+            resposta = cliente.post('/api/auth/registro', json={
+                'nome_usuario': f'paciente{i}', 'senha': f'senha{i}', 'email': f'paciente{i}@teste.com',
+                'nome': f'Paciente {i}', 'telefone': '11999999999', 'tipo_usuario': 'paciente'
+            })
+            assert resposta.status_code == 201, resposta.data
+        por_paciente = (time.perf_counter() - inicio) / args.registros
+
+        app = criar_app(os.path.join(diretorio, 'importacao.db'), args.rounds, args.processos)
+        conteudo = gerar_csv(args.pacientes)
+        with app.app_context():
+            inicio = time.perf_counter()
+            relatorio = importar_pacientes(io.StringIO(conteudo), 'pacientes.csv')
+            duracao = time.perf_counter() - inicio
+            assert relatorio['importados'] == args.pacientes, relatorio['erros'][:5]
+            assert db.session.query(Paciente).count() == args.pacientes
+            app.extensions['senhas'].encerrar()
+
+    print(f'{args.pacientes} pacientes, PBKDF2 com {args.rounds} rounds')
+    print(f'registro individual {por_paciente * args.pacientes:8.1f} s (estimado a partir de {args.registros})')
+    print(f'importação          {duracao:8.1f} s   ({args.processos} processos)')
+
+if __name__ == '__main__':
+    main()
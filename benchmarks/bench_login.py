@@ -0,0 +1,101 @@
+"""Vazão de login sob concorrência.
+
+Compara o cálculo do PBKDF2 na própria thread da requisição com o pool de
+processos, medindo logins por segundo e a latência do /api/health enquanto
+os logins acontecem.
+
+Uso: python benchmarks/bench_login.py [--threads 16] [--logins 200] [--rounds 29000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from config import config, Config
+from extensions import db
+from models.usuario import Usuario
+
+def criar_app(banco, rounds, processos, max_concorrencia):
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{banco}'
+        SENHA_PBKDF2_ROUNDS = rounds
+        SENHA_POOL_PROCESSOS = processos
+        SENHA_MAX_CONCORRENCIA = max_concorrencia
+        SENHA_TIMEOUT_FILA = 60
+
+    config['benchmark'] = BenchmarkConfig
+    app = create_app('benchmark')
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        usuario = Usuario(nome_usuario='bench', email='bench@teste.com', nome='Bench', tipo_usuario='paciente')
+        usuario.definir_senha('senha123')
+        db.session.add(usuario)
+        db.session.commit()
+
+    return app
+
+def medir(app, threads, logins):
+    def login(_):
+        resposta = app.test_client().post('/api/auth/login', json={'nome_usuario': 'bench', 'senha': 'senha123'})
+        assert resposta.status_code == 200, resposta.data
+
+    latencias = []
+    parar = threading.Event()
+
+    def sondar_health():
+        cliente = app.test_client()
+        while not parar.is_set():
+            inicio = time.perf_counter()
+            cliente.get('/api/health')
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            time.sleep(0.01)
+
+    sonda = threading.Thread(target=sondar_health)
+    sonda.start()
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(login, range(logins)))
+    duracao = time.perf_counter() - inicio
+
+    parar.set()
+    sonda.join()
+
+    return {
+        'logins_por_segundo': logins / duracao,
+        'health_p50_ms': statistics.median(latencias),
+        'health_max_ms': max(latencias)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=29000)
+    parser.add_argument('--processos', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        banco = os.path.join(diretorio, 'bench.db')
+        cenarios = [
+            ('na thread', 0, args.threads),
+            (f'pool ({args.processos} processos)', args.processos, 2 * args.processos)
+        ]
+        for nome, processos, max_concorrencia in cenarios:
+            app = criar_app(banco, args.rounds, processos, max_concorrencia)
+            resultado = medir(app, args.threads, args.logins)
+            app.extensions['senhas'].encerrar()
+            print(f"{nome:<24} {resultado['logins_por_segundo']:8.1f} logins/s   "
+                  f"health p50 {resultado['health_p50_ms']:7.2f} ms   max {resultado['health_max_ms']:7.2f} ms")
+
+if __name__ == '__main__':
+    main()
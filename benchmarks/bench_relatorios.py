@@ -0,0 +1,157 @@
+"""Relatórios das análises: laços em Python contra o cálculo vetorizado (pandas/numpy).
+
+Uso: python benchmarks/bench_relatorios.py [--linhas 1000000] [--janela 30]
+
+Os dados sintéticos são gerados em memória (sem banco): a leitura SQL é a
+mesma nas duas implementações, então só o cálculo é medido.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicos.relatorios import DIAS_SEMANA, gerar_relatorios
+
+STATUS = np.array(['concluído', 'cancelado', 'pendente', 'confirmado'])
+
+def gerar_dados(linhas, semente=42):
+    gerador = np.random.default_rng(semente)
+    # Cinco anos de agendamentos em horas cheias entre 8h e 18h
+    dias = gerador.integers(0, 5 * 365, linhas)
+    horas = gerador.integers(8, 19, linhas)
+    inicio = np.datetime64('2020-01-01T00:00') + (dias * 24 + horas).astype('timedelta64[h]')
+
+    agendamentos = pd.DataFrame({
+        'inicio': inicio.astype('datetime64[ns]'),
+        'status': STATUS[gerador.choice(len(STATUS), linhas, p=[0.6, 0.15, 0.15, 0.1])],
+        'paciente_id': gerador.integers(1, 2000, linhas)
+    })
+    prontuarios = pd.DataFrame({
+        'data': (np.datetime64('2020-01-01') + gerador.integers(0, 5 * 365, linhas // 2).astype('timedelta64[D]')).astype('datetime64[ns]')
+    })
+    return agendamentos, prontuarios
+
+def relatorios_com_lacos(agendamentos, prontuarios, janela_dias):
+    # Mesmos relatórios com contagens em dicionários, linha a linha
+    por_dia = defaultdict(lambda: [0, 0])
+    ocupacao = defaultdict(int)
+    por_mes = defaultdict(lambda: [0, 0])
+    sessoes = defaultdict(list)
+
+    for inicio, status, paciente_id in agendamentos:
+        if status == 'concluído':
+            por_dia[inicio.date()][0] += 1
+        elif status == 'cancelado':
+            por_dia[inicio.date()][1] += 1
+        ocupacao[(inicio.weekday(), inicio.hour)] += 1
+        por_mes[inicio.strftime('%Y-%m')][0] += 1
+        if status != 'cancelado':
+            sessoes[paciente_id].append(inicio)
+
+    for data in prontuarios:
+        por_mes[data.strftime('%Y-%m')][1] += 1
+
+    serie = []
+    if agendamentos:
+        primeiro = min(inicio for inicio, _, _ in agendamentos).date()
+        ultimo = max(inicio for inicio, _, _ in agendamentos).date()
+        dia = primeiro
+        while dia <= ultimo:
+            concluidos = cancelados = 0
+            for anterior in range(janela_dias):
+                contagem = por_dia.get(dia - timedelta(days=anterior))
+                if contagem:
+                    concluidos += contagem[0]
+                    cancelados += contagem[1]
+            total = concluidos + cancelados
+            serie.append({'data': dia.isoformat(), 'taxa': round(concluidos / total * 100, 2) if total else None})
+            dia += timedelta(days=1)
+
+    horas = sorted({hora for _, hora in ocupacao})
+    ocupacao_semana = {
+        dia: {f'{hora:02d}:00': ocupacao.get((indice, hora), 0) for hora in horas}
+        for indice, dia in enumerate(DIAS_SEMANA)
+    }
+
+    volume = []
+    if por_mes:
+        mes = datetime.strptime(min(por_mes), '%Y-%m')
+        anterior = None
+        while mes.strftime('%Y-%m') <= max(por_mes):
+            chave = mes.strftime('%Y-%m')
+            total_agendamentos, total_prontuarios = por_mes.get(chave, (0, 0))
+            variacao = round((total_agendamentos - anterior) / anterior * 100, 2) if anterior else None
+            volume.append({
+                'mes': chave,
+                'agendamentos': total_agendamentos,
+                'prontuarios': total_prontuarios,
+                'variacao_agendamentos': variacao
+            })
+            anterior = total_agendamentos
+            mes = (mes + timedelta(days=32)).replace(day=1)
+
+    cadencia = []
+    for paciente_id in sorted(sessoes):
+        datas = sorted(sessoes[paciente_id])
+        intervalos = [(b - a).total_seconds() / 86400 for a, b in zip(datas, datas[1:])]
+        cadencia.append({
+            'paciente_id': paciente_id,
+            'sessoes': len(datas),
+            'intervalo_medio_dias': round(sum(intervalos) / len(intervalos), 2) if intervalos else None
+        })
+
+    return {
+        'taxa_comparecimento_movel': {'janela_dias': janela_dias, 'serie': serie},
+        'ocupacao_semana_hora': ocupacao_semana,
+        'volume_mensal': volume,
+        'cadencia_pacientes': cadencia
+    }
+
+def equivalentes(a, b):
+    # Médias podem diferir no último dígito arredondado pela ordem das somas
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(equivalentes(a[chave], b[chave]) for chave in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(equivalentes(x, y) for x, y in zip(a, b))
+    if isinstance(a, float) and isinstance(b, float):
+        return abs(a - b) < 0.015
+    return a == b
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=1000000)
+    parser.add_argument('--janela', type=int, default=30)
+    args = parser.parse_args()
+
+    agendamentos, prontuarios = gerar_dados(args.linhas)
+
+    # Linhas como objetos Python, como chegariam do banco para os laços
+    linhas = list(zip(
+        agendamentos['inicio'].to_numpy().astype('datetime64[us]').tolist(),
+        agendamentos['status'].tolist(), agendamentos['paciente_id'].tolist()
+    ))
+    datas = prontuarios['data'].to_numpy().astype('datetime64[us]').tolist()
+
+    inicio = time.perf_counter()
+    esperado = relatorios_com_lacos(linhas, datas, args.janela)
+    tempo_lacos = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    obtido = gerar_relatorios(agendamentos, prontuarios, args.janela)
+    tempo_vetorizado = time.perf_counter() - inicio
+
+    assert equivalentes(obtido, esperado), 'As implementações divergem'
+
+    print(f'{args.linhas} agendamentos, {len(prontuarios)} prontuários')
+    print(f'laços em Python {tempo_lacos:8.2f} s')
+    print(f'vetorizado      {tempo_vetorizado:8.2f} s   ({tempo_lacos / tempo_vetorizado:.1f}x)')
+
+if __name__ == '__main__':
+    main()
@@ -12,12 +12,37 @@ class Config:
     
     # Configurações JWT
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-chave-secreta-padrao'
-    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=15)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+    # Tokens revogados em memória: revogações por dia × dias de validade do refresh token
+    # (100000 ≈ 3300 logouts e renovações por dia em 30 dias)
+    JWT_REVOGACAO_MAX_ITENS = int(os.environ.get('JWT_REVOGACAO_MAX_ITENS', 100000))
     
     # Configurações de upload
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max upload
+    
+    # Configurações de senha (PBKDF2 calculado em um pool de processos)
+    SENHA_PBKDF2_ROUNDS = int(os.environ.get('SENHA_PBKDF2_ROUNDS', 29000))
+    SENHA_POOL_PROCESSOS = int(os.environ.get('SENHA_POOL_PROCESSOS', os.cpu_count() or 1))
+    SENHA_MAX_CONCORRENCIA = int(os.environ.get('SENHA_MAX_CONCORRENCIA', 2 * (os.cpu_count() or 1)))
+    SENHA_TIMEOUT_FILA = float(os.environ.get('SENHA_TIMEOUT_FILA', 5))
+    
+    # Cache das análises ('memoria', 'redis' ou 'nenhum')
+    ANALISES_CACHE_BACKEND = os.environ.get('ANALISES_CACHE_BACKEND', 'memoria')
+    ANALISES_CACHE_MAX_ITENS = int(os.environ.get('ANALISES_CACHE_MAX_ITENS', 1024))
+    ANALISES_CACHE_TTL = int(os.environ.get('ANALISES_CACHE_TTL', 300))
+    ANALISES_CACHE_REDIS_URL = os.environ.get('ANALISES_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    
+    # Gráficos das análises (renderizados em um pool de processos e guardados em disco)
+    GRAFICOS_DIRETORIO = os.environ.get('GRAFICOS_DIRETORIO') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'graficos')
+    GRAFICOS_POOL_PROCESSOS = int(os.environ.get('GRAFICOS_POOL_PROCESSOS', 1))
+    GRAFICOS_MAX_ARQUIVOS = int(os.environ.get('GRAFICOS_MAX_ARQUIVOS', 1000))
+    
+    # Instrumentação das consultas SQL por requisição (Server-Timing e log)
+    SQL_INSTRUMENTACAO = os.environ.get('SQL_INSTRUMENTACAO', '').lower() in ('1', 'true')
+    SQL_CONSULTA_LENTA_MS = float(os.environ.get('SQL_CONSULTA_LENTA_MS', 100))
+    SQL_MAIS_LENTAS = int(os.environ.get('SQL_MAIS_LENTAS', 3))
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -25,6 +50,10 @@ class DevelopmentConfig(Config):
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    # Hashes baratos e calculados na própria thread durante os testes
+    SENHA_PBKDF2_ROUNDS = 1000
+    SENHA_POOL_PROCESSOS = 0
+    GRAFICOS_POOL_PROCESSOS = 0
 
 class ProductionConfig(Config):
     DEBUG = False
@@ -1,6 +1,10 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from servicos.senhas import ServicoSenhas
+from servicos.tokens import ListaRevogacao
 
 # Inicializar extensões
 db = SQLAlchemy()
-migrate = Migrate()
\ No newline at end of file
+migrate = Migrate()
+senhas = ServicoSenhas()
+revogacao = ListaRevogacao()
\ No newline at end of file
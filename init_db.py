@@ -1,9 +1,274 @@
+"""Inicializa o banco de dados com os usuários de exemplo e, opcionalmente, dados sintéticos.
+
+Uso: python init_db.py [--psicologos 0] [--pacientes-por-psicologo 40] [--anos 2]
+                       [--cancelamentos 0.15] [--prontuarios 0.9]
+                       [--tamanho-prontuario 100 800] [--semente 42] [--hoje YYYY-MM-DD]
+
+Com --psicologos maior que zero são gerados psicólogos, pacientes, uma sessão
+semanal por paciente durante --anos (mais 4 semanas futuras) e prontuários das
+sessões concluídas. A geração é determinística: os mesmos parâmetros, a mesma
+semente e a mesma data de referência produzem os mesmos dados.
+"""
+import argparse
+import time
+import unicodedata
+from datetime import date, timedelta
+import numpy as np
+from sqlalchemy import insert, select
 from app import create_app
-from extensions import db
-from models import Usuario, Psicologo, Paciente
-from datetime import datetime
+from extensions import db, senhas
+from models import Usuario, Psicologo, Paciente, Agendamento, ProntuarioMedico
+from servicos.resumos import reconstruir
+
+# Horários da semana disponíveis para as sessões: segunda a sábado, das 8h às 19h
+DIAS_ATENDIMENTO = 6
+HORA_INICIAL = 8
+HORAS_POR_DIA = 12
+
+# Sessões já agendadas após a data de referência
+SEMANAS_FUTURAS = 4
+
+# Linhas por instrução executemany
+LINHAS_POR_LOTE = 50000
+
+PRIMEIROS_NOMES = [
+    'Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela', 'João',
+    'Júlia', 'Lucas', 'Mariana', 'Nicolas', 'Olívia', 'Pedro', 'Rafaela', 'Samuel', 'Tatiane', 'Vinícius'
+]
+SOBRENOMES = [
+    'Almeida', 'Barbosa', 'Cardoso', 'Costa', 'Ferreira', 'Gomes', 'Lima', 'Martins', 'Oliveira', 'Pereira',
+    'Ribeiro', 'Rodrigues', 'Santos', 'Silva', 'Souza'
+]
+ESPECIALIZACOES = [
+    'Psicologia Clínica', 'Terapia Cognitivo-Comportamental', 'Psicanálise', 'Neuropsicologia', 'Psicologia Infantil'
+]
+VOCABULARIO = (
+    'paciente relata semana ansiedade sono trabalho família sessão humor melhora dificuldade '
+    'rotina exercício respiração pensamentos automáticos crenças registro tarefa casa objetivo '
+    'acompanhamento evolução queixa relacionamento estresse apoio estratégia enfrentamento '
+    'autoestima emoções conflito escola memória atenção alimentação medicação encaminhamento'
+).split()
+
+def criar_dados_exemplo():
+    # Criar usuário psicólogo
+    psychologist_user = Usuario(
+        nome_usuario='cicera.santana',
+        email='cicera.santana@clinicamentalize.com',
+        nome='Cícera Santana',
+        telefone='(11) 98765-4321',
+        tipo_usuario='psicologo'
+    )
+    psychologist_user.definir_senha('senha123')
+    db.session.add(psychologist_user)
+    db.session.commit()
+    
+    # Criar psicólogo
+    psychologist = Psicologo(
+        usuario_id=psychologist_user.id,
+        registro='CRP 12345',
+        especializacao='Psicologia Clínica'
+    )
+    db.session.add(psychologist)
+    
+    # Criar usuários pacientes
+    patient1_user = Usuario(
+        nome_usuario='maria.oliveira',
+        email='maria@example.com',
+        nome='Maria Oliveira',
+        telefone='(11) 91234-5678',
+        tipo_usuario='paciente'
+    )
+    patient1_user.definir_senha('senha456')
+    db.session.add(patient1_user)
+    
+    patient2_user = Usuario(
+        nome_usuario='joao.santos',
+        email='joao@example.com',
+        nome='João Santos',
+        telefone='(11) 98765-1234',
+        tipo_usuario='paciente'
+    )
+    patient2_user.definir_senha('senha789')
+    db.session.add(patient2_user)
+    db.session.commit()
+    
+    # Criar pacientes
+    patient1 = Paciente(usuario_id=patient1_user.id)
+    patient2 = Paciente(usuario_id=patient2_user.id)
+    db.session.add(patient1)
+    db.session.add(patient2)
+    db.session.commit()
+
+def texto_datas(datas, unidade):
+    # Datas no formato gravado pelo SQLAlchemy ('YYYY-MM-DD' ou 'YYYY-MM-DD HH:MM:SS.ffffff'),
+    # convertidas de uma vez pelo numpy
+    return np.char.replace(np.datetime_as_string(datas, unit=unidade), 'T', ' ').tolist()
 
-def init_db():
+def inserir_em_lotes(modelo, colunas, linhas):
+    # executemany direto no driver, sem o processamento de tipos por valor do
+    # SQLAlchemy (o maior custo com milhões de linhas): datas já vêm como texto
+    conexao = db.session.connection()
+    compilado = insert(modelo.__table__).compile(dialect=conexao.dialect, column_keys=colunas)
+    if compilado.positional:
+        ordem = [colunas.index(nome) for nome in compilado.positiontup]
+        if ordem != list(range(len(colunas))):
+            linhas = [tuple(linha[indice] for indice in ordem) for linha in linhas]
+    else:
+        linhas = [dict(zip(colunas, linha)) for linha in linhas]
+    
+    for inicio in range(0, len(linhas), LINHAS_POR_LOTE):
+        conexao.exec_driver_sql(compilado.string, linhas[inicio:inicio + LINHAS_POR_LOTE])
+
+def inserir_usuarios(prefixo, quantidade, tipo_usuario, senha_hash, gerador, agora):
+    # Usuários com nomes sorteados; o índice garante nome de usuário e email únicos
+    primeiros = gerador.choice(PRIMEIROS_NOMES, quantidade)
+    sobrenomes = gerador.choice(SOBRENOMES, quantidade)
+    linhas = []
+    for indice, (primeiro, sobrenome) in enumerate(zip(primeiros.tolist(), sobrenomes.tolist()), start=1):
+        base = unicodedata.normalize('NFKD', f'{primeiro}.{sobrenome}').encode('ascii', 'ignore').decode().lower()
+        linhas.append((
+            f'{prefixo}.{base}.{indice}',
+            f'{base}.{indice}@{prefixo}.exemplo.com',
+            f'{primeiro} {sobrenome}',
+            f'(11) 9{indice % 10000:04d}-{indice // 10000 % 10000:04d}',
+            tipo_usuario, senha_hash, agora, agora
+        ))
+    inserir_em_lotes(Usuario, [
+        'nome_usuario', 'email', 'nome', 'telefone', 'tipo_usuario', 'senha_hash', 'criado_em', 'atualizado_em'
+    ], linhas)
+    
+    # Ids gerados, na ordem de inserção
+    return db.session.scalars(
+        select(Usuario.id).where(Usuario.nome_usuario.like(f'{prefixo}.%')).order_by(Usuario.id)
+    ).all()
+
+def gerar_dados_sinteticos(psicologos, pacientes_por_psicologo, anos=2, cancelamentos=0.15, prontuarios=0.9,
+                           tamanho_prontuario=(100, 800), semente=42, hoje=None, senha='senha123'):
+    """Gera psicólogos, pacientes, agendamentos semanais e prontuários com inserções em massa.
+
+    Cada paciente tem um horário fixo na semana do seu psicólogo (sem
+    conflitos entre pacientes). Sessões passadas são concluídas ou canceladas
+    (proporção 'cancelamentos'); as da próxima semana estão confirmadas e as
+    demais pendentes. Uma fração 'prontuarios' das sessões concluídas tem
+    prontuário, com texto de tamanho sorteado em 'tamanho_prontuario'. A senha
+    de todos os usuários gerados é a mesma, com o hash calculado uma única vez.
+    Retorna a quantidade de linhas inseridas por tabela.
+    """
+    horarios_semana = DIAS_ATENDIMENTO * HORAS_POR_DIA
+    if pacientes_por_psicologo > horarios_semana:
+        raise ValueError(f'Cada psicólogo atende no máximo {horarios_semana} pacientes semanais')
+    
+    gerador = np.random.default_rng(semente)
+    hoje = hoje or date.today()
+    momento_atual = np.datetime64(hoje, 'us')
+    agora = texto_datas(np.array([momento_atual]), 'us')[0]
+    senha_hash = senhas.gerar_hash(senha)
+    
+    # SQLite: cache de páginas maior durante a carga, para os índices caberem na memória
+    conexao = db.session.connection()
+    if conexao.dialect.name == 'sqlite':
+        conexao.exec_driver_sql('PRAGMA cache_size = -262144')
+    
+    # Psicólogos e pacientes
+    usuarios_psicologos = inserir_usuarios('psi', psicologos, 'psicologo', senha_hash, gerador, agora)
+    inserir_em_lotes(Psicologo, ['usuario_id', 'registro', 'especializacao', 'criado_em', 'atualizado_em'], [
+        (usuario_id, f'CRP 06/{indice:06d}', ESPECIALIZACOES[indice % len(ESPECIALIZACOES)], agora, agora)
+        for indice, usuario_id in enumerate(usuarios_psicologos, start=1)
+    ])
+    
+    total_pacientes = psicologos * pacientes_por_psicologo
+    usuarios_pacientes = inserir_usuarios('pac', total_pacientes, 'paciente', senha_hash, gerador, agora)
+    inserir_em_lotes(Paciente, ['usuario_id', 'criado_em', 'atualizado_em'], [
+        (usuario_id, agora, agora) for usuario_id in usuarios_pacientes
+    ])
+    
+    psicologos_ids = np.array(db.session.scalars(
+        select(Psicologo.id).join(Usuario).where(Usuario.nome_usuario.like('psi.%')).order_by(Psicologo.id)
+    ).all(), dtype=np.int64)
+    pacientes_ids = np.array(db.session.scalars(
+        select(Paciente.id).join(Usuario).where(Usuario.nome_usuario.like('pac.%')).order_by(Paciente.id)
+    ).all(), dtype=np.int64)
+    
+    # Horário semanal de cada paciente, sem repetição dentro do mesmo psicólogo
+    horarios = np.argsort(gerador.random((psicologos, horarios_semana)), axis=1)[:, :pacientes_por_psicologo].ravel()
+    deslocamentos = (
+        (horarios // HORAS_POR_DIA).astype('timedelta64[D]')
+        + (HORA_INICIAL + horarios % HORAS_POR_DIA).astype('timedelta64[h]')
+    )
+    
+    # Semanas a partir da segunda-feira de 'anos' atrás até as semanas futuras
+    semanas_passadas = int(round(anos * 52))
+    semanas = semanas_passadas + SEMANAS_FUTURAS
+    primeira_segunda = np.datetime64(hoje - timedelta(days=hoje.weekday(), weeks=semanas_passadas))
+    inicios = (
+        primeira_segunda
+        + (np.arange(semanas) * 7).astype('timedelta64[D]')[None, :]
+        + deslocamentos[:, None]
+    ).astype('datetime64[us]')
+    
+    # Uma linha por sessão, em ordem cronológica
+    psicologo_sessao = np.repeat(np.repeat(psicologos_ids, pacientes_por_psicologo), semanas)
+    paciente_sessao = np.repeat(pacientes_ids, semanas)
+    inicios = inicios.ravel()
+    ordem = np.argsort(inicios, kind='stable')
+    inicios, psicologo_sessao, paciente_sessao = inicios[ordem], psicologo_sessao[ordem], paciente_sessao[ordem]
+    
+    status = np.where(
+        inicios < momento_atual,
+        np.where(gerador.random(len(inicios)) < cancelamentos, 'cancelado', 'concluído'),
+        np.where(inicios < momento_atual + np.timedelta64(7, 'D'), 'confirmado', 'pendente')
+    )
+    
+    # Índices das tabelas grandes removidos durante a carga e recriados no final:
+    # construí-los de uma vez, ordenando, é mais rápido que atualizá-los linha a linha
+    indices = [indice for modelo in (Agendamento, ProntuarioMedico) for indice in modelo.__table__.indexes]
+    for indice in indices:
+        indice.drop(conexao)
+    
+    # Criação e última alteração registradas no horário da sessão
+    inicios_texto = texto_datas(inicios, 'us')
+    colunas = [
+        'inicio', 'duracao_minutos', 'status', 'observacoes', 'psicologo_id', 'paciente_id', 'criado_em', 'atualizado_em'
+    ]
+    quantidade = len(inicios_texto)
+    inserir_em_lotes(Agendamento, colunas, list(zip(
+        inicios_texto, [50] * quantidade, status.tolist(), [''] * quantidade,
+        psicologo_sessao.tolist(), paciente_sessao.tolist(), inicios_texto, inicios_texto
+    )))
+    
+    # Prontuários das sessões concluídas, com trechos de um texto sorteado uma única vez
+    com_prontuario = np.flatnonzero((status == 'concluído') & (gerador.random(len(inicios)) < prontuarios))
+    minimo, maximo = tamanho_prontuario
+    texto = ' '.join(gerador.choice(VOCABULARIO, max(2 * maximo, 100000) // 6).tolist())
+    tamanhos = gerador.integers(minimo, maximo + 1, len(com_prontuario))
+    inicios_palavras = np.flatnonzero(np.frombuffer(texto.encode('utf-32-le'), dtype=np.uint32) == ord(' ')) + 1
+    posicoes = gerador.choice(inicios_palavras[inicios_palavras < len(texto) - maximo], len(com_prontuario))
+    conteudos = [
+        texto[posicao:posicao + tamanho]
+        for posicao, tamanho in zip(posicoes.tolist(), tamanhos.tolist())
+    ]
+    
+    registros = [inicios_texto[indice] for indice in com_prontuario.tolist()]
+    inserir_em_lotes(ProntuarioMedico, ['data', 'conteudo', 'paciente_id', 'psicologo_id', 'criado_em', 'atualizado_em'], list(zip(
+        [momento[:10] for momento in registros], conteudos, paciente_sessao[com_prontuario].tolist(),
+        psicologo_sessao[com_prontuario].tolist(), registros, registros
+    )))
+    
+    for indice in indices:
+        indice.create(conexao)
+    
+    # As inserções em massa não passam pelos eventos do ORM: resumos recalculados de uma vez
+    reconstruir(conexao)
+    db.session.commit()
+    
+    return {
+        'psicologos': psicologos,
+        'pacientes': total_pacientes,
+        'agendamentos': quantidade,
+        'prontuarios': len(conteudos)
+    }
+
+def init_db(args=None):
     app = create_app()
     with app.app_context():
         # Criar tabelas
@@ -14,56 +279,36 @@ def init_db():
             print('Banco de dados já inicializado!')
             return
         
-        # Criar usuário psicólogo
-        psychologist_user = Usuario(
-            nome_usuario='cicera.santana',
-            email='cicera.santana@clinicamentalize.com',
-            nome='Cícera Santana',
-            telefone='(11) 98765-4321',
-            tipo_usuario='psicologo'
-        )
-        psychologist_user.definir_senha('senha123')
-        db.session.add(psychologist_user)
-        db.session.commit()
+        criar_dados_exemplo()
         
-        # Criar psicólogo
-        psychologist = Psicologo(
-            usuario_id=psychologist_user.id,
-            registro='CRP 12345',
-            especializacao='Psicologia Clínica'
-        )
-        db.session.add(psychologist)
-        
-        # Criar usuários pacientes
-        patient1_user = Usuario(
-            nome_usuario='maria.oliveira',
-            email='maria@example.com',
-            nome='Maria Oliveira',
-            telefone='(11) 91234-5678',
-            tipo_usuario='paciente'
-        )
-        patient1_user.definir_senha('senha456')
-        db.session.add(patient1_user)
-        
-        patient2_user = Usuario(
-            nome_usuario='joao.santos',
-            email='joao@example.com',
-            nome='João Santos',
-            telefone='(11) 98765-1234',
-            tipo_usuario='paciente'
-        )
-        patient2_user.definir_senha('senha789')
-        db.session.add(patient2_user)
-        db.session.commit()
-        
-        # Criar pacientes
-        patient1 = Paciente(usuario_id=patient1_user.id)
-        patient2 = Paciente(usuario_id=patient2_user.id)
-        db.session.add(patient1)
-        db.session.add(patient2)
-        db.session.commit()
+        if args and args.psicologos:
+            inicio = time.perf_counter()
+            totais = gerar_dados_sinteticos(
+                args.psicologos, args.pacientes_por_psicologo, args.anos, args.cancelamentos,
+                args.prontuarios, tuple(args.tamanho_prontuario), args.semente, args.hoje
+            )
+            print(', '.join(f'{quantidade} {tabela}' for tabela, quantidade in totais.items())
+                  + f' gerados em {time.perf_counter() - inicio:.1f} s')
         
         print('Banco de dados inicializado com sucesso!')
 
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--psicologos', type=int, default=0)
+    parser.add_argument('--pacientes-por-psicologo', type=int, default=40)
+    parser.add_argument('--anos', type=float, default=2)
+    parser.add_argument('--cancelamentos', type=float, default=0.15, help='Fração das sessões passadas canceladas')
+    parser.add_argument('--prontuarios', type=float, default=0.9, help='Fração das sessões concluídas com prontuário')
+    parser.add_argument('--tamanho-prontuario', type=int, nargs=2, default=[100, 800], metavar=('MIN', 'MAX'))
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--hoje', type=date.fromisoformat, default=None, help='Data de referência (YYYY-MM-DD)')
+    args = parser.parse_args()
+    
+    horarios_semana = DIAS_ATENDIMENTO * HORAS_POR_DIA
+    if not 0 < args.pacientes_por_psicologo <= horarios_semana:
+        parser.error(f'--pacientes-por-psicologo deve estar entre 1 e {horarios_semana}')
+    
+    init_db(args)
+
 if __name__ == '__main__':
-    init_db()
\ No newline at end of file
+    main()
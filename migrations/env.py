@@ -6,6 +6,7 @@ from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 
 from alembic import context
+from flask import current_app
 
 # Este é o objeto Config do Alembic, que fornece
 # acesso aos valores dentro do arquivo .ini em uso.
@@ -13,14 +14,21 @@ config = context.config
 
 # Interpreta o arquivo de configuração para logging do Python.
 # Esta linha configura os loggers basicamente.
-fileConfig(config.config_file_name)
+fileConfig(config.config_file_name, disable_existing_loggers=False)
 
 # adicione o objeto MetaData do seu modelo aqui
 # para suporte ao 'autogenerate'
-from models import Usuario, Psicologo, Paciente, Agendamento, ProntuarioMedico
+from models import Usuario, Psicologo, Paciente, Agendamento, ProntuarioMedico, SerieAgendamento
+from models import ResumoAgendamentosDia, ResumoAgendamentosPaciente, ResumoProntuariosMes
 from extensions import db
 target_metadata = db.metadata
 
+# A URL do banco vem da aplicação Flask carregada pelo Flask-Migrate
+config.set_main_option(
+    'sqlalchemy.url',
+    current_app.extensions['migrate'].db.engine.url.render_as_string(hide_password=False).replace('%', '%%')
+)
+
 # outros valores da configuração, definidos pelas necessidades do env.py,
 # podem ser obtidos:
 # minha_opcao_importante = config.get_main_option("minha_opcao_importante")
@@ -41,7 +49,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=target_metadata, literal_binds=True
+        url=url, target_metadata=target_metadata, literal_binds=True,
+        render_as_batch=True
     )
 
     with context.begin_transaction():
@@ -63,7 +72,9 @@ def run_migrations_online():
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            # Necessário para alterar tabelas no SQLite
+            render_as_batch=True
         )
 
         with context.begin_transaction():
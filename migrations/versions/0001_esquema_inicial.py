@@ -0,0 +1,90 @@
+"""esquema inicial
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'usuarios',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('nome_usuario', sa.String(length=64), nullable=False),
+        sa.Column('senha_hash', sa.String(length=128), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=False),
+        sa.Column('nome', sa.String(length=120), nullable=False),
+        sa.Column('telefone', sa.String(length=20), nullable=True),
+        sa.Column('tipo_usuario', sa.String(length=20), nullable=False),
+        sa.Column('criado_em', sa.DateTime(), nullable=True),
+        sa.Column('atualizado_em', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('nome_usuario'),
+        sa.UniqueConstraint('email')
+    )
+    op.create_table(
+        'psicologos',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('usuario_id', sa.Integer(), nullable=False),
+        sa.Column('registro', sa.String(length=20), nullable=False),
+        sa.Column('especializacao', sa.String(length=100), nullable=True),
+        sa.Column('criado_em', sa.DateTime(), nullable=True),
+        sa.Column('atualizado_em', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'pacientes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('usuario_id', sa.Integer(), nullable=False),
+        sa.Column('criado_em', sa.DateTime(), nullable=True),
+        sa.Column('atualizado_em', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'agendamentos',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('data', sa.String(length=10), nullable=False),
+        sa.Column('hora', sa.String(length=5), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('observacoes', sa.Text(), nullable=True),
+        sa.Column('psicologo_id', sa.Integer(), nullable=False),
+        sa.Column('paciente_id', sa.Integer(), nullable=False),
+        sa.Column('criado_em', sa.DateTime(), nullable=True),
+        sa.Column('atualizado_em', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['psicologo_id'], ['psicologos.id']),
+        sa.ForeignKeyConstraint(['paciente_id'], ['pacientes.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'prontuarios_medicos',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('data', sa.String(length=10), nullable=False),
+        sa.Column('conteudo', sa.Text(), nullable=False),
+        sa.Column('paciente_id', sa.Integer(), nullable=False),
+        sa.Column('psicologo_id', sa.Integer(), nullable=False),
+        sa.Column('criado_em', sa.DateTime(), nullable=True),
+        sa.Column('atualizado_em', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['paciente_id'], ['pacientes.id']),
+        sa.ForeignKeyConstraint(['psicologo_id'], ['psicologos.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('prontuarios_medicos')
+    op.drop_table('agendamentos')
+    op.drop_table('pacientes')
+    op.drop_table('psicologos')
+    op.drop_table('usuarios')
@@ -0,0 +1,46 @@
+"""índices para as consultas mais frequentes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Perfil do usuário autenticado (um psicólogo/paciente por usuário)
+    op.create_index('ix_psicologos_usuario_id', 'psicologos', ['usuario_id'], unique=True)
+    op.create_index('ix_pacientes_usuario_id', 'pacientes', ['usuario_id'], unique=True)
+
+    # Conflitos de horário e listagens por psicólogo/paciente
+    op.create_index(
+        'ix_agendamentos_psicologo_data_hora', 'agendamentos',
+        ['psicologo_id', 'data', 'hora']
+    )
+    op.create_index(
+        'ix_agendamentos_paciente_data', 'agendamentos',
+        ['paciente_id', 'data']
+    )
+
+    # Prontuários filtrados por psicólogo e paciente
+    op.create_index(
+        'ix_prontuarios_psicologo_paciente_data', 'prontuarios_medicos',
+        ['psicologo_id', 'paciente_id', 'data']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_prontuarios_psicologo_paciente_data', table_name='prontuarios_medicos')
+    op.drop_index('ix_agendamentos_paciente_data', table_name='agendamentos')
+    op.drop_index('ix_agendamentos_psicologo_data_hora', table_name='agendamentos')
+    op.drop_index('ix_pacientes_usuario_id', table_name='pacientes')
+    op.drop_index('ix_psicologos_usuario_id', table_name='psicologos')
@@ -0,0 +1,167 @@
+"""datas e horários tipados em agendamentos e prontuários
+
+Substitui agendamentos.data/hora (texto) por agendamentos.inicio (DateTime)
+e agendamentos.duracao_minutos, e converte prontuarios_medicos.data em Date.
+Os valores existentes são convertidos; se houver linhas com data ou hora em
+formato inválido a migração é interrompida antes de alterar o esquema,
+listando os ids para correção.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+agendamentos = sa.table(
+    'agendamentos',
+    sa.column('id', sa.Integer),
+    sa.column('data', sa.String),
+    sa.column('hora', sa.String),
+    sa.column('inicio', sa.DateTime)
+)
+
+prontuarios = sa.table(
+    'prontuarios_medicos',
+    sa.column('id', sa.Integer),
+    sa.column('data', sa.String),
+    sa.column('data_tipada', sa.Date)
+)
+
+
+def _converter_agendamentos(conexao):
+    convertidos = []
+    invalidos = []
+    for id_, data, hora in conexao.execute(sa.select(agendamentos.c.id, agendamentos.c.data, agendamentos.c.hora)):
+        try:
+            convertidos.append({'_id': id_, 'inicio': datetime.strptime(f'{data} {hora}', '%Y-%m-%d %H:%M')})
+        except (TypeError, ValueError):
+            invalidos.append(id_)
+    return convertidos, invalidos
+
+
+def _converter_prontuarios(conexao):
+    convertidos = []
+    invalidos = []
+    for id_, data in conexao.execute(sa.select(prontuarios.c.id, prontuarios.c.data)):
+        try:
+            convertidos.append({'_id': id_, 'data_tipada': datetime.strptime(data, '%Y-%m-%d').date()})
+        except (TypeError, ValueError):
+            invalidos.append(id_)
+    return convertidos, invalidos
+
+
+def upgrade():
+    conexao = op.get_bind()
+
+    # Validar todos os valores antes de qualquer alteração de esquema
+    convertidos, agendamentos_invalidos = _converter_agendamentos(conexao)
+    prontuarios_convertidos, prontuarios_invalidos = _converter_prontuarios(conexao)
+    if agendamentos_invalidos or prontuarios_invalidos:
+        raise RuntimeError(
+            'Corrija as datas em formato inválido antes de migrar. '
+            f'Agendamentos: {agendamentos_invalidos}. Prontuários: {prontuarios_invalidos}.'
+        )
+
+    with op.batch_alter_table('agendamentos') as batch_op:
+        batch_op.add_column(sa.Column('inicio', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('duracao_minutos', sa.Integer(), nullable=True))
+
+    if convertidos:
+        conexao.execute(
+            agendamentos.update().where(agendamentos.c.id == sa.bindparam('_id')),
+            convertidos
+        )
+
+    with op.batch_alter_table('agendamentos') as batch_op:
+        batch_op.drop_index('ix_agendamentos_psicologo_data_hora')
+        batch_op.drop_index('ix_agendamentos_paciente_data')
+        batch_op.alter_column('inicio', existing_type=sa.DateTime(), nullable=False)
+        batch_op.drop_column('data')
+        batch_op.drop_column('hora')
+        batch_op.create_index('ix_agendamentos_psicologo_inicio', ['psicologo_id', 'inicio'])
+        batch_op.create_index('ix_agendamentos_paciente_inicio', ['paciente_id', 'inicio'])
+
+    # A conversão de tipo é feita por uma coluna nova: no SQLite um CAST para
+    # DATE transformaria '2024-01-01' no número 2024
+    with op.batch_alter_table('prontuarios_medicos') as batch_op:
+        batch_op.add_column(sa.Column('data_tipada', sa.Date(), nullable=True))
+
+    if prontuarios_convertidos:
+        conexao.execute(
+            prontuarios.update().where(prontuarios.c.id == sa.bindparam('_id')),
+            prontuarios_convertidos
+        )
+
+    with op.batch_alter_table('prontuarios_medicos') as batch_op:
+        batch_op.drop_index('ix_prontuarios_psicologo_paciente_data')
+        batch_op.drop_column('data')
+        batch_op.alter_column('data_tipada', new_column_name='data', existing_type=sa.Date(), nullable=False)
+
+    with op.batch_alter_table('prontuarios_medicos') as batch_op:
+        batch_op.create_index('ix_prontuarios_psicologo_paciente_data', ['psicologo_id', 'paciente_id', 'data'])
+
+
+def downgrade():
+    conexao = op.get_bind()
+
+    with op.batch_alter_table('prontuarios_medicos') as batch_op:
+        batch_op.drop_index('ix_prontuarios_psicologo_paciente_data')
+        batch_op.alter_column('data', new_column_name='data_tipada', existing_type=sa.Date(), nullable=True)
+
+    with op.batch_alter_table('prontuarios_medicos') as batch_op:
+        batch_op.add_column(sa.Column('data', sa.String(length=10), nullable=True))
+
+    linhas = [
+        {'_id': id_, 'data': data_tipada.strftime('%Y-%m-%d')}
+        for id_, data_tipada in conexao.execute(sa.select(prontuarios.c.id, prontuarios.c.data_tipada))
+    ]
+    if linhas:
+        conexao.execute(
+            prontuarios.update().where(prontuarios.c.id == sa.bindparam('_id')).values(
+                data=sa.bindparam('data')
+            ),
+            linhas
+        )
+
+    with op.batch_alter_table('prontuarios_medicos') as batch_op:
+        batch_op.alter_column('data', existing_type=sa.String(length=10), nullable=False)
+        batch_op.drop_column('data_tipada')
+        batch_op.create_index('ix_prontuarios_psicologo_paciente_data', ['psicologo_id', 'paciente_id', 'data'])
+
+    with op.batch_alter_table('agendamentos') as batch_op:
+        batch_op.add_column(sa.Column('data', sa.String(length=10), nullable=True))
+        batch_op.add_column(sa.Column('hora', sa.String(length=5), nullable=True))
+
+    linhas = [
+        {'_id': id_, 'data': inicio.strftime('%Y-%m-%d'), 'hora': inicio.strftime('%H:%M')}
+        for id_, inicio in conexao.execute(sa.select(agendamentos.c.id, agendamentos.c.inicio))
+    ]
+    if linhas:
+        conexao.execute(
+            agendamentos.update().where(agendamentos.c.id == sa.bindparam('_id')).values(
+                data=sa.bindparam('data'), hora=sa.bindparam('hora')
+            ),
+            linhas
+        )
+
+    with op.batch_alter_table('agendamentos') as batch_op:
+        batch_op.drop_index('ix_agendamentos_psicologo_inicio')
+        batch_op.drop_index('ix_agendamentos_paciente_inicio')
+        batch_op.alter_column('data', existing_type=sa.String(length=10), nullable=False)
+        batch_op.alter_column('hora', existing_type=sa.String(length=5), nullable=False)
+        batch_op.drop_column('inicio')
+        batch_op.drop_column('duracao_minutos')
+        batch_op.create_index('ix_agendamentos_psicologo_data_hora', ['psicologo_id', 'data', 'hora'])
+        batch_op.create_index('ix_agendamentos_paciente_data', ['paciente_id', 'data'])
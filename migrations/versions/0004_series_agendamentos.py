@@ -0,0 +1,60 @@
+"""séries de agendamentos recorrentes
+
+Cria series_agendamentos e liga agendamentos às séries (serie_id e a
+data/hora original da ocorrência materializada).
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'series_agendamentos',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('regra', sa.String(length=20), nullable=False),
+        sa.Column('intervalo', sa.Integer(), nullable=False),
+        sa.Column('inicio', sa.DateTime(), nullable=False),
+        sa.Column('fim', sa.Date(), nullable=True),
+        sa.Column('duracao_minutos', sa.Integer(), nullable=True),
+        sa.Column('observacoes', sa.Text(), nullable=True),
+        sa.Column('excecoes', sa.JSON(), nullable=False),
+        sa.Column('psicologo_id', sa.Integer(), nullable=False),
+        sa.Column('paciente_id', sa.Integer(), nullable=False),
+        sa.Column('criado_em', sa.DateTime(), nullable=True),
+        sa.Column('atualizado_em', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['paciente_id'], ['pacientes.id']),
+        sa.ForeignKeyConstraint(['psicologo_id'], ['psicologos.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_series_agendamentos_psicologo_inicio', 'series_agendamentos', ['psicologo_id', 'inicio'])
+    op.create_index('ix_series_agendamentos_paciente_inicio', 'series_agendamentos', ['paciente_id', 'inicio'])
+
+    with op.batch_alter_table('agendamentos') as batch_op:
+        batch_op.add_column(sa.Column('serie_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('ocorrencia', sa.DateTime(), nullable=True))
+        batch_op.create_foreign_key('fk_agendamentos_serie_id', 'series_agendamentos', ['serie_id'], ['id'])
+        batch_op.create_index('ix_agendamentos_serie_id', ['serie_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('agendamentos') as batch_op:
+        batch_op.drop_index('ix_agendamentos_serie_id')
+        batch_op.drop_constraint('fk_agendamentos_serie_id', type_='foreignkey')
+        batch_op.drop_column('ocorrencia')
+        batch_op.drop_column('serie_id')
+
+    op.drop_index('ix_series_agendamentos_paciente_inicio', table_name='series_agendamentos')
+    op.drop_index('ix_series_agendamentos_psicologo_inicio', table_name='series_agendamentos')
+    op.drop_table('series_agendamentos')
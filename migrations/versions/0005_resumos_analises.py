@@ -0,0 +1,74 @@
+"""tabelas de resumo das análises
+
+Cria os resumos de agendamentos por dia e por paciente e de prontuários por
+mês, já preenchidos a partir dos dados existentes (o mesmo cálculo do
+comando 'flask reconstruir-resumos').
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'resumos_agendamentos_dia',
+        sa.Column('psicologo_id', sa.Integer(), nullable=False),
+        sa.Column('dia', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('psicologo_id', 'dia', 'status')
+    )
+    op.create_table(
+        'resumos_agendamentos_paciente',
+        sa.Column('psicologo_id', sa.Integer(), nullable=False),
+        sa.Column('paciente_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('psicologo_id', 'paciente_id', 'status')
+    )
+    op.create_table(
+        'resumos_prontuarios_mes',
+        sa.Column('psicologo_id', sa.Integer(), nullable=False),
+        sa.Column('paciente_id', sa.Integer(), nullable=False),
+        sa.Column('mes', sa.String(length=7), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('psicologo_id', 'paciente_id', 'mes')
+    )
+
+    if op.get_bind().dialect.name == 'sqlite':
+        dia, mes = 'date(inicio)', "strftime('%Y-%m', data)"
+    else:
+        dia, mes = 'CAST(inicio AS DATE)', "to_char(data, 'YYYY-MM')"
+
+    op.execute(
+        'INSERT INTO resumos_agendamentos_dia (psicologo_id, dia, status, total) '
+        f'SELECT psicologo_id, {dia}, status, count(id) FROM agendamentos '
+        f'GROUP BY psicologo_id, {dia}, status'
+    )
+    op.execute(
+        'INSERT INTO resumos_agendamentos_paciente (psicologo_id, paciente_id, status, total) '
+        'SELECT psicologo_id, paciente_id, status, count(id) FROM agendamentos '
+        'GROUP BY psicologo_id, paciente_id, status'
+    )
+    op.execute(
+        'INSERT INTO resumos_prontuarios_mes (psicologo_id, paciente_id, mes, total) '
+        f'SELECT psicologo_id, paciente_id, {mes}, count(id) FROM prontuarios_medicos '
+        f'GROUP BY psicologo_id, paciente_id, {mes}'
+    )
+
+
+def downgrade():
+    op.drop_table('resumos_prontuarios_mes')
+    op.drop_table('resumos_agendamentos_paciente')
+    op.drop_table('resumos_agendamentos_dia')
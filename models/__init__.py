@@ -3,4 +3,6 @@ from models.usuario import Usuario
 from models.psicologo import Psicologo
 from models.paciente import Paciente
 from models.agendamento import Agendamento
-from models.prontuario_medico import ProntuarioMedico
\ No newline at end of file
+from models.prontuario_medico import ProntuarioMedico
+from models.serie_agendamento import SerieAgendamento
+from models.resumo_analitico import ResumoAgendamentosDia, ResumoAgendamentosPaciente, ResumoProntuariosMes
@@ -1,19 +1,47 @@
 from extensions import db
-from datetime import datetime
+from datetime import datetime, date, time
 
 class Agendamento(db.Model):
     __tablename__ = 'agendamentos'
+    __table_args__ = (
+        # Conflitos de horário, listagens e intervalos de datas do psicólogo
+        db.Index('ix_agendamentos_psicologo_inicio', 'psicologo_id', 'inicio'),
+        # Listagens do paciente
+        db.Index('ix_agendamentos_paciente_inicio', 'paciente_id', 'inicio'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    data = db.Column(db.String(10), nullable=False)  # Formato: YYYY-MM-DD
-    hora = db.Column(db.String(5), nullable=False)   # Formato: HH:MM
+    inicio = db.Column(db.DateTime, nullable=False)  # Data e hora de início da consulta
+    duracao_minutos = db.Column(db.Integer, nullable=True)
     status = db.Column(db.String(20), nullable=False, default='pendente')  # pendente, confirmado, cancelado, concluído
     observacoes = db.Column(db.Text, nullable=True)
     psicologo_id = db.Column(db.Integer, db.ForeignKey('psicologos.id'), nullable=False)
     paciente_id = db.Column(db.Integer, db.ForeignKey('pacientes.id'), nullable=False)
+    # Ocorrência de série materializada: série de origem e data/hora original da ocorrência
+    serie_id = db.Column(db.Integer, db.ForeignKey('series_agendamentos.id'), nullable=True, index=True)
+    ocorrencia = db.Column(db.DateTime, nullable=True)
     criado_em = db.Column(db.DateTime, default=datetime.utcnow)
     atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Data (YYYY-MM-DD) e hora (HH:MM) derivadas de 'inicio', mantidas para os clientes da API
+    @property
+    def data(self):
+        return self.inicio.strftime('%Y-%m-%d') if self.inicio else None
+    
+    @data.setter
+    def data(self, valor):
+        dia = datetime.strptime(valor, '%Y-%m-%d').date()
+        self.inicio = datetime.combine(dia, self.inicio.time() if self.inicio else time())
+    
+    @property
+    def hora(self):
+        return self.inicio.strftime('%H:%M') if self.inicio else None
+    
+    @hora.setter
+    def hora(self, valor):
+        horario = datetime.strptime(valor, '%H:%M').time()
+        self.inicio = datetime.combine(self.inicio.date() if self.inicio else date.min, horario)
+    
     def __repr__(self):
         return f'<Agendamento {self.id}> Data: {self.data}, Hora: {self.hora}'
     
@@ -22,10 +50,14 @@ class Agendamento(db.Model):
             'id': self.id,
             'data': self.data,
             'hora': self.hora,
+            'inicio': self.inicio.isoformat() if self.inicio else None,
+            'duracao_minutos': self.duracao_minutos,
             'status': self.status,
             'observacoes': self.observacoes,
             'psicologo_id': self.psicologo_id,
             'paciente_id': self.paciente_id,
+            'serie_id': self.serie_id,
+            'ocorrencia': self.ocorrencia.isoformat() if self.ocorrencia else None,
             'criado_em': self.criado_em.isoformat() if self.criado_em else None,
             'atualizado_em': self.atualizado_em.isoformat() if self.atualizado_em else None
         }
@@ -34,4 +66,4 @@ class Agendamento(db.Model):
             resultado['psicologo'] = self.psicologo.para_dict() if self.psicologo else None
             resultado['paciente'] = self.paciente.para_dict() if self.paciente else None
         
-        return resultado
\ No newline at end of file
+        return resultado
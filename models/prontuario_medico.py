@@ -1,24 +1,40 @@
 from extensions import db
-from datetime import datetime
+from datetime import datetime, date
+from sqlalchemy.orm import validates
 
 class ProntuarioMedico(db.Model):
     __tablename__ = 'prontuarios_medicos'
+    __table_args__ = (
+        # Prontuários filtrados por psicólogo e paciente
+        db.Index('ix_prontuarios_psicologo_paciente_data', 'psicologo_id', 'paciente_id', 'data'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    data = db.Column(db.String(10), nullable=False)  # Formato: YYYY-MM-DD
+    data = db.Column(db.Date, nullable=False)  # Recebida e exibida como YYYY-MM-DD
     conteudo = db.Column(db.Text, nullable=False)
     paciente_id = db.Column(db.Integer, db.ForeignKey('pacientes.id'), nullable=False)
     psicologo_id = db.Column(db.Integer, db.ForeignKey('psicologos.id'), nullable=False)
     criado_em = db.Column(db.DateTime, default=datetime.utcnow)
     atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    @validates('data')
+    def validar_data(self, chave, valor):
+        # Aceita datas no formato YYYY-MM-DD vindas da API
+        if isinstance(valor, str):
+            return datetime.strptime(valor, '%Y-%m-%d').date()
+        if isinstance(valor, datetime):
+            return valor.date()
+        if not isinstance(valor, date):
+            raise TypeError('Data deve estar no formato YYYY-MM-DD')
+        return valor
+    
     def __repr__(self):
         return f'<ProntuarioMedico {self.id}> Data: {self.data}'
     
     def para_dict(self, incluir_detalhes=False):
         resultado = {
             'id': self.id,
-            'data': self.data,
+            'data': self.data.isoformat() if self.data else None,
             'conteudo': self.conteudo,
             'paciente_id': self.paciente_id,
             'psicologo_id': self.psicologo_id,
@@ -5,7 +5,7 @@ class Psicologo(db.Model):
     __tablename__ = 'psicologos'
     
     id = db.Column(db.Integer, primary_key=True)
-    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False, unique=True, index=True)
     registro = db.Column(db.String(20), nullable=False)  # Número de registro no CRP
     especializacao = db.Column(db.String(100), nullable=True)
     criado_em = db.Column(db.DateTime, default=datetime.utcnow)
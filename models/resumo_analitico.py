@@ -0,0 +1,37 @@
+from extensions import db
+
+# Tabelas de resumo para as análises, mantidas a cada alteração de agendamentos
+# e prontuários (servicos/resumos.py) e reconstruídas por 'flask reconstruir-resumos'
+
+class ResumoAgendamentosDia(db.Model):
+    __tablename__ = 'resumos_agendamentos_dia'
+    
+    psicologo_id = db.Column(db.Integer, primary_key=True)
+    dia = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<ResumoAgendamentosDia {self.psicologo_id} {self.dia} {self.status}: {self.total}>'
+
+class ResumoAgendamentosPaciente(db.Model):
+    __tablename__ = 'resumos_agendamentos_paciente'
+    
+    psicologo_id = db.Column(db.Integer, primary_key=True)
+    paciente_id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<ResumoAgendamentosPaciente {self.psicologo_id} {self.paciente_id} {self.status}: {self.total}>'
+
+class ResumoProntuariosMes(db.Model):
+    __tablename__ = 'resumos_prontuarios_mes'
+    
+    psicologo_id = db.Column(db.Integer, primary_key=True)
+    paciente_id = db.Column(db.Integer, primary_key=True)
+    mes = db.Column(db.String(7), primary_key=True)  # YYYY-MM
+    total = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<ResumoProntuariosMes {self.psicologo_id} {self.paciente_id} {self.mes}: {self.total}>'
@@ -0,0 +1,172 @@
+from extensions import db
+from datetime import datetime, timedelta
+from math import lcm
+
+# Passo de cada regra de recorrência, em dias (multiplicado pelo intervalo)
+DIAS_POR_REGRA = {'diaria': 1, 'semanal': 7}
+
+class SerieAgendamento(db.Model):
+    """Agendamentos recorrentes (ex.: sessão semanal) guardados como uma única linha.
+
+    As ocorrências não são gravadas: são calculadas a partir de 'inicio' e do
+    período (regra × intervalo) apenas dentro da janela consultada. Uma
+    ocorrência alterada ou concluída vira um Agendamento (com serie_id e a
+    data original em 'ocorrencia') e sua data entra em 'excecoes', assim como
+    as ocorrências removidas.
+    """
+    __tablename__ = 'series_agendamentos'
+    __table_args__ = (
+        db.Index('ix_series_agendamentos_psicologo_inicio', 'psicologo_id', 'inicio'),
+        db.Index('ix_series_agendamentos_paciente_inicio', 'paciente_id', 'inicio'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    regra = db.Column(db.String(20), nullable=False, default='semanal')  # diaria, semanal
+    intervalo = db.Column(db.Integer, nullable=False, default=1)
+    inicio = db.Column(db.DateTime, nullable=False)  # Data e hora da primeira ocorrência
+    fim = db.Column(db.Date, nullable=True)  # Última data possível (inclusiva); sem fim se nulo
+    duracao_minutos = db.Column(db.Integer, nullable=True)
+    observacoes = db.Column(db.Text, nullable=True)
+    excecoes = db.Column(db.JSON, nullable=False, default=list)  # Datas (YYYY-MM-DD) sem ocorrência
+    psicologo_id = db.Column(db.Integer, db.ForeignKey('psicologos.id'), nullable=False)
+    paciente_id = db.Column(db.Integer, db.ForeignKey('pacientes.id'), nullable=False)
+    criado_em = db.Column(db.DateTime, default=datetime.utcnow)
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relacionamentos
+    psicologo = db.relationship('Psicologo', backref=db.backref('series', lazy='dynamic', cascade='all, delete-orphan'))
+    paciente = db.relationship('Paciente', backref=db.backref('series', lazy='dynamic', cascade='all, delete-orphan'))
+    agendamentos = db.relationship('Agendamento', backref='serie', lazy='dynamic')
+    
+    @property
+    def periodo(self):
+        return timedelta(days=DIAS_POR_REGRA[self.regra] * self.intervalo)
+    
+    def _proxima_na_regra(self, momento):
+        # Primeira data da progressão em ou após 'momento', ignorando exceções
+        if momento <= self.inicio:
+            proxima = self.inicio
+        else:
+            passos = -((self.inicio - momento) // self.periodo)  # divisão com arredondamento para cima
+            proxima = self.inicio + passos * self.periodo
+        
+        if self.fim and proxima.date() > self.fim:
+            return None
+        return proxima
+    
+    def _na_regra(self, momento):
+        return (
+            momento >= self.inicio
+            and (self.fim is None or momento.date() <= self.fim)
+            and (momento - self.inicio) % self.periodo == timedelta(0)
+        )
+    
+    def tem_ocorrencia(self, momento):
+        # Verificação aritmética, sem expandir a série
+        return self._na_regra(momento) and momento.date().isoformat() not in (self.excecoes or [])
+    
+    def ocorrencias(self, inicio, fim):
+        # Gerador das ocorrências com inicio <= momento < fim
+        excecoes = set(self.excecoes or [])
+        momento = self._proxima_na_regra(inicio)
+        
+        while momento is not None and momento < fim and (self.fim is None or momento.date() <= self.fim):
+            if momento.date().isoformat() not in excecoes:
+                yield momento
+            momento += self.periodo
+    
+    def coincide_com(self, outra):
+        # Duas progressões só se cruzam a cada mmc(períodos); basta achar a
+        # primeira coincidência e avançar enquanto exceções a anularem
+        passo = timedelta(days=lcm(self.periodo.days, outra.periodo.days))
+        
+        momento = self._proxima_na_regra(max(self.inicio, outra.inicio))
+        limite = momento + passo if momento else None
+        while momento is not None and momento < limite and not outra._na_regra(momento):
+            momento = self._proxima_na_regra(momento + self.periodo)
+        if momento is None or momento >= limite:
+            return False
+        
+        for _ in range(len(self.excecoes or []) + len(outra.excecoes or []) + 1):
+            if not (self._na_regra(momento) and outra._na_regra(momento)):
+                return False
+            if self.tem_ocorrencia(momento) and outra.tem_ocorrencia(momento):
+                return True
+            momento += passo
+        return False
+    
+    def dividir(self, dia):
+        """Encerra a série na véspera de 'dia' e retorna a sua continuação.
+
+        A continuação começa na primeira ocorrência da regra a partir de 'dia'
+        e leva as exceções dessas datas; as ocorrências anteriores ficam com
+        esta série, sem alteração. Retorna None se a série termina antes.
+        """
+        inicio = self._proxima_na_regra(datetime.combine(dia, self.inicio.time()))
+        if inicio is None:
+            return None
+        
+        limite = dia.isoformat()
+        continuacao = SerieAgendamento(
+            regra=self.regra,
+            intervalo=self.intervalo,
+            inicio=inicio,
+            fim=self.fim,
+            duracao_minutos=self.duracao_minutos,
+            observacoes=self.observacoes,
+            excecoes=[excecao for excecao in self.excecoes or [] if excecao >= limite],
+            psicologo_id=self.psicologo_id,
+            paciente_id=self.paciente_id
+        )
+        self.fim = dia - timedelta(days=1)
+        self.excecoes = [excecao for excecao in self.excecoes or [] if excecao < limite]
+        return continuacao
+    
+    def adicionar_excecao(self, dia):
+        # Reatribuído (e não alterado no lugar) para a mudança do JSON ser gravada
+        self.excecoes = sorted(set(self.excecoes or []) | {dia.isoformat()})
+    
+    def __repr__(self):
+        return f'<SerieAgendamento {self.id}> Regra: {self.regra}, Início: {self.inicio}'
+    
+    def ocorrencia_para_dict(self, momento, incluir_detalhes=False):
+        # Ocorrência calculada no mesmo formato de Agendamento.para_dict
+        resultado = {
+            'id': None,
+            'serie_id': self.id,
+            'ocorrencia': momento.isoformat(),
+            'data': momento.strftime('%Y-%m-%d'),
+            'hora': momento.strftime('%H:%M'),
+            'inicio': momento.isoformat(),
+            'duracao_minutos': self.duracao_minutos,
+            'status': 'pendente',
+            'observacoes': self.observacoes,
+            'psicologo_id': self.psicologo_id,
+            'paciente_id': self.paciente_id,
+            'criado_em': self.criado_em.isoformat() if self.criado_em else None,
+            'atualizado_em': self.atualizado_em.isoformat() if self.atualizado_em else None
+        }
+        
+        if incluir_detalhes:
+            resultado['psicologo'] = self.psicologo.para_dict() if self.psicologo else None
+            resultado['paciente'] = self.paciente.para_dict() if self.paciente else None
+        
+        return resultado
+    
+    def para_dict(self):
+        return {
+            'id': self.id,
+            'regra': self.regra,
+            'intervalo': self.intervalo,
+            'inicio': self.inicio.isoformat() if self.inicio else None,
+            'data': self.inicio.strftime('%Y-%m-%d') if self.inicio else None,
+            'hora': self.inicio.strftime('%H:%M') if self.inicio else None,
+            'fim': self.fim.isoformat() if self.fim else None,
+            'duracao_minutos': self.duracao_minutos,
+            'observacoes': self.observacoes,
+            'excecoes': self.excecoes or [],
+            'psicologo_id': self.psicologo_id,
+            'paciente_id': self.paciente_id,
+            'criado_em': self.criado_em.isoformat() if self.criado_em else None,
+            'atualizado_em': self.atualizado_em.isoformat() if self.atualizado_em else None
+        }
@@ -1,6 +1,5 @@
-from extensions import db
+from extensions import db, senhas
 from datetime import datetime
-from passlib.hash import pbkdf2_sha256
 
 class Usuario(db.Model):
     __tablename__ = 'usuarios'
@@ -19,11 +18,15 @@ class Usuario(db.Model):
     psicologo = db.relationship('Psicologo', backref='usuario', uselist=False, cascade='all, delete-orphan')
     paciente = db.relationship('Paciente', backref='usuario', uselist=False, cascade='all, delete-orphan')
     
+    # O cálculo do PBKDF2 é delegado ao pool de processos (servicos/senhas.py)
     def definir_senha(self, senha):
-        self.senha_hash = pbkdf2_sha256.hash(senha)
+        self.senha_hash = senhas.gerar_hash(senha)
     
     def verificar_senha(self, senha):
-        return pbkdf2_sha256.verify(senha, self.senha_hash)
+        return senhas.verificar(senha, self.senha_hash)
+    
+    def senha_precisa_atualizar(self):
+        return senhas.precisa_atualizar(self.senha_hash)
     
     def __repr__(self):
         return f'<Usuario {self.nome_usuario}>'
@@ -1,14 +1,104 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from flask_jwt_extended import jwt_required, get_jwt
 from models.agendamento import Agendamento
 from models.psicologo import Psicologo
 from models.paciente import Paciente
+from models.usuario import Usuario
 from extensions import db
 from functools import wraps
-from datetime import datetime
+from datetime import datetime, date, timedelta
+from sqlalchemy import insert, select
+from sqlalchemy.orm import joinedload
+from servicos.paginacao import paginacao_solicitada, ParametroPaginacaoInvalido
+from servicos.datas import ler_intervalo, filtrar_periodo
+from servicos.identidade import obter_psicologo_id, obter_paciente_id
+from servicos.agenda import (
+    janela_ocorrencias, series_no_periodo, ocorrencias_no_periodo, paginar_agenda, horario_ocupado,
+    intervalos_ocupados, horarios_livres
+)
+from servicos.resumos import registrar_agendamentos_inseridos
+from servicos.transmissao import formato_transmissao, transmitir, LINHAS_POR_LOTE
+from servicos.exportacao import ler_opcoes_exportacao, parquet_disponivel, exportar
+import heapq
 
 appointments_bp = Blueprint('agendamentos', __name__)
 
+# Opções de carregamento para serializar agendamentos com detalhes
+# (psicólogo, paciente e respectivos usuários) sem consultas N+1
+def opcoes_detalhes_agendamento():
+    return (
+        joinedload(Agendamento.psicologo).joinedload(Psicologo.usuario),
+        joinedload(Agendamento.paciente).joinedload(Paciente.usuario)
+    )
+
+# A duração é opcional; quando informada deve ser um número inteiro positivo de minutos
+def duracao_valida(duracao):
+    return duracao is None or (isinstance(duracao, int) and not isinstance(duracao, bool) and duracao > 0)
+
+# Quantidade máxima de itens aceitos em uma criação em lote
+LIMITE_LOTE = 1000
+
+# Valida um item do lote e devolve (linha para inserção, mensagem de erro)
+def ler_item_lote(item):
+    if not isinstance(item, dict):
+        return None, 'Item deve ser um objeto com data, hora e paciente_id'
+    
+    for campo in ['data', 'hora', 'paciente_id']:
+        if campo not in item:
+            return None, f'Campo {campo} é obrigatório'
+    
+    try:
+        inicio = datetime.strptime(f"{item['data']} {item['hora']}", '%Y-%m-%d %H:%M')
+    except (TypeError, ValueError):
+        return None, 'Data ou hora em formato inválido. Use YYYY-MM-DD e HH:MM'
+    
+    if not isinstance(item['paciente_id'], int) or isinstance(item['paciente_id'], bool):
+        return None, 'Campo paciente_id deve ser um número inteiro'
+    
+    if not duracao_valida(item.get('duracao_minutos')):
+        return None, 'Campo duracao_minutos deve ser um número inteiro positivo'
+    
+    return {
+        'inicio': inicio,
+        'duracao_minutos': item.get('duracao_minutos'),
+        'status': 'pendente',
+        'observacoes': item.get('observacoes', ''),
+        'paciente_id': item['paciente_id']
+    }, None
+
+# Aplica ao agendamento os campos que o tipo de usuário pode alterar;
+# retorna (mensagem, código) em caso de erro
+def aplicar_atualizacao(agendamento, dados, tipo_usuario):
+    if tipo_usuario == 'psicologo':
+        # Psicólogos podem atualizar todos os campos
+        try:
+            if 'data' in dados:
+                agendamento.data = dados['data']
+            if 'hora' in dados:
+                agendamento.hora = dados['hora']
+        except (TypeError, ValueError):
+            return 'Data ou hora em formato inválido. Use YYYY-MM-DD e HH:MM', 400
+        if 'duracao_minutos' in dados:
+            if not duracao_valida(dados['duracao_minutos']):
+                return 'Campo duracao_minutos deve ser um número inteiro positivo', 400
+            agendamento.duracao_minutos = dados['duracao_minutos']
+        if 'status' in dados:
+            agendamento.status = dados['status']
+        if 'observacoes' in dados:
+            agendamento.observacoes = dados['observacoes']
+    elif tipo_usuario == 'paciente':
+        # Pacientes só podem atualizar o status (para cancelar)
+        if 'status' in dados and dados['status'] == 'cancelado':
+            agendamento.status = 'cancelado'
+        else:
+            return 'Pacientes só podem cancelar agendamentos', 403
+    
+    return None
+
+# Maior período aceito na busca de horários livres e no calendário
+LIMITE_DISPONIBILIDADE_DIAS = 366
+LIMITE_CALENDARIO_DIAS = 366
+
 # Decorador para verificar se o usuário é psicólogo
 def somente_psicologo(f):
     @wraps(f)
@@ -23,12 +113,12 @@ def somente_psicologo(f):
         return f(*args, **kwargs)
     return decorated
 
-# Decorador para verificar se o usuário é o psicólogo ou paciente do agendamento
+# Decorador para verificar se o usuário é o psicólogo ou paciente do agendamento;
+# o agendamento autorizado é passado à view no argumento 'agendamento'
 def psicologo_ou_paciente_do_agendamento(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        # Obter ID do usuário atual
-        usuario_atual_id = get_jwt_identity()
+        # Obter tipo do usuário atual
         claims = get_jwt()
         tipo_usuario = claims.get('tipo_usuario', '')
         
@@ -37,61 +127,300 @@ def psicologo_ou_paciente_do_agendamento(f):
         if not agendamento_id:
             return jsonify({'mensagem': 'ID do agendamento não fornecido'}), 400
         
-        # Buscar agendamento
-        agendamento = Agendamento.query.get(agendamento_id)
-        if not agendamento:
-            return jsonify({'mensagem': 'Agendamento não encontrado'}), 404
-        
-        # Verificar se o usuário é o psicólogo ou paciente do agendamento
-        autorizado = False
-        
+        # Buscar o agendamento do próprio usuário em uma única consulta,
+        # já com os relacionamentos usados na resposta
+        agendamento = None
         if tipo_usuario == 'psicologo':
-            psicologo = Psicologo.query.filter_by(usuario_id=usuario_atual_id).first()
-            if psicologo and psicologo.id == agendamento.psicologo_id:
-                autorizado = True
+            filtro_usuario = Agendamento.psicologo_id == obter_psicologo_id()
         elif tipo_usuario == 'paciente':
-            paciente = Paciente.query.filter_by(usuario_id=usuario_atual_id).first()
-            if paciente and paciente.id == agendamento.paciente_id:
-                autorizado = True
+            filtro_usuario = Agendamento.paciente_id == obter_paciente_id()
+        else:
+            filtro_usuario = None
+        
+        if filtro_usuario is not None:
+            agendamento = Agendamento.query.options(*opcoes_detalhes_agendamento()).filter(
+                Agendamento.id == agendamento_id, filtro_usuario
+            ).first()
         
-        if not autorizado:
+        if not agendamento:
+            # Distinguir agendamento inexistente de acesso não autorizado
+            if not db.session.query(Agendamento.id).filter_by(id=agendamento_id).first():
+                return jsonify({'mensagem': 'Agendamento não encontrado'}), 404
             return jsonify({'mensagem': 'Acesso não autorizado a este agendamento'}), 403
         
+        # Entregar o registro carregado à view
+        kwargs['agendamento'] = agendamento
         return f(*args, **kwargs)
     return decorated
 
 @appointments_bp.route('/agendamentos', methods=['GET'])
 @jwt_required()
 def listar_agendamentos():
-    # Obter ID e tipo do usuário atual
-    usuario_atual_id = get_jwt_identity()
+    # Obter tipo do usuário atual
     claims = get_jwt()
     tipo_usuario = claims.get('tipo_usuario', '')
     
     # Filtrar agendamentos com base no tipo de usuário
+    query = Agendamento.query.options(*opcoes_detalhes_agendamento())
+    if tipo_usuario == 'psicologo':
+        psicologo_id = obter_psicologo_id()
+        if not psicologo_id:
+            return jsonify({'mensagem': 'Psicólogo não encontrado'}), 404
+        
+        filtro = {'psicologo_id': psicologo_id}
+    elif tipo_usuario == 'paciente':
+        paciente_id = obter_paciente_id()
+        if not paciente_id:
+            return jsonify({'mensagem': 'Paciente não encontrado'}), 404
+        
+        filtro = {'paciente_id': paciente_id}
+    else:
+        return jsonify({'mensagem': 'Tipo de usuário não autorizado'}), 403
+    query = query.filter_by(**filtro)
+    
+    # Filtro opcional por período (inicio/fim no formato YYYY-MM-DD)
+    try:
+        inicio, fim = ler_intervalo(request.args)
+    except ValueError as erro:
+        return jsonify({'mensagem': str(erro)}), 400
+    query = filtrar_periodo(query, Agendamento.inicio, inicio, fim)
+    
+    # Ocorrências de séries recorrentes, calculadas apenas dentro do período
+    janela_inicio, janela_fim = janela_ocorrencias(inicio, fim)
+    series = series_no_periodo(janela_inicio, janela_fim, detalhes=True, **filtro)
+    
+    # Paginação por cursor em ordem de data e hora, com as ocorrências intercaladas
+    if paginacao_solicitada(request.args):
+        try:
+            itens, proximo_cursor = paginar_agenda(query, series, janela_inicio, janela_fim, request.args)
+        except ParametroPaginacaoInvalido as erro:
+            return jsonify({'mensagem': str(erro)}), 400
+        
+        return jsonify({
+            'itens': itens,
+            'next_cursor': proximo_cursor
+        }), 200
+    
+    # Resposta em stream (JSON ou NDJSON), lendo o banco em lotes
+    formato = formato_transmissao(request)
+    if formato:
+        query = query.yield_per(LINHAS_POR_LOTE)
+    
+    if not series:
+        if formato:
+            return transmitir((agendamento.para_dict(incluir_detalhes=True) for agendamento in query), formato)
+        
+        agendamentos = query.all()
+        
+        # Retornar resultados
+        return jsonify([agendamento.para_dict(incluir_detalhes=True) for agendamento in agendamentos]), 200
+    
+    # Agendamentos e ocorrências intercalados em ordem cronológica
+    agendamentos = (
+        (agendamento.inicio, agendamento.para_dict(incluir_detalhes=True))
+        for agendamento in query.order_by(Agendamento.inicio, Agendamento.id)
+    )
+    ocorrencias = (
+        (momento, serie.ocorrencia_para_dict(momento, incluir_detalhes=True))
+        for momento, serie in ocorrencias_no_periodo(series, janela_inicio, janela_fim)
+    )
+    itens = (item for _, item in heapq.merge(agendamentos, ocorrencias, key=lambda par: par[0]))
+    
+    if formato:
+        return transmitir(itens, formato)
+    return jsonify(list(itens)), 200
+
+@appointments_bp.route('/agendamentos/exportar', methods=['GET'])
+@jwt_required()
+def exportar_agendamentos():
+    # Obter tipo do usuário atual
+    claims = get_jwt()
+    tipo_usuario = claims.get('tipo_usuario', '')
+    
+    # Exportar apenas os agendamentos do próprio usuário
+    consulta = select(*Agendamento.__table__.columns)
+    if tipo_usuario == 'psicologo':
+        psicologo_id = obter_psicologo_id()
+        if not psicologo_id:
+            return jsonify({'mensagem': 'Psicólogo não encontrado'}), 404
+        
+        consulta = consulta.filter_by(psicologo_id=psicologo_id)
+        
+        # Parâmetro de consulta para exportar um único paciente
+        paciente_id = request.args.get('paciente_id', type=int)
+        if paciente_id:
+            consulta = consulta.filter_by(paciente_id=paciente_id)
+    elif tipo_usuario == 'paciente':
+        paciente_id = obter_paciente_id()
+        if not paciente_id:
+            return jsonify({'mensagem': 'Paciente não encontrado'}), 404
+        
+        consulta = consulta.filter_by(paciente_id=paciente_id)
+    else:
+        return jsonify({'mensagem': 'Tipo de usuário não autorizado'}), 403
+    
+    try:
+        inicio, fim = ler_intervalo(request.args)
+        formato, comprimir = ler_opcoes_exportacao(request.args)
+    except ValueError as erro:
+        return jsonify({'mensagem': str(erro)}), 400
+    
+    if formato == 'parquet' and not parquet_disponivel():
+        return jsonify({'mensagem': 'Exportação em Parquet indisponível: pyarrow não está instalado'}), 501
+    
+    consulta = filtrar_periodo(consulta, Agendamento.inicio, inicio, fim).order_by(Agendamento.inicio, Agendamento.id)
+    
+    # Apenas agendamentos gravados; ocorrências de séries ainda não materializadas ficam de fora
+    nome_arquivo = '_'.join(['agendamentos'] + [dia.isoformat() for dia in (inicio, fim) if dia])
+    return exportar(consulta, formato, comprimir, nome_arquivo)
+
+@appointments_bp.route('/agendamentos/calendario', methods=['GET'])
+@jwt_required()
+def calendario():
+    """Agendamentos do período agrupados por dia, em colunas, para as visões de mês e semana.
+
+    Cada dia traz listas paralelas (id, hora, status, paciente_id, serie_id) e
+    os nomes dos pacientes aparecem uma única vez em 'pacientes'.
+    """
+    # Obter tipo do usuário atual
+    claims = get_jwt()
+    tipo_usuario = claims.get('tipo_usuario', '')
+    
     if tipo_usuario == 'psicologo':
-        psicologo = Psicologo.query.filter_by(usuario_id=usuario_atual_id).first()
-        if not psicologo:
+        psicologo_id = obter_psicologo_id()
+        if not psicologo_id:
             return jsonify({'mensagem': 'Psicólogo não encontrado'}), 404
         
-        agendamentos = Agendamento.query.filter_by(psicologo_id=psicologo.id).all()
+        filtro = {'psicologo_id': psicologo_id}
     elif tipo_usuario == 'paciente':
-        paciente = Paciente.query.filter_by(usuario_id=usuario_atual_id).first()
-        if not paciente:
+        paciente_id = obter_paciente_id()
+        if not paciente_id:
             return jsonify({'mensagem': 'Paciente não encontrado'}), 404
         
-        agendamentos = Agendamento.query.filter_by(paciente_id=paciente.id).all()
+        filtro = {'paciente_id': paciente_id}
     else:
         return jsonify({'mensagem': 'Tipo de usuário não autorizado'}), 403
     
-    # Retornar resultados
-    return jsonify([agendamento.para_dict(incluir_detalhes=True) for agendamento in agendamentos]), 200
+    try:
+        inicio, fim = ler_intervalo(request.args)
+    except ValueError as erro:
+        return jsonify({'mensagem': str(erro)}), 400
+    
+    if not inicio or not fim:
+        return jsonify({'mensagem': 'Parâmetros inicio e fim são obrigatórios'}), 400
+    if (fim - inicio).days >= LIMITE_CALENDARIO_DIAS:
+        return jsonify({'mensagem': f'Período máximo de {LIMITE_CALENDARIO_DIAS} dias'}), 400
+    
+    # Apenas as colunas exibidas, pelo índice (psicologo_id/paciente_id, inicio)
+    query = db.session.query(
+        Agendamento.inicio, Agendamento.id, Agendamento.status, Agendamento.paciente_id, Agendamento.serie_id
+    ).filter_by(**filtro)
+    linhas = filtrar_periodo(query, Agendamento.inicio, inicio, fim).order_by(Agendamento.inicio, Agendamento.id)
+    
+    # Ocorrências de séries no período, no mesmo formato das linhas
+    janela_inicio, janela_fim = janela_ocorrencias(inicio, fim)
+    series = series_no_periodo(janela_inicio, janela_fim, **filtro)
+    ocorrencias = (
+        (momento, None, 'pendente', serie.paciente_id, serie.id)
+        for momento, serie in ocorrencias_no_periodo(series, janela_inicio, janela_fim)
+    )
+    
+    dias = {}
+    for momento, agendamento_id, status, paciente_id, serie_id in heapq.merge(linhas, ocorrencias, key=lambda linha: linha[0]):
+        dia = dias.get(momento.date())
+        if dia is None:
+            dia = dias[momento.date()] = {'id': [], 'hora': [], 'status': [], 'paciente_id': [], 'serie_id': []}
+        dia['id'].append(agendamento_id)
+        dia['hora'].append(momento.strftime('%H:%M'))
+        dia['status'].append(status)
+        dia['paciente_id'].append(paciente_id)
+        dia['serie_id'].append(serie_id)
+    
+    # Nomes dos pacientes do período em uma única consulta
+    pacientes_ids = {paciente_id for dia in dias.values() for paciente_id in dia['paciente_id']}
+    pacientes = {}
+    if pacientes_ids:
+        pacientes = dict(db.session.query(Paciente.id, Usuario.nome).join(Usuario, Paciente.usuario_id == Usuario.id).filter(
+            Paciente.id.in_(pacientes_ids)
+        ).all())
+    
+    return jsonify({
+        'inicio': inicio.isoformat(),
+        'fim': fim.isoformat(),
+        'dias': {dia.isoformat(): colunas for dia, colunas in dias.items()},
+        'pacientes': {str(paciente_id): nome for paciente_id, nome in pacientes.items()}
+    }), 200
+
+@appointments_bp.route('/agendamentos/disponibilidade', methods=['GET'])
+@jwt_required()
+def disponibilidade():
+    # Psicólogo consultado: informado na URL ou, para psicólogos, o próprio
+    psicologo_id = request.args.get('psicologo_id', type=int)
+    if not psicologo_id and get_jwt().get('tipo_usuario') == 'psicologo':
+        psicologo_id = obter_psicologo_id()
+    if not psicologo_id:
+        return jsonify({'mensagem': 'Parâmetro psicologo_id é obrigatório'}), 400
+    
+    if not db.session.get(Psicologo, psicologo_id):
+        return jsonify({'mensagem': 'Psicólogo não encontrado'}), 404
+    
+    try:
+        inicio, fim = ler_intervalo(request.args)
+    except ValueError as erro:
+        return jsonify({'mensagem': str(erro)}), 400
+    
+    inicio = inicio or date.today()
+    fim = fim or inicio + timedelta(days=29)
+    if fim < inicio:
+        return jsonify({'mensagem': 'Parâmetro fim deve ser posterior a inicio'}), 400
+    if (fim - inicio).days >= LIMITE_DISPONIBILIDADE_DIAS:
+        return jsonify({'mensagem': f'Período máximo de {LIMITE_DISPONIBILIDADE_DIAS} dias'}), 400
+    
+    # Duração do horário e expediente (padrão: 50 minutos, das 08:00 às 18:00, de segunda a sexta)
+    try:
+        duracao = int(request.args.get('duracao', 50))
+    except ValueError:
+        duracao = 0
+    if not duracao_valida(duracao):
+        return jsonify({'mensagem': 'Parâmetro duracao deve ser um número inteiro positivo'}), 400
+    
+    try:
+        hora_inicio = datetime.strptime(request.args.get('hora_inicio', '08:00'), '%H:%M').time()
+        hora_fim = datetime.strptime(request.args.get('hora_fim', '18:00'), '%H:%M').time()
+        dias_semana = {int(dia) for dia in request.args.get('dias_semana', '0,1,2,3,4').split(',')}
+    except ValueError:
+        return jsonify({'mensagem': 'Use HH:MM em hora_inicio e hora_fim e números de 0 (segunda) a 6 (domingo) em dias_semana'}), 400
+    
+    if hora_fim <= hora_inicio:
+        return jsonify({'mensagem': 'Parâmetro hora_fim deve ser posterior a hora_inicio'}), 400
+    
+    # Intervalos ocupados em uma consulta por período; horários livres por varredura
+    janela_inicio = datetime.combine(inicio, datetime.min.time())
+    janela_fim = datetime.combine(fim + timedelta(days=1), datetime.min.time())
+    ocupados = intervalos_ocupados(psicologo_id, janela_inicio, janela_fim)
+    
+    dias = (inicio + timedelta(days=n) for n in range((fim - inicio).days + 1))
+    livres = horarios_livres(
+        ocupados,
+        (dia for dia in dias if dia.weekday() in dias_semana),
+        hora_inicio,
+        hora_fim,
+        timedelta(minutes=duracao)
+    )
+    
+    return jsonify({
+        'psicologo_id': psicologo_id,
+        'duracao_minutos': duracao,
+        'horarios': [
+            {'data': momento.strftime('%Y-%m-%d'), 'hora': momento.strftime('%H:%M'), 'inicio': momento.isoformat()}
+            for momento in livres
+        ]
+    }), 200
 
 @appointments_bp.route('/agendamentos/<int:agendamento_id>', methods=['GET'])
 @jwt_required()
 @psicologo_ou_paciente_do_agendamento
-def obter_agendamento(agendamento_id):
-    agendamento = Agendamento.query.get(agendamento_id)
+def obter_agendamento(agendamento_id, agendamento):
     return jsonify(agendamento.para_dict(incluir_detalhes=True)), 200
 
 @appointments_bp.route('/agendamentos', methods=['POST'])
@@ -106,11 +435,10 @@ def criar_agendamento():
         if campo not in dados:
             return jsonify({'mensagem': f'Campo {campo} é obrigatório'}), 400
     
-    # Obter ID do psicólogo atual
-    usuario_atual_id = get_jwt_identity()
-    psicologo = Psicologo.query.filter_by(usuario_id=usuario_atual_id).first()
+    # Obter ID do psicólogo atual, confirmado no banco antes de gravar
+    psicologo_id = obter_psicologo_id(confirmar=True)
     
-    if not psicologo:
+    if not psicologo_id:
         return jsonify({'mensagem': 'Psicólogo não encontrado'}), 404
     
     # Verificar se o paciente existe
@@ -118,25 +446,26 @@ def criar_agendamento():
     if not paciente:
         return jsonify({'mensagem': 'Paciente não encontrado'}), 404
     
-    # Verificar se já existe um agendamento para o mesmo psicólogo, data e hora
-    agendamento_existente = Agendamento.query.filter_by(
-        psicologo_id=psicologo.id,
-        data=dados['data'],
-        hora=dados['hora']
-    ).first()
-    
-    if agendamento_existente:
-        return jsonify({'mensagem': 'Já existe um agendamento para esta data e hora'}), 400
+    if not duracao_valida(dados.get('duracao_minutos')):
+        return jsonify({'mensagem': 'Campo duracao_minutos deve ser um número inteiro positivo'}), 400
     
     # Criar novo agendamento
-    novo_agendamento = Agendamento(
-        data=dados['data'],
-        hora=dados['hora'],
-        status='pendente',
-        observacoes=dados.get('observacoes', ''),
-        psicologo_id=psicologo.id,
-        paciente_id=dados['paciente_id']
-    )
+    try:
+        novo_agendamento = Agendamento(
+            data=dados['data'],
+            hora=dados['hora'],
+            duracao_minutos=dados.get('duracao_minutos'),
+            status='pendente',
+            observacoes=dados.get('observacoes', ''),
+            psicologo_id=psicologo_id,
+            paciente_id=dados['paciente_id']
+        )
+    except (TypeError, ValueError):
+        return jsonify({'mensagem': 'Data ou hora em formato inválido. Use YYYY-MM-DD e HH:MM'}), 400
+    
+    # Verificar se já existe um agendamento ou ocorrência de série para o mesmo psicólogo, data e hora
+    if horario_ocupado(psicologo_id, novo_agendamento.inicio):
+        return jsonify({'mensagem': 'Já existe um agendamento para esta data e hora'}), 400
     
     db.session.add(novo_agendamento)
     db.session.commit()
@@ -146,34 +475,113 @@ def criar_agendamento():
         'agendamento': novo_agendamento.para_dict()
     }), 201
 
+@appointments_bp.route('/agendamentos/lote', methods=['POST'])
+@jwt_required()
+@somente_psicologo
+def criar_agendamentos_em_lote():
+    dados = request.get_json()
+    
+    itens = dados.get('agendamentos') if isinstance(dados, dict) else None
+    if not isinstance(itens, list) or not itens:
+        return jsonify({'mensagem': 'Campo agendamentos deve ser uma lista não vazia'}), 400
+    
+    if len(itens) > LIMITE_LOTE:
+        return jsonify({'mensagem': f'Máximo de {LIMITE_LOTE} agendamentos por lote'}), 400
+    
+    # Obter ID do psicólogo atual, confirmado no banco antes de gravar
+    psicologo_id = obter_psicologo_id(confirmar=True)
+    
+    if not psicologo_id:
+        return jsonify({'mensagem': 'Psicólogo não encontrado'}), 404
+    
+    # Validação de formato, item a item, sem acessar o banco
+    resultados = [None] * len(itens)
+    linhas = {}
+    for indice, item in enumerate(itens):
+        linha, erro = ler_item_lote(item)
+        if erro:
+            resultados[indice] = {'indice': indice, 'status': 'erro', 'mensagem': erro}
+        else:
+            linhas[indice] = linha
+    
+    # Uma consulta para os pacientes, uma para os horários já ocupados
+    # e uma para as séries do psicólogo no período do lote
+    pacientes_existentes = set()
+    ocupados = set()
+    series = []
+    if linhas:
+        pacientes_existentes = set(db.session.scalars(
+            db.select(Paciente.id).where(Paciente.id.in_({l['paciente_id'] for l in linhas.values()}))
+        ))
+        ocupados = set(db.session.scalars(
+            db.select(Agendamento.inicio).where(
+                Agendamento.psicologo_id == psicologo_id,
+                Agendamento.inicio.in_({l['inicio'] for l in linhas.values()})
+            )
+        ))
+        momentos = [l['inicio'] for l in linhas.values()]
+        series = series_no_periodo(min(momentos), max(momentos) + timedelta(minutes=1), psicologo_id=psicologo_id)
+    
+    inserir = []
+    for indice, linha in linhas.items():
+        if linha['paciente_id'] not in pacientes_existentes:
+            erro = 'Paciente não encontrado'
+        elif linha['inicio'] in ocupados or any(serie.tem_ocorrencia(linha['inicio']) for serie in series):
+            # Conflito com a agenda existente ou com um item anterior do mesmo lote
+            erro = 'Já existe um agendamento para esta data e hora'
+        else:
+            erro = None
+            ocupados.add(linha['inicio'])
+            linha['psicologo_id'] = psicologo_id
+            inserir.append((indice, linha))
+        
+        if erro:
+            resultados[indice] = {'indice': indice, 'status': 'erro', 'mensagem': erro}
+    
+    # Todas as linhas válidas em uma única instrução (executemany) e um commit
+    if inserir:
+        db.session.execute(insert(Agendamento), [linha for _, linha in inserir])
+        registrar_agendamentos_inseridos([linha for _, linha in inserir])
+        
+        # Ids gerados, lidos pelo índice (psicologo_id, inicio)
+        ids = dict(db.session.execute(
+            db.select(Agendamento.inicio, Agendamento.id).where(
+                Agendamento.psicologo_id == psicologo_id,
+                Agendamento.inicio.in_([linha['inicio'] for _, linha in inserir])
+            )
+        ).all())
+        db.session.commit()
+        
+        for indice, linha in inserir:
+            resultados[indice] = {
+                'indice': indice,
+                'status': 'criado',
+                'id': ids[linha['inicio']],
+                'data': linha['inicio'].strftime('%Y-%m-%d'),
+                'hora': linha['inicio'].strftime('%H:%M'),
+                'paciente_id': linha['paciente_id']
+            }
+    
+    return jsonify({
+        'criados': len(inserir),
+        'erros': len(itens) - len(inserir),
+        'resultados': resultados
+    }), 201 if inserir else 400
+
 @appointments_bp.route('/agendamentos/<int:agendamento_id>', methods=['PUT'])
 @jwt_required()
 @psicologo_ou_paciente_do_agendamento
-def atualizar_agendamento(agendamento_id):
-    agendamento = Agendamento.query.get(agendamento_id)
+def atualizar_agendamento(agendamento_id, agendamento):
     dados = request.get_json()
     
     # Obter tipo do usuário atual
     claims = get_jwt()
     tipo_usuario = claims.get('tipo_usuario', '')
     
-    # Verificar quais campos podem ser atualizados com base no tipo de usuário
-    if tipo_usuario == 'psicologo':
-        # Psicólogos podem atualizar todos os campos
-        if 'data' in dados:
-            agendamento.data = dados['data']
-        if 'hora' in dados:
-            agendamento.hora = dados['hora']
-        if 'status' in dados:
-            agendamento.status = dados['status']
-        if 'observacoes' in dados:
-            agendamento.observacoes = dados['observacoes']
-    elif tipo_usuario == 'paciente':
-        # Pacientes só podem atualizar o status (para cancelar)
-        if 'status' in dados and dados['status'] == 'cancelado':
-            agendamento.status = 'cancelado'
-        else:
-            return jsonify({'mensagem': 'Pacientes só podem cancelar agendamentos'}), 403
+    erro = aplicar_atualizacao(agendamento, dados, tipo_usuario)
+    if erro:
+        db.session.rollback()
+        return jsonify({'mensagem': erro[0]}), erro[1]
     
     db.session.commit()
     
@@ -185,19 +593,8 @@ def atualizar_agendamento(agendamento_id):
 @appointments_bp.route('/agendamentos/<int:agendamento_id>', methods=['DELETE'])
 @jwt_required()
 @somente_psicologo
-def excluir_agendamento(agendamento_id):
-    agendamento = Agendamento.query.get(agendamento_id)
-    
-    if not agendamento:
-        return jsonify({'mensagem': 'Agendamento não encontrado'}), 404
-    
-    # Verificar se o psicólogo atual é o dono do agendamento
-    usuario_atual_id = get_jwt_identity()
-    psicologo = Psicologo.query.filter_by(usuario_id=usuario_atual_id).first()
-    
-    if not psicologo or psicologo.id != agendamento.psicologo_id:
-        return jsonify({'mensagem': 'Acesso não autorizado a este agendamento'}), 403
-    
+@psicologo_ou_paciente_do_agendamento
+def excluir_agendamento(agendamento_id, agendamento):
     db.session.delete(agendamento)
     db.session.commit()
     
@@ -1,12 +1,16 @@
-from flask import Blueprint, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from models.agendamento import Agendamento
-from models.prontuario_medico import ProntuarioMedico
-from models.psicologo import Psicologo
+from flask import Blueprint, jsonify, current_app, request
+from flask_jwt_extended import jwt_required, get_jwt
 from models.paciente import Paciente
+from models.usuario import Usuario
+from models.resumo_analitico import ResumoAgendamentosDia, ResumoAgendamentosPaciente, ResumoProntuariosMes
+from extensions import db
+from servicos.identidade import obter_psicologo_id
+from servicos.cache_analises import em_cache
+from servicos.datas import ler_intervalo
+from servicos.relatorios import carregar_dados, gerar_relatorios
+from servicos.graficos import FORMATOS, chave_grafico
 from functools import wraps
 from sqlalchemy import func
-from datetime import datetime, timedelta
 
 analytics_bp = Blueprint('analises', __name__)
 
@@ -24,31 +28,15 @@ def somente_psicologo(f):
         return f(*args, **kwargs)
     return decorated
 
-@analytics_bp.route('/analises/agendamentos', methods=['GET'])
-@jwt_required()
-@somente_psicologo
-def analise_agendamentos():
-    # Obter ID do psicólogo atual
-    usuario_atual_id = get_jwt_identity()
-    psicologo = Psicologo.query.filter_by(usuario_id=usuario_atual_id).first()
-    
-    if not psicologo:
-        return jsonify({'mensagem': 'Psicólogo não encontrado'}), 404
-    
-    # Obter todos os agendamentos do psicólogo
-    agendamentos = Agendamento.query.filter_by(psicologo_id=psicologo.id).all()
-    
-    # Calcular estatísticas
-    total_agendamentos = len(agendamentos)
-    
-    # Contagem por status
-    status_counts = {}
-    for agendamento in agendamentos:
-        status = agendamento.status
-        if status in status_counts:
-            status_counts[status] += 1
-        else:
-            status_counts[status] = 1
+# Estatísticas de agendamentos do psicólogo (usadas no JSON e no gráfico)
+def estatisticas_agendamentos(psicologo_id):
+    # Contagens por dia e status lidas do resumo (uma linha por dia e status)
+    contagens = db.session.query(
+        ResumoAgendamentosDia.dia, ResumoAgendamentosDia.status, ResumoAgendamentosDia.total
+    ).filter(
+        ResumoAgendamentosDia.psicologo_id == psicologo_id,
+        ResumoAgendamentosDia.total > 0
+    ).all()
     
     # Agendamentos por dia da semana
     dias_semana = {
@@ -62,146 +50,236 @@ def analise_agendamentos():
     }
     
     agendamentos_por_dia = {dia: 0 for dia in dias_semana.values()}
+    status_counts = {}
+    
+    for dia, status, total in contagens:
+        status_counts[status] = status_counts.get(status, 0) + total
+        agendamentos_por_dia[dias_semana[dia.weekday()]] += total
     
-    for agendamento in agendamentos:
-        try:
-            data = datetime.strptime(agendamento.data, '%Y-%m-%d')
-            dia_semana = dias_semana[data.weekday()]
-            agendamentos_por_dia[dia_semana] += 1
-        except ValueError:
-            # Ignorar datas em formato inválido
-            pass
+    total_agendamentos = sum(status_counts.values())
     
     # Calcular taxa de comparecimento (agendamentos concluídos / total de agendamentos passados)
-    agendamentos_passados = [a for a in agendamentos if a.status in ['concluído', 'cancelado']]
-    total_passados = len(agendamentos_passados)
-    concluidos = len([a for a in agendamentos_passados if a.status == 'concluído'])
+    concluidos = status_counts.get('concluído', 0)
+    total_passados = concluidos + status_counts.get('cancelado', 0)
     
     taxa_comparecimento = (concluidos / total_passados) * 100 if total_passados > 0 else 0
     
-    return jsonify({
+    return {
         'total_agendamentos': total_agendamentos,
         'por_status': status_counts,
         'por_dia_semana': agendamentos_por_dia,
         'taxa_comparecimento': round(taxa_comparecimento, 2)
-    }), 200
+    }
+
+# Estatísticas de prontuários do psicólogo (usadas no JSON e no gráfico)
+def estatisticas_prontuarios(psicologo_id):
+    # Contagens por paciente e mês lidas do resumo, com o nome resolvido na mesma consulta
+    contagens = db.session.query(
+        ResumoProntuariosMes.paciente_id, Usuario.nome, ResumoProntuariosMes.mes, ResumoProntuariosMes.total
+    ).outerjoin(
+        Paciente, Paciente.id == ResumoProntuariosMes.paciente_id
+    ).outerjoin(
+        Usuario, Usuario.id == Paciente.usuario_id
+    ).filter(
+        ResumoProntuariosMes.psicologo_id == psicologo_id,
+        ResumoProntuariosMes.total > 0
+    ).order_by(ResumoProntuariosMes.mes).all()
+    
+    # Calcular estatísticas
+    total_prontuarios = sum(total for _, _, _, total in contagens)
+    
+    contagens_paciente = {}
+    prontuarios_por_mes = {}
+    for paciente_id, nome_paciente, mes_ano, count in contagens:
+        chave = (paciente_id, nome_paciente)
+        contagens_paciente[chave] = contagens_paciente.get(chave, 0) + count
+        prontuarios_por_mes[mes_ano] = prontuarios_por_mes.get(mes_ano, 0) + count
+    
+    prontuarios_por_paciente_nome = {}
+    for (paciente_id, nome_paciente), count in contagens_paciente.items():
+        if nome_paciente:
+            prontuarios_por_paciente_nome[nome_paciente] = count
+    
+    return {
+        'total_prontuarios': total_prontuarios,
+        'por_paciente': prontuarios_por_paciente_nome,
+        'por_mes': prontuarios_por_mes
+    }
+
+# Resposta com o gráfico dos dados (PNG ou SVG); o hash dos dados é o ETag,
+# então uma revalidação com os dados inalterados não renderiza nem lê o disco
+def responder_grafico(tipo, dados):
+    formato = request.args.get('formato', 'png')
+    if formato not in FORMATOS:
+        return jsonify({'mensagem': 'Formato inválido. Deve ser "png" ou "svg"'}), 400
+    
+    chave = chave_grafico(tipo, dados, formato)
+    if request.if_none_match.contains(chave):
+        resposta = current_app.response_class(status=304)
+    else:
+        conteudo = current_app.extensions['graficos'].obter(chave, tipo, dados, formato)
+        resposta = current_app.response_class(conteudo, mimetype=FORMATOS[formato])
+    
+    resposta.set_etag(chave)
+    resposta.headers['Cache-Control'] = 'private, no-cache'
+    return resposta
+
+@analytics_bp.route('/analises/agendamentos', methods=['GET'])
+@jwt_required()
+@somente_psicologo
+@em_cache
+def analise_agendamentos():
+    # Obter ID do psicólogo atual
+    psicologo_id = obter_psicologo_id()
+    
+    if not psicologo_id:
+        return jsonify({'mensagem': 'Psicólogo não encontrado'}), 404
+    
+    return jsonify(estatisticas_agendamentos(psicologo_id)), 200
 
 @analytics_bp.route('/analises/prontuarios', methods=['GET'])
 @jwt_required()
 @somente_psicologo
+@em_cache
 def analise_prontuarios():
     # Obter ID do psicólogo atual
-    usuario_atual_id = get_jwt_identity()
-    psicologo = Psicologo.query.filter_by(usuario_id=usuario_atual_id).first()
+    psicologo_id = obter_psicologo_id()
     
-    if not psicologo:
+    if not psicologo_id:
         return jsonify({'mensagem': 'Psicólogo não encontrado'}), 404
     
-    # Obter todos os prontuários do psicólogo
-    prontuarios = ProntuarioMedico.query.filter_by(psicologo_id=psicologo.id).all()
+    return jsonify(estatisticas_prontuarios(psicologo_id)), 200
+
+@analytics_bp.route('/analises/agendamentos/grafico', methods=['GET'])
+@jwt_required()
+@somente_psicologo
+def grafico_agendamentos():
+    # Obter ID do psicólogo atual
+    psicologo_id = obter_psicologo_id()
     
-    # Calcular estatísticas
-    total_prontuarios = len(prontuarios)
-    
-    # Prontuários por paciente
-    prontuarios_por_paciente = {}
-    for prontuario in prontuarios:
-        paciente_id = prontuario.paciente_id
-        if paciente_id in prontuarios_por_paciente:
-            prontuarios_por_paciente[paciente_id] += 1
-        else:
-            prontuarios_por_paciente[paciente_id] = 1
-    
-    # Converter IDs de pacientes para nomes
-    prontuarios_por_paciente_nome = {}
-    for paciente_id, count in prontuarios_por_paciente.items():
-        paciente = Paciente.query.get(paciente_id)
-        if paciente and paciente.usuario:
-            nome_paciente = paciente.usuario.nome
-            prontuarios_por_paciente_nome[nome_paciente] = count
+    if not psicologo_id:
+        return jsonify({'mensagem': 'Psicólogo não encontrado'}), 404
     
-    # Prontuários por mês
-    prontuarios_por_mes = {}
-    for prontuario in prontuarios:
-        try:
-            data = datetime.strptime(prontuario.data, '%Y-%m-%d')
-            mes_ano = data.strftime('%Y-%m')
-            if mes_ano in prontuarios_por_mes:
-                prontuarios_por_mes[mes_ano] += 1
-            else:
-                prontuarios_por_mes[mes_ano] = 1
-        except ValueError:
-            # Ignorar datas em formato inválido
-            pass
-    
-    # Ordenar por mês
-    prontuarios_por_mes = dict(sorted(prontuarios_por_mes.items()))
+    return responder_grafico('agendamentos', estatisticas_agendamentos(psicologo_id))
+
+@analytics_bp.route('/analises/prontuarios/grafico', methods=['GET'])
+@jwt_required()
+@somente_psicologo
+def grafico_prontuarios():
+    # Obter ID do psicólogo atual
+    psicologo_id = obter_psicologo_id()
     
-    return jsonify({
-        'total_prontuarios': total_prontuarios,
-        'por_paciente': prontuarios_por_paciente_nome,
-        'por_mes': prontuarios_por_mes
-    }), 200
+    if not psicologo_id:
+        return jsonify({'mensagem': 'Psicólogo não encontrado'}), 404
+    
+    return responder_grafico('prontuarios', estatisticas_prontuarios(psicologo_id))
 
 @analytics_bp.route('/analises/pacientes', methods=['GET'])
 @jwt_required()
 @somente_psicologo
+@em_cache
 def analise_pacientes():
     # Obter ID do psicólogo atual
-    usuario_atual_id = get_jwt_identity()
-    psicologo = Psicologo.query.filter_by(usuario_id=usuario_atual_id).first()
+    psicologo_id = obter_psicologo_id()
     
-    if not psicologo:
+    if not psicologo_id:
         return jsonify({'mensagem': 'Psicólogo não encontrado'}), 404
     
-    # Obter todos os agendamentos do psicólogo
-    agendamentos = Agendamento.query.filter_by(psicologo_id=psicologo.id).all()
+    # Contagem de agendamentos por paciente e status, lida do resumo
+    contagens = db.session.query(
+        ResumoAgendamentosPaciente.paciente_id, ResumoAgendamentosPaciente.status, ResumoAgendamentosPaciente.total
+    ).filter(
+        ResumoAgendamentosPaciente.psicologo_id == psicologo_id,
+        ResumoAgendamentosPaciente.total > 0
+    ).all()
+    
+    # Agrupar contagens por paciente
+    status_por_paciente = {}
+    for paciente_id, status, total in contagens:
+        status_por_paciente.setdefault(paciente_id, {})[status] = total
+    
+    # Contagem de prontuários por paciente, somando os meses do resumo
+    prontuarios_por_paciente = dict(db.session.query(
+        ResumoProntuariosMes.paciente_id, func.sum(ResumoProntuariosMes.total)
+    ).filter(
+        ResumoProntuariosMes.psicologo_id == psicologo_id
+    ).group_by(ResumoProntuariosMes.paciente_id).all())
     
-    # Agrupar agendamentos por paciente
-    agendamentos_por_paciente = {}
-    for agendamento in agendamentos:
-        paciente_id = agendamento.paciente_id
-        if paciente_id not in agendamentos_por_paciente:
-            agendamentos_por_paciente[paciente_id] = []
-        agendamentos_por_paciente[paciente_id].append(agendamento)
+    # Nomes dos pacientes atendidos pelo psicólogo
+    nomes = dict(db.session.query(
+        Paciente.id, Usuario.nome
+    ).join(
+        Usuario, Usuario.id == Paciente.usuario_id
+    ).filter(
+        Paciente.id.in_(list(status_por_paciente))
+    ).all())
     
     # Calcular estatísticas por paciente
     estatisticas_pacientes = []
     
-    for paciente_id, agendamentos_paciente in agendamentos_por_paciente.items():
-        paciente = Paciente.query.get(paciente_id)
-        if not paciente or not paciente.usuario:
+    for paciente_id in sorted(status_por_paciente):
+        if paciente_id not in nomes:
             continue
         
-        # Contar agendamentos por status
-        status_counts = {}
-        for agendamento in agendamentos_paciente:
-            status = agendamento.status
-            if status in status_counts:
-                status_counts[status] += 1
-            else:
-                status_counts[status] = 1
+        status_counts = status_por_paciente[paciente_id]
         
         # Calcular taxa de comparecimento
-        agendamentos_passados = [a for a in agendamentos_paciente if a.status in ['concluído', 'cancelado']]
-        total_passados = len(agendamentos_passados)
-        concluidos = len([a for a in agendamentos_passados if a.status == 'concluído'])
+        concluidos = status_counts.get('concluído', 0)
+        total_passados = concluidos + status_counts.get('cancelado', 0)
         
         taxa_comparecimento = (concluidos / total_passados) * 100 if total_passados > 0 else 0
         
-        # Contar prontuários
-        prontuarios = ProntuarioMedico.query.filter_by(
-            psicologo_id=psicologo.id,
-            paciente_id=paciente_id
-        ).all()
-        
         estatisticas_pacientes.append({
             'paciente_id': paciente_id,
-            'nome': paciente.usuario.nome,
-            'total_agendamentos': len(agendamentos_paciente),
+            'nome': nomes[paciente_id],
+            'total_agendamentos': sum(status_counts.values()),
             'agendamentos_por_status': status_counts,
             'taxa_comparecimento': round(taxa_comparecimento, 2),
-            'total_prontuarios': len(prontuarios)
+            'total_prontuarios': prontuarios_por_paciente.get(paciente_id, 0)
         })
     
-    return jsonify(estatisticas_pacientes), 200
\ No newline at end of file
+    return jsonify(estatisticas_pacientes), 200
+
+@analytics_bp.route('/analises/relatorios', methods=['GET'])
+@jwt_required()
+@somente_psicologo
+@em_cache
+def relatorios():
+    # Obter ID do psicólogo atual
+    psicologo_id = obter_psicologo_id()
+    
+    if not psicologo_id:
+        return jsonify({'mensagem': 'Psicólogo não encontrado'}), 404
+    
+    try:
+        inicio, fim = ler_intervalo(request.args)
+    except ValueError as erro:
+        return jsonify({'mensagem': str(erro)}), 400
+    
+    # Valores não numéricos são rejeitados, não trocados pelo padrão de 30 dias
+    try:
+        janela_dias = int(request.args.get('janela', 30))
+    except ValueError:
+        janela_dias = 0
+    if not 1 <= janela_dias <= 366:
+        return jsonify({'mensagem': 'Parâmetro janela deve ser um número de dias entre 1 e 366'}), 400
+    
+    # Uma leitura por tabela; os relatórios são calculados sobre os DataFrames
+    agendamentos, prontuarios = carregar_dados(psicologo_id, inicio, fim)
+    
+    return jsonify({
+        'inicio': inicio.isoformat() if inicio else None,
+        'fim': fim.isoformat() if fim else None,
+        **gerar_relatorios(agendamentos, prontuarios, janela_dias)
+    }), 200
+
+@analytics_bp.route('/analises/cache', methods=['GET'])
+@jwt_required()
+@somente_psicologo
+def estatisticas_cache():
+    # Contadores de acertos, falhas e remoções do cache das análises
+    cache = current_app.extensions.get('cache_analises')
+    if not cache:
+        return jsonify({'backend': 'nenhum'}), 200
+    
+    return jsonify(cache.estatisticas()), 200
\ No newline at end of file
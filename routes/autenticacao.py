@@ -1,8 +1,14 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from models.usuario import Usuario
-from extensions import db
-import datetime
+from models.psicologo import Psicologo
+from models.paciente import Paciente
+from extensions import db, revogacao
+from servicos.identidade import claims_do_usuario
+from servicos.tokens import emitir_tokens
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 
 auth_bp = Blueprint('autenticacao', __name__)
 
@@ -13,26 +19,58 @@ def login():
     if not dados or not dados.get('nome_usuario') or not dados.get('senha'):
         return jsonify({'mensagem': 'Nome de usuário e senha são obrigatórios'}), 400
     
-    usuario = Usuario.query.filter_by(nome_usuario=dados.get('nome_usuario')).first()
+    # Perfil carregado junto para incluir o id do psicólogo/paciente no token
+    usuario = Usuario.query.options(
+        joinedload(Usuario.psicologo), joinedload(Usuario.paciente)
+    ).filter_by(nome_usuario=dados.get('nome_usuario')).first()
     
     if not usuario or not usuario.verificar_senha(dados.get('senha')):
         return jsonify({'mensagem': 'Credenciais inválidas'}), 401
     
-    # Criar token JWT com expiração de 1 dia
-    expira = datetime.timedelta(days=1)
-    token_acesso = create_access_token(
-        identity=usuario.id,
-        additional_claims={'tipo_usuario': usuario.tipo_usuario},
-        expires_delta=expira
-    )
+    # Refazer o hash quando o número de rounds configurado mudou
+    if usuario.senha_precisa_atualizar():
+        usuario.definir_senha(dados.get('senha'))
+        db.session.commit()
+    
+    # Token de acesso de curta duração e refresh token para renovar a sessão
+    tokens = emitir_tokens(usuario.id, claims_do_usuario(usuario))
     
     return jsonify({
-        'token': token_acesso,
+        **tokens,
         'tipo_usuario': usuario.tipo_usuario,
         'id': usuario.id,
         'nome': usuario.nome
     }), 200
 
+@auth_bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    # Renovação sem senha, mas com as claims refeitas a partir do banco: uma conta
+    # excluída (ou sem o perfil) não renova a sessão com um refresh token antigo
+    usuario = db.session.get(Usuario, get_jwt_identity(), options=[
+        joinedload(Usuario.psicologo), joinedload(Usuario.paciente)
+    ])
+    
+    if not usuario:
+        return jsonify({'mensagem': 'Usuário não encontrado'}), 401
+    
+    # Psicólogos e pacientes precisam do perfil correspondente
+    if usuario.tipo_usuario in ('psicologo', 'paciente') and not getattr(usuario, usuario.tipo_usuario):
+        return jsonify({'mensagem': 'Perfil não encontrado'}), 401
+    
+    # Rotação: o refresh token usado não pode ser reutilizado
+    revogacao.revogar(get_jwt())
+    
+    return jsonify(emitir_tokens(usuario.id, claims_do_usuario(usuario))), 200
+
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required(verify_type=False)
+def logout():
+    # Revoga o token enviado (de acesso ou refresh)
+    revogacao.revogar(get_jwt())
+    
+    return jsonify({'mensagem': 'Sessão encerrada com sucesso'}), 200
+
 @auth_bp.route('/registro', methods=['POST'])
 def registro():
     dados = request.get_json()
@@ -47,12 +85,19 @@ def registro():
     if dados['tipo_usuario'] not in ['paciente', 'psicologo']:
         return jsonify({'mensagem': 'Tipo de usuário inválido. Deve ser "paciente" ou "psicologo"'}), 400
     
-    # Verificar se o nome de usuário já existe
-    if Usuario.query.filter_by(nome_usuario=dados['nome_usuario']).first():
+    # Dados do perfil validados antes de qualquer escrita
+    if dados['tipo_usuario'] == 'psicologo' and ('registro' not in dados or 'especializacao' not in dados):
+        return jsonify({'mensagem': 'Registro (CRP) e especialização são obrigatórios para psicólogos'}), 400
+    
+    # Verificar nome de usuário e email em uma única consulta
+    existentes = db.session.query(Usuario.nome_usuario, Usuario.email).filter(
+        or_(Usuario.nome_usuario == dados['nome_usuario'], Usuario.email == dados['email'])
+    ).all()
+    
+    if any(existente.nome_usuario == dados['nome_usuario'] for existente in existentes):
         return jsonify({'mensagem': 'Nome de usuário já existe'}), 400
     
-    # Verificar se o email já existe
-    if Usuario.query.filter_by(email=dados['email']).first():
+    if existentes:
         return jsonify({'mensagem': 'Email já está em uso'}), 400
     
     # Criar novo usuário
@@ -65,38 +110,27 @@ def registro():
     )
     novo_usuario.definir_senha(dados['senha'])
     
-    # Adicionar ao banco de dados
-    db.session.add(novo_usuario)
-    db.session.commit()
-    
-    # Se for psicólogo, criar registro de psicólogo
+    # Perfil ligado pelo relacionamento: usuário e perfil são gravados no mesmo commit
     if dados['tipo_usuario'] == 'psicologo':
-        from models.psicologo import Psicologo
-        
-        if 'registro' not in dados or 'especializacao' not in dados:
-            return jsonify({'mensagem': 'Registro (CRP) e especialização são obrigatórios para psicólogos'}), 400
-        
-        novo_psicologo = Psicologo(
-            usuario_id=novo_usuario.id,
+        novo_usuario.psicologo = Psicologo(
             registro=dados['registro'],
             especializacao=dados['especializacao']
         )
-        
-        db.session.add(novo_psicologo)
-        db.session.commit()
+    else:
+        novo_usuario.paciente = Paciente()
     
-    # Se for paciente, criar registro de paciente
-    if dados['tipo_usuario'] == 'paciente':
-        from models.paciente import Paciente
-        
-        novo_paciente = Paciente(
-            usuario_id=novo_usuario.id
-        )
-        
-        db.session.add(novo_paciente)
+    db.session.add(novo_usuario)
+    try:
+        db.session.flush()
+        # Lido antes do commit, que expira o objeto
+        novo_usuario_id = novo_usuario.id
         db.session.commit()
+    except IntegrityError:
+        # Registro concorrente com o mesmo nome de usuário ou email
+        db.session.rollback()
+        return jsonify({'mensagem': 'Nome de usuário ou email já está em uso'}), 400
     
-    return jsonify({'mensagem': 'Usuário registrado com sucesso', 'id': novo_usuario.id}), 201
+    return jsonify({'mensagem': 'Usuário registrado com sucesso', 'id': novo_usuario_id}), 201
 
 @auth_bp.route('/perfil', methods=['GET'])
 @jwt_required()
@@ -1,14 +1,29 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from flask_jwt_extended import jwt_required, get_jwt
 from models.prontuario_medico import ProntuarioMedico
 from models.psicologo import Psicologo
 from models.paciente import Paciente
 from extensions import db
 from functools import wraps
 from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from servicos.paginacao import paginacao_solicitada, paginar, ParametroPaginacaoInvalido
+from servicos.datas import ler_intervalo, filtrar_periodo
+from servicos.identidade import obter_psicologo_id, obter_paciente_id
+from servicos.transmissao import formato_transmissao, transmitir, LINHAS_POR_LOTE
+from servicos.exportacao import ler_opcoes_exportacao, parquet_disponivel, exportar
 
 medical_records_bp = Blueprint('prontuarios', __name__)
 
+# Opções de carregamento para serializar prontuários com detalhes
+# (paciente, psicólogo e respectivos usuários) sem consultas N+1
+def opcoes_detalhes_prontuario():
+    return (
+        joinedload(ProntuarioMedico.paciente).joinedload(Paciente.usuario),
+        joinedload(ProntuarioMedico.psicologo).joinedload(Psicologo.usuario)
+    )
+
 # Decorador para verificar se o usuário é psicólogo
 def somente_psicologo(f):
     @wraps(f)
@@ -23,12 +38,12 @@ def somente_psicologo(f):
         return f(*args, **kwargs)
     return decorated
 
-# Decorador para verificar se o usuário é o psicólogo ou paciente do prontuário
+# Decorador para verificar se o usuário é o psicólogo ou paciente do prontuário;
+# o prontuário autorizado é passado à view no argumento 'prontuario'
 def psicologo_ou_paciente_do_prontuario(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        # Obter ID do usuário atual
-        usuario_atual_id = get_jwt_identity()
+        # Obter tipo do usuário atual
         claims = get_jwt()
         tipo_usuario = claims.get('tipo_usuario', '')
         
@@ -37,66 +52,141 @@ def psicologo_ou_paciente_do_prontuario(f):
         if not prontuario_id:
             return jsonify({'mensagem': 'ID do prontuário não fornecido'}), 400
         
-        # Buscar prontuário
-        prontuario = ProntuarioMedico.query.get(prontuario_id)
-        if not prontuario:
-            return jsonify({'mensagem': 'Prontuário não encontrado'}), 404
-        
-        # Verificar se o usuário é o psicólogo ou paciente do prontuário
-        autorizado = False
-        
+        # Buscar o prontuário do próprio usuário em uma única consulta,
+        # já com os relacionamentos usados na resposta
+        prontuario = None
         if tipo_usuario == 'psicologo':
-            psicologo = Psicologo.query.filter_by(usuario_id=usuario_atual_id).first()
-            if psicologo and psicologo.id == prontuario.psicologo_id:
-                autorizado = True
+            filtro_usuario = ProntuarioMedico.psicologo_id == obter_psicologo_id()
         elif tipo_usuario == 'paciente':
-            paciente = Paciente.query.filter_by(usuario_id=usuario_atual_id).first()
-            if paciente and paciente.id == prontuario.paciente_id:
-                autorizado = True
+            filtro_usuario = ProntuarioMedico.paciente_id == obter_paciente_id()
+        else:
+            filtro_usuario = None
+        
+        if filtro_usuario is not None:
+            prontuario = ProntuarioMedico.query.options(*opcoes_detalhes_prontuario()).filter(
+                ProntuarioMedico.id == prontuario_id, filtro_usuario
+            ).first()
         
-        if not autorizado:
+        if not prontuario:
+            # Distinguir prontuário inexistente de acesso não autorizado
+            if not db.session.query(ProntuarioMedico.id).filter_by(id=prontuario_id).first():
+                return jsonify({'mensagem': 'Prontuário não encontrado'}), 404
             return jsonify({'mensagem': 'Acesso não autorizado a este prontuário'}), 403
         
+        # Entregar o registro carregado à view
+        kwargs['prontuario'] = prontuario
         return f(*args, **kwargs)
     return decorated
 
 @medical_records_bp.route('/prontuarios', methods=['GET'])
 @jwt_required()
 def listar_prontuarios():
-    # Obter ID e tipo do usuário atual
-    usuario_atual_id = get_jwt_identity()
+    # Obter tipo do usuário atual
     claims = get_jwt()
     tipo_usuario = claims.get('tipo_usuario', '')
     
     # Filtrar prontuários com base no tipo de usuário
+    query = ProntuarioMedico.query.options(*opcoes_detalhes_prontuario())
     if tipo_usuario == 'psicologo':
-        psicologo = Psicologo.query.filter_by(usuario_id=usuario_atual_id).first()
-        if not psicologo:
+        psicologo_id = obter_psicologo_id()
+        if not psicologo_id:
             return jsonify({'mensagem': 'Psicólogo não encontrado'}), 404
         
-        prontuarios = ProntuarioMedico.query.filter_by(psicologo_id=psicologo.id).all()
+        query = query.filter_by(psicologo_id=psicologo_id)
     elif tipo_usuario == 'paciente':
-        paciente = Paciente.query.filter_by(usuario_id=usuario_atual_id).first()
-        if not paciente:
+        paciente_id = obter_paciente_id()
+        if not paciente_id:
             return jsonify({'mensagem': 'Paciente não encontrado'}), 404
         
-        prontuarios = ProntuarioMedico.query.filter_by(paciente_id=paciente.id).all()
+        query = query.filter_by(paciente_id=paciente_id)
     else:
         return jsonify({'mensagem': 'Tipo de usuário não autorizado'}), 403
     
     # Parâmetro de consulta para filtrar por paciente (apenas para psicólogos)
     paciente_id = request.args.get('paciente_id', type=int)
     if tipo_usuario == 'psicologo' and paciente_id:
-        prontuarios = [p for p in prontuarios if p.paciente_id == paciente_id]
+        query = query.filter_by(paciente_id=paciente_id)
+    
+    # Filtro opcional por período (inicio/fim no formato YYYY-MM-DD)
+    try:
+        inicio, fim = ler_intervalo(request.args)
+    except ValueError as erro:
+        return jsonify({'mensagem': str(erro)}), 400
+    query = filtrar_periodo(query, ProntuarioMedico.data, inicio, fim)
+    
+    # Paginação por cursor, ordenada por (data, id)
+    if paginacao_solicitada(request.args):
+        try:
+            prontuarios, proximo_cursor = paginar(
+                query, (ProntuarioMedico.data, ProntuarioMedico.id), request.args
+            )
+        except ParametroPaginacaoInvalido as erro:
+            return jsonify({'mensagem': str(erro)}), 400
+        
+        return jsonify({
+            'itens': [prontuario.para_dict(incluir_detalhes=True) for prontuario in prontuarios],
+            'next_cursor': proximo_cursor
+        }), 200
+    
+    # Resposta em stream (JSON ou NDJSON), lendo o banco em lotes
+    formato = formato_transmissao(request)
+    if formato:
+        return transmitir(
+            (prontuario.para_dict(incluir_detalhes=True) for prontuario in query.yield_per(LINHAS_POR_LOTE)), formato
+        )
+    
+    prontuarios = query.all()
     
     # Retornar resultados
     return jsonify([prontuario.para_dict(incluir_detalhes=True) for prontuario in prontuarios]), 200
 
+@medical_records_bp.route('/prontuarios/exportar', methods=['GET'])
+@jwt_required()
+def exportar_prontuarios():
+    # Obter tipo do usuário atual
+    claims = get_jwt()
+    tipo_usuario = claims.get('tipo_usuario', '')
+    
+    # Exportar apenas os prontuários do próprio usuário
+    consulta = select(*ProntuarioMedico.__table__.columns)
+    if tipo_usuario == 'psicologo':
+        psicologo_id = obter_psicologo_id()
+        if not psicologo_id:
+            return jsonify({'mensagem': 'Psicólogo não encontrado'}), 404
+        
+        consulta = consulta.filter_by(psicologo_id=psicologo_id)
+        
+        # Parâmetro de consulta para exportar um único paciente
+        paciente_id = request.args.get('paciente_id', type=int)
+        if paciente_id:
+            consulta = consulta.filter_by(paciente_id=paciente_id)
+    elif tipo_usuario == 'paciente':
+        paciente_id = obter_paciente_id()
+        if not paciente_id:
+            return jsonify({'mensagem': 'Paciente não encontrado'}), 404
+        
+        consulta = consulta.filter_by(paciente_id=paciente_id)
+    else:
+        return jsonify({'mensagem': 'Tipo de usuário não autorizado'}), 403
+    
+    try:
+        inicio, fim = ler_intervalo(request.args)
+        formato, comprimir = ler_opcoes_exportacao(request.args)
+    except ValueError as erro:
+        return jsonify({'mensagem': str(erro)}), 400
+    
+    if formato == 'parquet' and not parquet_disponivel():
+        return jsonify({'mensagem': 'Exportação em Parquet indisponível: pyarrow não está instalado'}), 501
+    
+    consulta = filtrar_periodo(consulta, ProntuarioMedico.data, inicio, fim).order_by(ProntuarioMedico.data, ProntuarioMedico.id)
+    
+    nome_arquivo = '_'.join(['prontuarios'] + [dia.isoformat() for dia in (inicio, fim) if dia])
+    return exportar(consulta, formato, comprimir, nome_arquivo)
+
 @medical_records_bp.route('/prontuarios/<int:prontuario_id>', methods=['GET'])
 @jwt_required()
 @psicologo_ou_paciente_do_prontuario
-def obter_prontuario(prontuario_id):
-    prontuario = ProntuarioMedico.query.get(prontuario_id)
+def obter_prontuario(prontuario_id, prontuario):
     return jsonify(prontuario.para_dict(incluir_detalhes=True)), 200
 
 @medical_records_bp.route('/prontuarios', methods=['POST'])
@@ -111,11 +201,10 @@ def criar_prontuario():
         if campo not in dados:
             return jsonify({'mensagem': f'Campo {campo} é obrigatório'}), 400
     
-    # Obter ID do psicólogo atual
-    usuario_atual_id = get_jwt_identity()
-    psicologo = Psicologo.query.filter_by(usuario_id=usuario_atual_id).first()
+    # Obter ID do psicólogo atual, confirmado no banco antes de gravar
+    psicologo_id = obter_psicologo_id(confirmar=True)
     
-    if not psicologo:
+    if not psicologo_id:
         return jsonify({'mensagem': 'Psicólogo não encontrado'}), 404
     
     # Verificar se o paciente existe
@@ -124,12 +213,15 @@ def criar_prontuario():
         return jsonify({'mensagem': 'Paciente não encontrado'}), 404
     
     # Criar novo prontuário
-    novo_prontuario = ProntuarioMedico(
-        data=dados['data'],
-        conteudo=dados['conteudo'],
-        psicologo_id=psicologo.id,
-        paciente_id=dados['paciente_id']
-    )
+    try:
+        novo_prontuario = ProntuarioMedico(
+            data=dados['data'],
+            conteudo=dados['conteudo'],
+            psicologo_id=psicologo_id,
+            paciente_id=dados['paciente_id']
+        )
+    except (TypeError, ValueError):
+        return jsonify({'mensagem': 'Data em formato inválido. Use YYYY-MM-DD'}), 400
     
     db.session.add(novo_prontuario)
     db.session.commit()
@@ -142,26 +234,19 @@ def criar_prontuario():
 @medical_records_bp.route('/prontuarios/<int:prontuario_id>', methods=['PUT'])
 @jwt_required()
 @somente_psicologo
-def atualizar_prontuario(prontuario_id):
-    prontuario = ProntuarioMedico.query.get(prontuario_id)
-    
-    if not prontuario:
-        return jsonify({'mensagem': 'Prontuário não encontrado'}), 404
-    
-    # Verificar se o psicólogo atual é o dono do prontuário
-    usuario_atual_id = get_jwt_identity()
-    psicologo = Psicologo.query.filter_by(usuario_id=usuario_atual_id).first()
-    
-    if not psicologo or psicologo.id != prontuario.psicologo_id:
-        return jsonify({'mensagem': 'Acesso não autorizado a este prontuário'}), 403
-    
+@psicologo_ou_paciente_do_prontuario
+def atualizar_prontuario(prontuario_id, prontuario):
     dados = request.get_json()
     
     # Atualizar campos
     if 'conteudo' in dados:
         prontuario.conteudo = dados['conteudo']
     if 'data' in dados:
-        prontuario.data = dados['data']
+        try:
+            prontuario.data = dados['data']
+        except (TypeError, ValueError):
+            db.session.rollback()
+            return jsonify({'mensagem': 'Data em formato inválido. Use YYYY-MM-DD'}), 400
     
     db.session.commit()
     
@@ -173,19 +258,8 @@ def atualizar_prontuario(prontuario_id):
 @medical_records_bp.route('/prontuarios/<int:prontuario_id>', methods=['DELETE'])
 @jwt_required()
 @somente_psicologo
-def excluir_prontuario(prontuario_id):
-    prontuario = ProntuarioMedico.query.get(prontuario_id)
-    
-    if not prontuario:
-        return jsonify({'mensagem': 'Prontuário não encontrado'}), 404
-    
-    # Verificar se o psicólogo atual é o dono do prontuário
-    usuario_atual_id = get_jwt_identity()
-    psicologo = Psicologo.query.filter_by(usuario_id=usuario_atual_id).first()
-    
-    if not psicologo or psicologo.id != prontuario.psicologo_id:
-        return jsonify({'mensagem': 'Acesso não autorizado a este prontuário'}), 403
-    
+@psicologo_ou_paciente_do_prontuario
+def excluir_prontuario(prontuario_id, prontuario):
     db.session.delete(prontuario)
     db.session.commit()
     
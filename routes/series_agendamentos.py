@@ -0,0 +1,273 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt
+from models.agendamento import Agendamento
+from models.serie_agendamento import SerieAgendamento, DIAS_POR_REGRA
+from models.paciente import Paciente
+from extensions import db
+from functools import wraps
+from datetime import date, datetime
+from servicos.identidade import obter_psicologo_id, obter_paciente_id
+from servicos.agenda import conflitos_da_serie
+from routes.agendamentos import somente_psicologo, duracao_valida, aplicar_atualizacao
+
+series_bp = Blueprint('series_agendamentos', __name__)
+
+# Decorador para verificar se o usuário é o psicólogo ou paciente da série;
+# a série autorizada é passada à view no argumento 'serie'
+def psicologo_ou_paciente_da_serie(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        # Obter tipo do usuário atual
+        claims = get_jwt()
+        tipo_usuario = claims.get('tipo_usuario', '')
+        
+        serie_id = kwargs.get('serie_id')
+        
+        # Buscar a série do próprio usuário em uma única consulta
+        if tipo_usuario == 'psicologo':
+            filtro_usuario = SerieAgendamento.psicologo_id == obter_psicologo_id()
+        elif tipo_usuario == 'paciente':
+            filtro_usuario = SerieAgendamento.paciente_id == obter_paciente_id()
+        else:
+            filtro_usuario = None
+        
+        serie = None
+        if filtro_usuario is not None:
+            serie = SerieAgendamento.query.filter(SerieAgendamento.id == serie_id, filtro_usuario).first()
+        
+        if not serie:
+            # Distinguir série inexistente de acesso não autorizado
+            if not db.session.query(SerieAgendamento.id).filter_by(id=serie_id).first():
+                return jsonify({'mensagem': 'Série não encontrada'}), 404
+            return jsonify({'mensagem': 'Acesso não autorizado a esta série'}), 403
+        
+        kwargs['serie'] = serie
+        return f(*args, **kwargs)
+    return decorated
+
+# Data da ocorrência na URL (YYYY-MM-DD) convertida na data/hora da ocorrência da série
+def ler_ocorrencia(serie, data):
+    try:
+        dia = datetime.strptime(data, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+    
+    momento = datetime.combine(dia, serie.inicio.time())
+    return momento if serie.tem_ocorrencia(momento) else None
+
+@series_bp.route('/series', methods=['GET'])
+@jwt_required()
+def listar_series():
+    # Obter tipo do usuário atual
+    claims = get_jwt()
+    tipo_usuario = claims.get('tipo_usuario', '')
+    
+    if tipo_usuario == 'psicologo':
+        series = SerieAgendamento.query.filter_by(psicologo_id=obter_psicologo_id())
+    elif tipo_usuario == 'paciente':
+        series = SerieAgendamento.query.filter_by(paciente_id=obter_paciente_id())
+    else:
+        return jsonify({'mensagem': 'Tipo de usuário não autorizado'}), 403
+    
+    return jsonify([serie.para_dict() for serie in series.order_by(SerieAgendamento.id)]), 200
+
+@series_bp.route('/series', methods=['POST'])
+@jwt_required()
+@somente_psicologo
+def criar_serie():
+    dados = request.get_json()
+    
+    # Verificar campos obrigatórios
+    campos_obrigatorios = ['data', 'hora', 'paciente_id']
+    for campo in campos_obrigatorios:
+        if campo not in dados:
+            return jsonify({'mensagem': f'Campo {campo} é obrigatório'}), 400
+    
+    # Obter ID do psicólogo atual, confirmado no banco antes de gravar
+    psicologo_id = obter_psicologo_id(confirmar=True)
+    
+    if not psicologo_id:
+        return jsonify({'mensagem': 'Psicólogo não encontrado'}), 404
+    
+    # Verificar se o paciente existe
+    if not db.session.get(Paciente, dados['paciente_id']):
+        return jsonify({'mensagem': 'Paciente não encontrado'}), 404
+    
+    regra = dados.get('regra', 'semanal')
+    if regra not in DIAS_POR_REGRA:
+        return jsonify({'mensagem': 'Regra inválida. Deve ser "diaria" ou "semanal"'}), 400
+    
+    intervalo = dados.get('intervalo', 1)
+    if not isinstance(intervalo, int) or isinstance(intervalo, bool) or intervalo < 1:
+        return jsonify({'mensagem': 'Campo intervalo deve ser um número inteiro positivo'}), 400
+    
+    if not duracao_valida(dados.get('duracao_minutos')):
+        return jsonify({'mensagem': 'Campo duracao_minutos deve ser um número inteiro positivo'}), 400
+    
+    try:
+        inicio = datetime.strptime(f"{dados['data']} {dados['hora']}", '%Y-%m-%d %H:%M')
+        fim = datetime.strptime(dados['fim'], '%Y-%m-%d').date() if dados.get('fim') else None
+    except (TypeError, ValueError):
+        return jsonify({'mensagem': 'Data, hora ou fim em formato inválido. Use YYYY-MM-DD e HH:MM'}), 400
+    
+    if fim and fim < inicio.date():
+        return jsonify({'mensagem': 'Campo fim deve ser posterior à data de início'}), 400
+    
+    nova_serie = SerieAgendamento(
+        regra=regra,
+        intervalo=intervalo,
+        inicio=inicio,
+        fim=fim,
+        duracao_minutos=dados.get('duracao_minutos'),
+        observacoes=dados.get('observacoes', ''),
+        excecoes=[],
+        psicologo_id=psicologo_id,
+        paciente_id=dados['paciente_id']
+    )
+    
+    # Verificar conflitos com a agenda sem gerar as ocorrências da série
+    if conflitos_da_serie(nova_serie):
+        return jsonify({'mensagem': 'A série conflita com agendamentos existentes'}), 400
+    
+    db.session.add(nova_serie)
+    db.session.commit()
+    
+    return jsonify({
+        'mensagem': 'Série criada com sucesso',
+        'serie': nova_serie.para_dict()
+    }), 201
+
+@series_bp.route('/series/<int:serie_id>', methods=['PUT'])
+@jwt_required()
+@somente_psicologo
+@psicologo_ou_paciente_da_serie
+def atualizar_serie(serie_id, serie):
+    dados = request.get_json()
+    hoje = date.today()
+    
+    # Hora, duração e observações valem a partir de hoje: com ocorrências passadas, a
+    # série é encerrada ontem e continua em uma nova série, mantendo o histórico
+    alvo = serie
+    dividida = serie.inicio.date() < hoje and any(campo in dados for campo in ('hora', 'duracao_minutos', 'observacoes'))
+    if dividida:
+        alvo = serie.dividir(hoje)
+        if alvo is None:
+            db.session.rollback()
+            return jsonify({'mensagem': 'A série já terminou; ocorrências passadas não podem ser alteradas'}), 400
+    
+    # Reagendar a série é uma única atualização, independente do número de ocorrências
+    try:
+        if 'hora' in dados:
+            alvo.inicio = datetime.combine(alvo.inicio.date(), datetime.strptime(dados['hora'], '%H:%M').time())
+        if 'fim' in dados:
+            fim = datetime.strptime(dados['fim'], '%Y-%m-%d').date() if dados['fim'] else None
+            
+            # Um fim antes de hoje apagaria ocorrências passadas
+            if fim and fim < hoje and fim != serie.fim:
+                db.session.rollback()
+                return jsonify({'mensagem': 'Campo fim não pode ser anterior a hoje'}), 400
+            alvo.fim = fim
+    except (TypeError, ValueError):
+        db.session.rollback()
+        return jsonify({'mensagem': 'Hora ou fim em formato inválido. Use HH:MM e YYYY-MM-DD'}), 400
+    
+    if alvo.fim and alvo.fim < alvo.inicio.date():
+        db.session.rollback()
+        return jsonify({'mensagem': 'Campo fim deve ser posterior à data de início'}), 400
+    
+    if 'duracao_minutos' in dados:
+        if not duracao_valida(dados['duracao_minutos']):
+            db.session.rollback()
+            return jsonify({'mensagem': 'Campo duracao_minutos deve ser um número inteiro positivo'}), 400
+        alvo.duracao_minutos = dados['duracao_minutos']
+    if 'observacoes' in dados:
+        alvo.observacoes = dados['observacoes']
+    
+    if dividida:
+        # Ocorrências futuras já materializadas passam para a continuação
+        db.session.add(alvo)
+        db.session.flush()
+        Agendamento.query.filter(
+            Agendamento.serie_id == serie.id,
+            Agendamento.ocorrencia >= datetime.combine(hoje, datetime.min.time())
+        ).update({'serie_id': alvo.id})
+    
+    if 'hora' in dados:
+        if conflitos_da_serie(alvo):
+            db.session.rollback()
+            return jsonify({'mensagem': 'A série conflita com agendamentos existentes'}), 400
+    
+    db.session.commit()
+    
+    resultado = {
+        'mensagem': 'Série atualizada com sucesso',
+        'serie': alvo.para_dict()
+    }
+    if dividida:
+        resultado['serie_anterior'] = serie.para_dict()
+    return jsonify(resultado), 200
+
+@series_bp.route('/series/<int:serie_id>', methods=['DELETE'])
+@jwt_required()
+@somente_psicologo
+@psicologo_ou_paciente_da_serie
+def excluir_serie(serie_id, serie):
+    # Ocorrências já materializadas permanecem como agendamentos avulsos
+    Agendamento.query.filter_by(serie_id=serie.id).update({'serie_id': None})
+    db.session.delete(serie)
+    db.session.commit()
+    
+    return jsonify({'mensagem': 'Série excluída com sucesso'}), 200
+
+@series_bp.route('/series/<int:serie_id>/ocorrencias/<data>', methods=['PUT'])
+@jwt_required()
+@psicologo_ou_paciente_da_serie
+def atualizar_ocorrencia(serie_id, data, serie):
+    dados = request.get_json()
+    
+    momento = ler_ocorrencia(serie, data)
+    if not momento:
+        return jsonify({'mensagem': 'Ocorrência não encontrada'}), 404
+    
+    # Materializar a ocorrência: vira um agendamento e deixa de ser gerada pela série
+    agendamento = Agendamento(
+        inicio=momento,
+        duracao_minutos=serie.duracao_minutos,
+        status='pendente',
+        observacoes=serie.observacoes,
+        psicologo_id=serie.psicologo_id,
+        paciente_id=serie.paciente_id,
+        serie_id=serie.id,
+        ocorrencia=momento
+    )
+    
+    # Obter tipo do usuário atual
+    claims = get_jwt()
+    tipo_usuario = claims.get('tipo_usuario', '')
+    
+    erro = aplicar_atualizacao(agendamento, dados, tipo_usuario)
+    if erro:
+        return jsonify({'mensagem': erro[0]}), erro[1]
+    
+    serie.adicionar_excecao(momento.date())
+    db.session.add(agendamento)
+    db.session.commit()
+    
+    return jsonify({
+        'mensagem': 'Agendamento atualizado com sucesso',
+        'agendamento': agendamento.para_dict()
+    }), 200
+
+@series_bp.route('/series/<int:serie_id>/ocorrencias/<data>', methods=['DELETE'])
+@jwt_required()
+@somente_psicologo
+@psicologo_ou_paciente_da_serie
+def excluir_ocorrencia(serie_id, data, serie):
+    momento = ler_ocorrencia(serie, data)
+    if not momento:
+        return jsonify({'mensagem': 'Ocorrência não encontrada'}), 404
+    
+    serie.adicionar_excecao(momento.date())
+    db.session.commit()
+    
+    return jsonify({'mensagem': 'Ocorrência excluída com sucesso'}), 200
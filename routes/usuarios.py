@@ -3,11 +3,27 @@ from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from models.usuario import Usuario
 from models.psicologo import Psicologo
 from models.paciente import Paciente
-from extensions import db
+from extensions import db, revogacao
 from functools import wraps
+from sqlalchemy.orm import joinedload
+from servicos.paginacao import paginacao_solicitada, paginar, ParametroPaginacaoInvalido
+from servicos.transmissao import formato_transmissao, transmitir, LINHAS_POR_LOTE
+from servicos.importacao import importar_pacientes, xlsx_disponivel, ArquivoImportacaoInvalido
 
 users_bp = Blueprint('usuarios', __name__)
 
+# Resposta paginada por id, usada pelas listagens de usuários e perfis
+def listagem_paginada(query, coluna_id):
+    try:
+        itens, proximo_cursor = paginar(query, (coluna_id,), request.args)
+    except ParametroPaginacaoInvalido as erro:
+        return jsonify({'mensagem': str(erro)}), 400
+    
+    return jsonify({
+        'itens': [item.para_dict() for item in itens],
+        'next_cursor': proximo_cursor
+    }), 200
+
 # Decorador para verificar se o usuário é administrador ou o próprio usuário
 def admin_ou_proprio_usuario(f):
     @wraps(f)
@@ -53,6 +69,14 @@ def listar_usuarios():
     if tipo:
         query = query.filter_by(tipo_usuario=tipo)
     
+    if paginacao_solicitada(request.args):
+        return listagem_paginada(query, Usuario.id)
+    
+    # Resposta em stream (JSON ou NDJSON), lendo o banco em lotes
+    formato = formato_transmissao(request)
+    if formato:
+        return transmitir((usuario.para_dict() for usuario in query.yield_per(LINHAS_POR_LOTE)), formato)
+    
     # Executar consulta
     usuarios = query.all()
     
@@ -114,6 +138,10 @@ def excluir_usuario(usuario_id):
     if not usuario:
         return jsonify({'mensagem': 'Usuário não encontrado'}), 404
     
+    # Sessões abertas da conta excluída deixam de valer, inclusive os refresh tokens;
+    # revogadas antes do commit, para que a conta não seja excluída se a lista estiver cheia
+    revogacao.revogar_usuario(usuario_id)
+    
     db.session.delete(usuario)
     db.session.commit()
     
@@ -122,12 +150,41 @@ def excluir_usuario(usuario_id):
 @users_bp.route('/psicologos', methods=['GET'])
 @jwt_required()
 def listar_psicologos():
-    psicologos = Psicologo.query.all()
+    query = Psicologo.query.options(joinedload(Psicologo.usuario))
+    
+    if paginacao_solicitada(request.args):
+        return listagem_paginada(query, Psicologo.id)
+    
+    psicologos = query.all()
     return jsonify([p.para_dict() for p in psicologos]), 200
 
 @users_bp.route('/pacientes', methods=['GET'])
 @jwt_required()
 @somente_psicologo
 def listar_pacientes():
-    pacientes = Paciente.query.all()
-    return jsonify([p.para_dict() for p in pacientes]), 200
\ No newline at end of file
+    query = Paciente.query.options(joinedload(Paciente.usuario))
+    
+    if paginacao_solicitada(request.args):
+        return listagem_paginada(query, Paciente.id)
+    
+    pacientes = query.all()
+    return jsonify([p.para_dict() for p in pacientes]), 200
+
+@users_bp.route('/pacientes/importar', methods=['POST'])
+@jwt_required()
+@somente_psicologo
+def importar_pacientes_arquivo():
+    # Arquivo CSV ou XLSX enviado como multipart/form-data no campo 'arquivo'
+    arquivo = request.files.get('arquivo')
+    if not arquivo or not arquivo.filename:
+        return jsonify({'mensagem': 'Campo arquivo é obrigatório'}), 400
+    
+    if arquivo.filename.lower().endswith('.xlsx') and not xlsx_disponivel():
+        return jsonify({'mensagem': 'Importação de XLSX indisponível: openpyxl não está instalado'}), 501
+    
+    try:
+        relatorio = importar_pacientes(arquivo.stream, arquivo.filename)
+    except ArquivoImportacaoInvalido as erro:
+        return jsonify({'mensagem': str(erro)}), 400
+    
+    return jsonify(relatorio), 201 if relatorio['importados'] else 400
\ No newline at end of file
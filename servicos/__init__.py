@@ -0,0 +1 @@
+# Serviços compartilhados entre as rotas da API
@@ -0,0 +1,207 @@
+import heapq
+from datetime import datetime, date, timedelta
+from itertools import islice, repeat
+from sqlalchemy import or_, tuple_
+from sqlalchemy.orm import joinedload
+from extensions import db
+from models.agendamento import Agendamento
+from models.serie_agendamento import SerieAgendamento
+from models.psicologo import Psicologo
+from models.paciente import Paciente
+from servicos.paginacao import obter_limite, codificar_cursor, decodificar_cursor, ParametroPaginacaoInvalido
+
+# Sem período informado, as ocorrências de séries são calculadas para os próximos dias
+JANELA_PADRAO_DIAS = 90
+
+def janela_ocorrencias(inicio, fim):
+    """Converte o período da listagem (datas inclusivas ou None) em [inicio, fim) de data/hora."""
+    inicio = inicio or date.today()
+    janela_inicio = datetime.combine(inicio, datetime.min.time())
+    
+    if fim:
+        return janela_inicio, datetime.combine(fim + timedelta(days=1), datetime.min.time())
+    return janela_inicio, janela_inicio + timedelta(days=JANELA_PADRAO_DIAS)
+
+def series_no_periodo(inicio, fim, detalhes=False, **filtros):
+    # Séries (do psicólogo ou do paciente) com alguma data possível em [inicio, fim);
+    # com 'detalhes', já trazem psicólogo e paciente para a serialização completa
+    query = SerieAgendamento.query
+    if detalhes:
+        query = query.options(
+            joinedload(SerieAgendamento.psicologo).joinedload(Psicologo.usuario),
+            joinedload(SerieAgendamento.paciente).joinedload(Paciente.usuario)
+        )
+    
+    # Ordenadas por id: ocorrências no mesmo horário saem sempre na mesma ordem
+    return query.filter_by(**filtros).filter(
+        SerieAgendamento.inicio < fim,
+        or_(SerieAgendamento.fim.is_(None), SerieAgendamento.fim >= inicio.date())
+    ).order_by(SerieAgendamento.id).all()
+
+def ocorrencias_no_periodo(series, inicio, fim):
+    # Gerador de (momento, serie) em ordem cronológica, sem materializar as séries
+    # zip com repeat: cada par leva a própria série (um gerador interno veria só a última)
+    return heapq.merge(
+        *(zip(serie.ocorrencias(inicio, fim), repeat(serie)) for serie in series),
+        key=lambda par: par[0]
+    )
+
+# Tipos da chave de paginação da agenda: no mesmo horário, agendamentos gravados
+# vêm antes das ocorrências de séries (a mesma ordem da listagem completa)
+AGENDAMENTO, OCORRENCIA = 0, 1
+
+def paginar_agenda(query, series, inicio, fim, args):
+    """Paginação por chave sobre agendamentos gravados e ocorrências de séries.
+
+    A chave é (inicio, tipo, id), com o id do agendamento ou, para uma
+    ocorrência, o id da série: o cursor pode apontar para uma ocorrência
+    que não existe no banco. Os agendamentos da página vêm de uma consulta
+    com limite; as ocorrências são geradas a partir do cursor, dentro de
+    [inicio, fim), apenas até completar a página.
+
+    Retorna os itens serializados (com detalhes) e o cursor da próxima página.
+    """
+    limite = obter_limite(args)
+    
+    cursor = args.get('cursor')
+    chave_cursor = None
+    if cursor:
+        chave_cursor = tuple(decodificar_cursor(cursor, (datetime, int, int)))
+        momento, tipo, item_id = chave_cursor
+        if tipo == AGENDAMENTO:
+            query = query.filter(tuple_(Agendamento.inicio, Agendamento.id) > tuple_(momento, item_id))
+        elif tipo == OCORRENCIA:
+            query = query.filter(Agendamento.inicio > momento)
+        else:
+            raise ParametroPaginacaoInvalido('Cursor inválido')
+        inicio = max(inicio, momento)
+    
+    agendamentos = (
+        ((agendamento.inicio, AGENDAMENTO, agendamento.id), agendamento)
+        for agendamento in query.order_by(Agendamento.inicio, Agendamento.id).limit(limite + 1)
+    )
+    ocorrencias = (
+        ((momento, OCORRENCIA, serie.id), serie)
+        for momento, serie in ocorrencias_no_periodo(series, inicio, fim)
+    )
+    if chave_cursor:
+        ocorrencias = (par for par in ocorrencias if par[0] > chave_cursor)
+    
+    pagina = list(islice(heapq.merge(agendamentos, ocorrencias, key=lambda par: par[0]), limite + 1))
+    
+    proximo_cursor = None
+    if len(pagina) > limite:
+        pagina = pagina[:limite]
+        proximo_cursor = codificar_cursor(pagina[-1][0])
+    
+    itens = [
+        item.para_dict(incluir_detalhes=True) if tipo == AGENDAMENTO
+        else item.ocorrencia_para_dict(momento, incluir_detalhes=True)
+        for (momento, tipo, _), item in pagina
+    ]
+    return itens, proximo_cursor
+
+def horario_ocupado(psicologo_id, momento, ignorar_serie_id=None):
+    """Indica se o psicólogo já tem um agendamento ou ocorrência de série em 'momento'.
+
+    As séries são verificadas aritmeticamente (SerieAgendamento.tem_ocorrencia),
+    sem gerar suas ocorrências.
+    """
+    if db.session.query(Agendamento.id).filter_by(psicologo_id=psicologo_id, inicio=momento).first():
+        return True
+    
+    series = SerieAgendamento.query.filter(
+        SerieAgendamento.psicologo_id == psicologo_id,
+        SerieAgendamento.inicio <= momento,
+        or_(SerieAgendamento.fim.is_(None), SerieAgendamento.fim >= momento.date())
+    )
+    return any(serie.tem_ocorrencia(momento) for serie in series if serie.id != ignorar_serie_id)
+
+def conflitos_da_serie(serie):
+    """Indica se as ocorrências de 'serie' colidem com a agenda do psicólogo.
+
+    Compara com os agendamentos a partir do início da série e, por aritmética,
+    com as demais séries do psicólogo.
+    """
+    momentos = db.session.query(Agendamento.inicio).filter(
+        Agendamento.psicologo_id == serie.psicologo_id,
+        Agendamento.inicio >= serie.inicio
+    )
+    if serie.fim:
+        momentos = momentos.filter(Agendamento.inicio < datetime.combine(serie.fim + timedelta(days=1), datetime.min.time()))
+    if any(serie.tem_ocorrencia(momento) for momento, in momentos):
+        return True
+    
+    outras = SerieAgendamento.query.filter(
+        SerieAgendamento.psicologo_id == serie.psicologo_id,
+        SerieAgendamento.id != serie.id,
+        or_(SerieAgendamento.fim.is_(None), SerieAgendamento.fim >= serie.inicio.date())
+    )
+    if serie.fim:
+        outras = outras.filter(SerieAgendamento.inicio < datetime.combine(serie.fim + timedelta(days=1), datetime.min.time()))
+    return any(serie.coincide_com(outra) for outra in outras)
+
+# Duração considerada para agendamentos e séries sem duracao_minutos
+DURACAO_PADRAO_MINUTOS = 50
+
+def intervalos_ocupados(psicologo_id, inicio, fim):
+    """Intervalos (inicio, fim) ocupados na agenda do psicólogo em [inicio, fim), ordenados.
+
+    Uma consulta por intervalo nos agendamentos (índice psicologo_id, inicio)
+    e outra nas séries, cujas ocorrências são geradas apenas dentro da janela.
+    """
+    # Agendamentos iniciados pouco antes da janela ainda podem ocupá-la
+    margem = inicio - timedelta(days=1)
+    
+    linhas = db.session.execute(
+        db.select(Agendamento.inicio, Agendamento.duracao_minutos).where(
+            Agendamento.psicologo_id == psicologo_id,
+            Agendamento.inicio >= margem,
+            Agendamento.inicio < fim
+        )
+    ).all()
+    intervalos = [
+        (momento, momento + timedelta(minutes=duracao or DURACAO_PADRAO_MINUTOS))
+        for momento, duracao in linhas
+    ]
+    
+    series = SerieAgendamento.query.filter(
+        SerieAgendamento.psicologo_id == psicologo_id,
+        SerieAgendamento.inicio < fim,
+        or_(SerieAgendamento.fim.is_(None), SerieAgendamento.fim >= margem.date())
+    )
+    for serie in series:
+        duracao = timedelta(minutes=serie.duracao_minutos or DURACAO_PADRAO_MINUTOS)
+        intervalos.extend((momento, momento + duracao) for momento in serie.ocorrencias(margem, fim))
+    
+    intervalos.sort()
+    return intervalos
+
+def horarios_livres(ocupados, dias, hora_inicio, hora_fim, duracao):
+    """Gerador dos horários livres de tamanho 'duracao' no expediente de cada dia.
+
+    Varredura única sobre 'ocupados' (ordenados por início): cada intervalo é
+    visitado uma vez, sem consultar o banco por horário candidato.
+    """
+    indice = 0
+    ocupado_ate = datetime.min
+    
+    for dia in dias:
+        cursor = max(datetime.combine(dia, hora_inicio), ocupado_ate)
+        fim_expediente = datetime.combine(dia, hora_fim)
+        
+        while indice < len(ocupados) and ocupados[indice][0] < fim_expediente:
+            inicio_ocupado, fim_ocupado = ocupados[indice]
+            
+            # Horários livres antes do próximo intervalo ocupado
+            while cursor + duracao <= inicio_ocupado:
+                yield cursor
+                cursor += duracao
+            
+            cursor = max(cursor, fim_ocupado)
+            ocupado_ate = max(ocupado_ate, fim_ocupado)
+            indice += 1
+        
+        while cursor + duracao <= fim_expediente:
+            yield cursor
+            cursor += duracao
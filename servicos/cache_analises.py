@@ -0,0 +1,201 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, has_app_context, jsonify, request
+from sqlalchemy import event, inspect, select, union
+from sqlalchemy.orm import object_session
+from extensions import db
+from models.usuario import Usuario
+from models.paciente import Paciente
+from models.resumo_analitico import ResumoAgendamentosPaciente, ResumoProntuariosMes
+from servicos.identidade import obter_psicologo_id
+
+class _CacheMemoria:
+    # LRU limitado por quantidade de itens, com expiração por TTL; local ao processo
+    def __init__(self, max_itens, ttl):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._itens = OrderedDict()  # (psicologo_id, chave) -> (expira, valor)
+        self._chaves = {}  # psicologo_id -> chaves em cache, para a invalidação
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+    
+    def _remover(self, item):
+        del self._itens[item]
+        chaves = self._chaves[item[0]]
+        chaves.discard(item[1])
+        if not chaves:
+            del self._chaves[item[0]]
+    
+    def obter(self, psicologo_id, chave):
+        item = (psicologo_id, chave)
+        with self._lock:
+            encontrado = self._itens.get(item)
+            if encontrado and encontrado[0] <= time.monotonic():
+                self._remover(item)
+                self.remocoes += 1
+                encontrado = None
+            
+            if encontrado is None:
+                self.falhas += 1
+                return None
+            
+            self._itens.move_to_end(item)
+            self.acertos += 1
+            return encontrado[1]
+    
+    def guardar(self, psicologo_id, chave, valor):
+        item = (psicologo_id, chave)
+        with self._lock:
+            self._itens[item] = (time.monotonic() + self.ttl, valor)
+            self._itens.move_to_end(item)
+            self._chaves.setdefault(psicologo_id, set()).add(chave)
+            
+            # Limite de memória: descarta o item usado há mais tempo
+            while len(self._itens) > self.max_itens:
+                self._remover(next(iter(self._itens)))
+                self.remocoes += 1
+    
+    def invalidar(self, psicologo_id):
+        with self._lock:
+            for chave in list(self._chaves.get(psicologo_id, ())):
+                self._remover((psicologo_id, chave))
+    
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._chaves.clear()
+    
+    def estatisticas(self):
+        return {
+            'backend': 'memoria',
+            'itens': len(self._itens),
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'remocoes': self.remocoes
+        }
+
+class _CacheRedis:
+    # Compartilhado entre os workers. Cada psicólogo tem um número de geração que
+    # faz parte das chaves: invalidar é incrementá-lo, e as entradas antigas expiram
+    # pelo TTL. O limite de memória e a remoção LRU ficam a cargo do Redis (maxmemory)
+    def __init__(self, url, ttl):
+        import redis
+        
+        self.ttl = ttl
+        self._redis = redis.Redis.from_url(url)
+        self.acertos = 0
+        self.falhas = 0
+    
+    def _chave(self, psicologo_id, chave):
+        geracao = int(self._redis.get(f'analises:{psicologo_id}:geracao') or 0)
+        return f'analises:{psicologo_id}:{geracao}:{chave}'
+    
+    def obter(self, psicologo_id, chave):
+        valor = self._redis.get(self._chave(psicologo_id, chave))
+        if valor is None:
+            self.falhas += 1
+            return None
+        
+        self.acertos += 1
+        return json.loads(valor)
+    
+    def guardar(self, psicologo_id, chave, valor):
+        self._redis.set(self._chave(psicologo_id, chave), json.dumps(valor), ex=self.ttl)
+    
+    def invalidar(self, psicologo_id):
+        self._redis.incr(f'analises:{psicologo_id}:geracao')
+    
+    def limpar(self):
+        for chave in self._redis.scan_iter('analises:*:geracao'):
+            self._redis.incr(chave)
+    
+    def estatisticas(self):
+        informacoes = self._redis.info('stats')
+        return {
+            'backend': 'redis',
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            # Contadores do servidor Redis (todas as chaves, não só as das análises)
+            'remocoes': informacoes.get('evicted_keys', 0) + informacoes.get('expired_keys', 0)
+        }
+
+def _nome_alterado(mapper, conexao, usuario):
+    # As análises de pacientes e de prontuários trazem o nome do paciente: a
+    # renomeação marca os psicólogos que o atendem, como as alterações dos resumos
+    if usuario.tipo_usuario != 'paciente' or not inspect(usuario).attrs.nome.history.has_changes():
+        return
+    
+    psicologos = conexao.execute(union(*(
+        select(resumo.psicologo_id).join(Paciente, Paciente.id == resumo.paciente_id).where(Paciente.usuario_id == usuario.id)
+        for resumo in (ResumoAgendamentosPaciente, ResumoProntuariosMes)
+    ))).scalars()
+    object_session(usuario).info.setdefault('psicologos_alterados', set()).update(psicologos)
+
+def _invalidar_alterados(sessao):
+    # Psicólogos com agendamentos ou prontuários alterados na transação
+    # (marcados por servicos/resumos.py) só são invalidados após o commit
+    alterados = sessao.info.pop('psicologos_alterados', None)
+    if alterados and has_app_context():
+        cache = current_app.extensions.get('cache_analises')
+        if cache:
+            for psicologo_id in alterados:
+                cache.invalidar(psicologo_id)
+
+class CacheAnalises:
+    """Cache das respostas das análises, por psicólogo e endpoint.
+
+    Configuração (por ambiente):
+
+    - ANALISES_CACHE_BACKEND: 'memoria' (padrão, local ao processo),
+      'redis' (compartilhado entre workers) ou 'nenhum'
+    - ANALISES_CACHE_MAX_ITENS: limite de respostas no backend em memória
+    - ANALISES_CACHE_TTL: segundos até uma resposta expirar
+    - ANALISES_CACHE_REDIS_URL: endereço do Redis
+
+    As respostas de um psicólogo são invalidadas após o commit de qualquer
+    alteração em seus agendamentos ou prontuários e da mudança de nome de um
+    de seus pacientes. No backend em memória
+    com vários workers, os demais workers só percebem a alteração pelo TTL.
+    """
+    
+    _eventos_registrados = False
+    
+    def init_app(self, app):
+        backend = app.config['ANALISES_CACHE_BACKEND']
+        if backend == 'redis':
+            cache = _CacheRedis(app.config['ANALISES_CACHE_REDIS_URL'], app.config['ANALISES_CACHE_TTL'])
+        elif backend == 'memoria':
+            cache = _CacheMemoria(app.config['ANALISES_CACHE_MAX_ITENS'], app.config['ANALISES_CACHE_TTL'])
+        else:
+            cache = None
+        app.extensions['cache_analises'] = cache
+        
+        if not CacheAnalises._eventos_registrados:
+            event.listen(Usuario, 'after_update', _nome_alterado)
+            event.listen(db.session, 'after_commit', _invalidar_alterados)
+            CacheAnalises._eventos_registrados = True
+
+def em_cache(f):
+    # Decorador para views de análise do psicólogo atual; guarda apenas respostas 200
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        cache = current_app.extensions.get('cache_analises')
+        psicologo_id = obter_psicologo_id()
+        if not cache or not psicologo_id:
+            return f(*args, **kwargs)
+        
+        chave = request.full_path
+        dados = cache.obter(psicologo_id, chave)
+        if dados is not None:
+            return jsonify(dados), 200
+        
+        resposta, codigo = f(*args, **kwargs)
+        if codigo == 200:
+            cache.guardar(psicologo_id, chave, resposta.get_json())
+        return resposta, codigo
+    return decorated
@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+
+FORMATO_DATA = '%Y-%m-%d'
+
+def ler_intervalo(args):
+    """Lê os parâmetros opcionais 'inicio' e 'fim' (YYYY-MM-DD, inclusivos).
+
+    Retorna um par de datas (ou None) e lança ValueError se o formato for
+    inválido ou se 'fim' for anterior a 'inicio'.
+    """
+    inicio = args.get('inicio')
+    fim = args.get('fim')
+
+    try:
+        inicio = datetime.strptime(inicio, FORMATO_DATA).date() if inicio else None
+        fim = datetime.strptime(fim, FORMATO_DATA).date() if fim else None
+    except ValueError:
+        raise ValueError('Parâmetros inicio e fim devem estar no formato YYYY-MM-DD')
+
+    if inicio and fim and fim < inicio:
+        raise ValueError('Parâmetro fim deve ser posterior a inicio')
+
+    return inicio, fim
+
+def filtrar_periodo(query, coluna, inicio, fim):
+    # Aplica o intervalo [inicio, fim] a uma coluna de data ou data/hora
+    if coluna.type.python_type is datetime:
+        if inicio:
+            query = query.filter(coluna >= datetime.combine(inicio, datetime.min.time()))
+        if fim:
+            query = query.filter(coluna < datetime.combine(fim + timedelta(days=1), datetime.min.time()))
+    else:
+        if inicio:
+            query = query.filter(coluna >= inicio)
+        if fim:
+            query = query.filter(coluna <= fim)
+    return query
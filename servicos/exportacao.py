@@ -0,0 +1,159 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from extensions import db
+from servicos.transmissao import resposta_em_stream
+
+# Linhas lidas do cursor do servidor por vez; no Parquet cada lote é um row group
+LINHAS_POR_LOTE = 5000
+
+FORMATOS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+def ler_opcoes_exportacao(args):
+    """Lê os parâmetros 'formato' (csv, ndjson ou parquet) e 'compressao' (gzip ou nenhuma).
+
+    Retorna (formato, comprimir) e lança ValueError se algum valor for
+    inválido. CSV e NDJSON são comprimidos com gzip por padrão; o Parquet já
+    é comprimido por coluna e nunca passa pelo gzip.
+    """
+    formato = args.get('formato', 'csv')
+    if formato not in FORMATOS:
+        raise ValueError('Formato inválido. Deve ser "csv", "ndjson" ou "parquet"')
+    
+    compressao = args.get('compressao', 'gzip')
+    if compressao not in ('gzip', 'nenhuma'):
+        raise ValueError('Compressão inválida. Deve ser "gzip" ou "nenhuma"')
+    
+    return formato, formato != 'parquet' and compressao == 'gzip'
+
+def parquet_disponivel():
+    # pyarrow está no requirements.txt; instalações sem ele respondem 501 ao formato Parquet
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def _lotes(consulta):
+    # yield_per abre um cursor no servidor (stream_results) no PostgreSQL:
+    # só um lote de linhas fica na memória por vez
+    resultado = db.session.execute(consulta.execution_options(yield_per=LINHAS_POR_LOTE))
+    try:
+        yield from resultado.partitions()
+    finally:
+        resultado.close()
+
+def _texto(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+def _csv(consulta, nomes):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(nomes)
+    
+    for lote in _lotes(consulta):
+        escritor.writerows([_texto(valor) for valor in linha] for linha in lote)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    
+    # Cabeçalho de uma exportação sem linhas
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def _ndjson(consulta, nomes):
+    for lote in _lotes(consulta):
+        yield ''.join(
+            json.dumps(dict(zip(nomes, map(_texto, linha))), ensure_ascii=False) + '\n'
+            for linha in lote
+        ).encode('utf-8')
+
+class _SaidaParquet:
+    # Destino do ParquetWriter: acumula apenas os bytes escritos desde o último envio
+    closed = False
+    
+    def __init__(self):
+        self.partes = []
+        self.posicao = 0
+    
+    def write(self, dados):
+        self.partes.append(bytes(dados))
+        self.posicao += len(dados)
+        return len(dados)
+    
+    def tell(self):
+        return self.posicao
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        self.closed = True
+    
+    def esvaziar(self):
+        dados = b''.join(self.partes)
+        self.partes = []
+        return dados
+
+def _parquet(consulta, nomes):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    tipos = {int: pa.int64(), str: pa.string(), datetime: pa.timestamp('us'), date: pa.date32()}
+    esquema = pa.schema([
+        (nome, tipos[coluna.type.python_type])
+        for nome, coluna in zip(nomes, consulta.selected_columns)
+    ])
+    
+    saida = _SaidaParquet()
+    escritor = pq.ParquetWriter(saida, esquema, compression='zstd')
+    for lote in _lotes(consulta):
+        colunas = list(zip(*lote))
+        escritor.write_batch(pa.record_batch(
+            [pa.array(valores, type=campo.type) for valores, campo in zip(colunas, esquema)],
+            schema=esquema
+        ))
+        yield saida.esvaziar()
+    
+    # Rodapé com os metadados dos row groups
+    escritor.close()
+    yield saida.esvaziar()
+
+def _gzip(partes):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for parte in partes:
+        dados = compressor.compress(parte)
+        if dados:
+            yield dados
+    yield compressor.flush()
+
+CODIFICADORES = {'csv': _csv, 'ndjson': _ndjson, 'parquet': _parquet}
+
+def exportar(consulta, formato, comprimir, nome_arquivo):
+    """Resposta que envia o resultado de um select em CSV, NDJSON ou Parquet.
+
+    As linhas são lidas em lotes de LINHAS_POR_LOTE, codificadas e, se
+    pedido, comprimidas com gzip à medida que a resposta é enviada: a memória
+    usada não depende do tamanho da exportação e nada é gravado em disco.
+    """
+    nomes = [coluna.name for coluna in consulta.selected_columns]
+    partes = CODIFICADORES[formato](consulta, nomes)
+    mimetype = FORMATOS[formato]
+    nome_arquivo = f'{nome_arquivo}.{formato}'
+    
+    if comprimir:
+        partes = _gzip(partes)
+        mimetype = 'application/gzip'
+        nome_arquivo += '.gz'
+    
+    resposta = resposta_em_stream(partes, mimetype)
+    resposta.headers['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
+    return resposta
@@ -0,0 +1,118 @@
+import hashlib
+import io
+import json
+import os
+import tempfile
+from servicos.processos import PoolProcessos
+
+# Alterar ao mudar o desenho dos gráficos, para não reaproveitar imagens antigas do disco
+VERSAO_GRAFICOS = 1
+
+FORMATOS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+# Desenho dos gráficos, executado no pool de processos
+def _barras(eixo, rotulos, valores, titulo):
+    eixo.bar(range(len(rotulos)), valores, color='#4c72b0')
+    eixo.set_xticks(range(len(rotulos)), rotulos, rotation=45 if len(rotulos) > 7 else 0, ha='right' if len(rotulos) > 7 else 'center')
+    eixo.set_title(titulo)
+    eixo.yaxis.get_major_locator().set_params(integer=True)
+
+def _renderizar(tipo, dados, formato):
+    import matplotlib
+    matplotlib.use('Agg')  # sem interface gráfica
+    from matplotlib.figure import Figure
+    
+    if tipo == 'agendamentos':
+        figura = Figure(figsize=(10, 4))
+        eixo_status, eixo_dias = figura.subplots(1, 2)
+        _barras(eixo_status, list(dados['por_status']), list(dados['por_status'].values()), 'Agendamentos por status')
+        _barras(eixo_dias, list(dados['por_dia_semana']), list(dados['por_dia_semana'].values()), 'Agendamentos por dia da semana')
+    else:
+        figura = Figure(figsize=(10, 4))
+        eixo = figura.subplots()
+        _barras(eixo, list(dados['por_mes']), list(dados['por_mes'].values()), 'Prontuários por mês')
+    figura.tight_layout()
+    
+    saida = io.BytesIO()
+    if formato == 'png':
+        # PNG gravado pelo Pillow com compressão otimizada
+        figura.savefig(saida, format='png', dpi=100, pil_kwargs={'optimize': True})
+    else:
+        figura.savefig(saida, format='svg', metadata={'Date': None})
+    return saida.getvalue()
+
+def chave_grafico(tipo, dados, formato):
+    # Hash do agregado: dados iguais geram sempre a mesma imagem (e o mesmo ETag)
+    conteudo = json.dumps([VERSAO_GRAFICOS, tipo, formato, dados], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+class _RenderizadorGraficos:
+    def __init__(self, diretorio, processos, max_arquivos):
+        self.diretorio = diretorio
+        self.max_arquivos = max_arquivos
+        self.pool = PoolProcessos(processos)
+    
+    def obter(self, chave, tipo, dados, formato):
+        caminho = os.path.join(self.diretorio, f'{chave}.{formato}')
+        try:
+            with open(caminho, 'rb') as arquivo:
+                conteudo = arquivo.read()
+            # Data de modificação = último uso, para a remoção dos menos usados
+            os.utime(caminho)
+            return conteudo
+        except FileNotFoundError:
+            pass
+        
+        conteudo = self.pool.executar(_renderizar, tipo, dados, formato)
+        
+        # Gravação atômica: requisições simultâneas nunca leem um arquivo incompleto
+        os.makedirs(self.diretorio, exist_ok=True)
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, suffix='.tmp')
+        with os.fdopen(descritor, 'wb') as arquivo:
+            arquivo.write(conteudo)
+        os.replace(temporario, caminho)
+        self._podar()
+        return conteudo
+    
+    def _podar(self):
+        # Imagens de dados antigos nunca são lidas de novo: acima do limite,
+        # as usadas há mais tempo são removidas (só a cada nova renderização)
+        arquivos = []
+        with os.scandir(self.diretorio) as entradas:
+            for entrada in entradas:
+                if os.path.splitext(entrada.name)[1][1:] in FORMATOS:
+                    try:
+                        arquivos.append((entrada.stat().st_mtime, entrada.path))
+                    except FileNotFoundError:
+                        pass
+        
+        if len(arquivos) <= self.max_arquivos:
+            return
+        
+        arquivos.sort()
+        for _, caminho in arquivos[:len(arquivos) - self.max_arquivos]:
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                # Removido por outra requisição ou outro worker
+                pass
+
+class ServicoGraficos:
+    """Gráficos das análises renderizados no servidor (PNG ou SVG).
+
+    A renderização (matplotlib, backend Agg) roda em um pool de processos e
+    o resultado fica em disco, com o nome dado pelo hash dos dados agregados:
+    enquanto os dados não mudam, a imagem nunca é renderizada de novo. O
+    mesmo hash é o ETag da resposta. Configuração (por ambiente):
+
+    - GRAFICOS_DIRETORIO: onde as imagens são guardadas
+    - GRAFICOS_POOL_PROCESSOS: processos do pool (0 renderiza na própria thread)
+    - GRAFICOS_MAX_ARQUIVOS: imagens mantidas em disco; acima disso, as usadas
+      há mais tempo são removidas
+    """
+    
+    def init_app(self, app):
+        app.extensions['graficos'] = _RenderizadorGraficos(
+            app.config['GRAFICOS_DIRETORIO'], app.config['GRAFICOS_POOL_PROCESSOS'],
+            app.config['GRAFICOS_MAX_ARQUIVOS']
+        )
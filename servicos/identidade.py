@@ -0,0 +1,72 @@
+from flask import g
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from extensions import db
+from models.psicologo import Psicologo
+from models.paciente import Paciente
+
+def claims_do_usuario(usuario):
+    """Claims adicionais do token: tipo do usuário e id do perfil correspondente.
+
+    Com o id do perfil no token, as rotas não precisam consultar psicologos ou
+    pacientes a cada requisição para descobrir quem é o usuário autenticado.
+    """
+    claims = {'tipo_usuario': usuario.tipo_usuario}
+    
+    if usuario.tipo_usuario == 'psicologo' and usuario.psicologo:
+        claims['psicologo_id'] = usuario.psicologo.id
+    elif usuario.tipo_usuario == 'paciente' and usuario.paciente:
+        claims['paciente_id'] = usuario.paciente.id
+    
+    return claims
+
+def _cache_do_token():
+    # Memo em g, separado por token: um mesmo contexto de aplicação pode atender
+    # requisições de usuários diferentes (ex.: contexto mantido pelo pytest-flask)
+    caches = g.setdefault('identidade', {})
+    return caches.setdefault(get_jwt().get('jti'), {})
+
+def _obter_perfil_id(claim, modelo, confirmar=False):
+    # Resolvido no máximo uma vez por requisição
+    cache = _cache_do_token()
+    if claim not in cache:
+        perfil_id = get_jwt().get(claim)
+        
+        # Tokens emitidos antes da claim existir: resolver pelo usuário
+        if perfil_id is None:
+            perfil_id = db.session.query(modelo.id).filter_by(usuario_id=get_jwt_identity()).scalar()
+            cache[f'{claim}_confirmado'] = perfil_id
+        
+        cache[claim] = perfil_id
+    
+    # Rotas de escrita confirmam no banco que o perfil do token ainda existe:
+    # o token continua válido depois que o perfil é excluído
+    chave_confirmado = f'{claim}_confirmado'
+    if confirmar and chave_confirmado not in cache:
+        perfil_id = cache[claim]
+        if perfil_id is not None:
+            perfil_id = db.session.query(modelo.id).filter_by(id=perfil_id, usuario_id=get_jwt_identity()).scalar()
+        cache[chave_confirmado] = perfil_id
+    
+    return cache[chave_confirmado] if confirmar else cache[claim]
+
+def obter_psicologo_id(confirmar=False):
+    return _obter_perfil_id('psicologo_id', Psicologo, confirmar)
+
+def obter_paciente_id(confirmar=False):
+    return _obter_perfil_id('paciente_id', Paciente, confirmar)
+
+def obter_psicologo():
+    # Perfil completo do psicólogo autenticado, carregado uma vez por requisição
+    cache = _cache_do_token()
+    if 'psicologo' not in cache:
+        psicologo_id = obter_psicologo_id()
+        cache['psicologo'] = db.session.get(Psicologo, psicologo_id) if psicologo_id else None
+    return cache['psicologo']
+
+def obter_paciente():
+    # Perfil completo do paciente autenticado, carregado uma vez por requisição
+    cache = _cache_do_token()
+    if 'paciente' not in cache:
+        paciente_id = obter_paciente_id()
+        cache['paciente'] = db.session.get(Paciente, paciente_id) if paciente_id else None
+    return cache['paciente']
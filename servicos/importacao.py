@@ -0,0 +1,218 @@
+import os
+import click
+import pandas as pd
+from sqlalchemy import insert, select, or_
+from sqlalchemy.exc import IntegrityError
+from extensions import db, senhas
+from models.usuario import Usuario
+from models.paciente import Paciente
+
+# Linhas lidas, validadas e gravadas por transação
+LINHAS_POR_BLOCO = 1000
+
+CAMPOS = ('nome_usuario', 'email', 'nome', 'telefone', 'senha')
+CAMPOS_OBRIGATORIOS = ('nome_usuario', 'email', 'nome', 'senha')
+
+# Tamanhos máximos das colunas da tabela usuarios
+TAMANHOS = {'nome_usuario': 64, 'email': 120, 'nome': 120, 'telefone': 20}
+
+class ArquivoImportacaoInvalido(ValueError):
+    pass
+
+def xlsx_disponivel():
+    # openpyxl está no requirements.txt; instalações sem ele recusam planilhas XLSX
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def _celula(valor):
+    # Números inteiros lidos da planilha como float (ex.: telefones) voltam a ser texto sem ".0"
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+def _blocos_csv(arquivo, tamanho):
+    try:
+        yield from pd.read_csv(
+            arquivo, dtype=str, keep_default_na=False, encoding='utf-8-sig', chunksize=tamanho
+        )
+    except pd.errors.EmptyDataError:
+        raise ArquivoImportacaoInvalido('Arquivo vazio')
+
+def _blocos_xlsx(arquivo, tamanho):
+    from openpyxl import load_workbook
+    
+    # Modo somente leitura: as linhas são lidas da planilha sob demanda
+    planilha = load_workbook(arquivo, read_only=True, data_only=True).active
+    linhas = planilha.iter_rows(values_only=True)
+    cabecalho = [_celula(valor).strip() for valor in next(linhas, ())]
+    if not cabecalho:
+        raise ArquivoImportacaoInvalido('Arquivo vazio')
+    
+    bloco = []
+    for linha in linhas:
+        valores = [_celula(valor) for valor in linha[:len(cabecalho)]]
+        bloco.append(valores + [''] * (len(cabecalho) - len(valores)))
+        if len(bloco) == tamanho:
+            yield pd.DataFrame(bloco, columns=cabecalho)
+            bloco = []
+    
+    if bloco:
+        yield pd.DataFrame(bloco, columns=cabecalho)
+
+def _validar(dados):
+    for campo in CAMPOS_OBRIGATORIOS:
+        if not dados[campo]:
+            return f'Campo {campo} é obrigatório'
+    
+    for campo, tamanho in TAMANHOS.items():
+        if len(dados[campo]) > tamanho:
+            return f'Campo {campo} deve ter no máximo {tamanho} caracteres'
+    
+    return None
+
+def _importar_bloco(bloco, primeira_linha, relatorio):
+    erros = relatorio['erros']
+    
+    # Validação de formato, linha a linha, sem acessar o banco
+    validas = []
+    for posicao, registro in enumerate(bloco.to_dict('records')):
+        dados = {campo: str(registro.get(campo) or '').strip() for campo in CAMPOS}
+        erro = _validar(dados)
+        if erro:
+            erros.append({'linha': primeira_linha + posicao, 'mensagem': erro})
+        else:
+            validas.append((primeira_linha + posicao, dados))
+    
+    if not validas:
+        return
+    
+    # Uma consulta por bloco para os nomes de usuário e emails já cadastrados
+    nomes_existentes = set()
+    emails_existentes = set()
+    for nome_usuario, email in db.session.execute(
+        select(Usuario.nome_usuario, Usuario.email).where(or_(
+            Usuario.nome_usuario.in_({dados['nome_usuario'] for _, dados in validas}),
+            Usuario.email.in_({dados['email'] for _, dados in validas})
+        ))
+    ):
+        nomes_existentes.add(nome_usuario)
+        emails_existentes.add(email)
+    
+    inserir = []
+    nomes_no_arquivo = set()
+    emails_no_arquivo = set()
+    for linha, dados in validas:
+        if dados['nome_usuario'] in nomes_existentes:
+            erro = 'Nome de usuário já existe'
+        elif dados['email'] in emails_existentes:
+            erro = 'Email já está em uso'
+        elif dados['nome_usuario'] in nomes_no_arquivo or dados['email'] in emails_no_arquivo:
+            erro = 'Nome de usuário ou email repetido no arquivo'
+        else:
+            erro = None
+            nomes_no_arquivo.add(dados['nome_usuario'])
+            emails_no_arquivo.add(dados['email'])
+            inserir.append((linha, dados))
+        
+        if erro:
+            erros.append({'linha': linha, 'mensagem': erro})
+    
+    if not inserir:
+        return
+    
+    # PBKDF2 de todo o bloco calculado em paralelo no pool de processos
+    hashes = senhas.gerar_hashes([dados['senha'] for _, dados in inserir])
+    
+    # Usuários e pacientes em duas instruções (executemany) e um commit por bloco
+    try:
+        db.session.execute(insert(Usuario), [
+            {
+                'nome_usuario': dados['nome_usuario'],
+                'email': dados['email'],
+                'nome': dados['nome'],
+                'telefone': dados['telefone'] or None,
+                'tipo_usuario': 'paciente',
+                'senha_hash': senha_hash
+            }
+            for (_, dados), senha_hash in zip(inserir, hashes)
+        ])
+        
+        # Ids gerados, lidos pelo nome de usuário (único)
+        usuarios_ids = db.session.scalars(
+            select(Usuario.id).where(Usuario.nome_usuario.in_([dados['nome_usuario'] for _, dados in inserir]))
+        ).all()
+        db.session.execute(insert(Paciente), [{'usuario_id': usuario_id} for usuario_id in usuarios_ids])
+        db.session.commit()
+    except IntegrityError:
+        # Cadastro concorrente com o mesmo nome de usuário ou email: o bloco é descartado
+        db.session.rollback()
+        erros.extend({'linha': linha, 'mensagem': 'Nome de usuário ou email já está em uso'} for linha, _ in inserir)
+        return
+    
+    relatorio['importados'] += len(inserir)
+
+def importar_pacientes(arquivo, nome_arquivo, linhas_por_bloco=None):
+    """Importa pacientes de um arquivo CSV ou XLSX e retorna o relatório da importação.
+
+    O arquivo deve ter as colunas nome_usuario, email, nome e senha (telefone
+    é opcional). Cada bloco de linhas é validado, comparado com os usuários
+    já cadastrados em uma única consulta e gravado em uma transação própria:
+    um erro em uma linha não impede a importação das demais. Os erros são
+    listados com o número da linha no arquivo (o cabeçalho é a linha 1).
+    """
+    extensao = os.path.splitext(nome_arquivo or '')[1].lower()
+    linhas_por_bloco = linhas_por_bloco or LINHAS_POR_BLOCO
+    if extensao == '.csv':
+        blocos = _blocos_csv(arquivo, linhas_por_bloco)
+    elif extensao == '.xlsx':
+        blocos = _blocos_xlsx(arquivo, linhas_por_bloco)
+    else:
+        raise ArquivoImportacaoInvalido('Arquivo deve estar no formato CSV ou XLSX')
+    
+    relatorio = {'linhas': 0, 'importados': 0, 'erros': []}
+    try:
+        for bloco in blocos:
+            faltantes = [campo for campo in CAMPOS_OBRIGATORIOS if campo not in bloco.columns]
+            if faltantes:
+                raise ArquivoImportacaoInvalido(f'Colunas obrigatórias ausentes: {", ".join(faltantes)}')
+            
+            _importar_bloco(bloco, relatorio['linhas'] + 2, relatorio)
+            relatorio['linhas'] += len(bloco)
+    except (pd.errors.ParserError, UnicodeDecodeError) as erro:
+        # Os blocos anteriores já foram gravados; a leitura para na linha com problema
+        relatorio['erros'].append({
+            'linha': relatorio['linhas'] + 2,
+            'mensagem': f'Leitura do arquivo interrompida: {erro}'
+        })
+    
+    relatorio['erros'].sort(key=lambda erro: erro['linha'])
+    return relatorio
+
+class ImportacaoPacientes:
+    """Comando 'flask importar-pacientes ARQUIVO' para a carga inicial de pacientes.
+
+    O mesmo processo é usado pelo endpoint POST /api/users/pacientes/importar.
+    """
+    
+    def init_app(self, app):
+        @app.cli.command('importar-pacientes')
+        @click.argument('arquivo', type=click.Path(exists=True, dir_okay=False))
+        @click.option('--bloco', default=LINHAS_POR_BLOCO, show_default=True, help='Linhas por transação')
+        def importar(arquivo, bloco):
+            """Importa pacientes de um arquivo CSV ou XLSX."""
+            if arquivo.lower().endswith('.xlsx') and not xlsx_disponivel():
+                raise click.ClickException('Importação de XLSX requer o pacote openpyxl')
+            
+            try:
+                relatorio = importar_pacientes(arquivo, arquivo, bloco)
+            except ArquivoImportacaoInvalido as erro:
+                raise click.ClickException(str(erro))
+            
+            for erro in relatorio['erros']:
+                click.echo(f"Linha {erro['linha']}: {erro['mensagem']}", err=True)
+            click.echo(f"{relatorio['importados']} de {relatorio['linhas']} pacientes importados")
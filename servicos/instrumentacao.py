@@ -0,0 +1,127 @@
+import heapq
+import json
+import logging
+import time
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from extensions import db
+
+logger = logging.getLogger(__name__)
+
+# Tamanho máximo do SQL de cada consulta na linha de log da requisição
+TAMANHO_SQL_LOG = 200
+
+def _sql(statement):
+    return ' '.join(statement.split())
+
+def _tipos(parametros):
+    # Apenas nomes e tipos: os valores podem conter dados de pacientes
+    if isinstance(parametros, dict):
+        return {nome: type(valor).__name__ for nome, valor in parametros.items()}
+    if isinstance(parametros, (list, tuple)):
+        return [type(valor).__name__ for valor in parametros]
+    return type(parametros).__name__
+
+def formato_parametros(parametros, executemany=False):
+    """Formato dos parâmetros de uma instrução, sem os valores.
+
+    Ex.: {'id_1': 'int', 'data_1': 'date'}; no executemany, a quantidade de
+    linhas e o formato da primeira: {'linhas': 500, 'formato': [...]}.
+    """
+    if executemany:
+        return {'linhas': len(parametros), 'formato': _tipos(parametros[0]) if parametros else None}
+    return _tipos(parametros)
+
+def _antes_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('inicio_consultas', []).append(time.perf_counter())
+
+def _consulta_com_erro(contexto_excecao):
+    # A consulta com erro não chega ao after_cursor_execute
+    inicios = contexto_excecao.connection.info.get('inicio_consultas') if contexto_excecao.connection else None
+    if inicios:
+        inicios.pop()
+
+class InstrumentacaoSQL:
+    """Consultas SQL por requisição: quantidade, tempo no banco e as mais lentas.
+
+    Configuração (por ambiente):
+
+    - SQL_INSTRUMENTACAO: ativa a instrumentação (desativada por padrão;
+      desativada, nenhum evento é registrado)
+    - SQL_CONSULTA_LENTA_MS: consultas a partir deste tempo são registradas
+      no log (WARNING) com o SQL e o formato dos parâmetros, sem os valores
+    - SQL_MAIS_LENTAS: quantidade de consultas mais lentas no log da requisição
+
+    Cada resposta recebe o cabeçalho Server-Timing (db e app) e cada
+    requisição gera uma linha de log JSON (INFO) no logger
+    'servicos.instrumentacao'. Em respostas em stream, as consultas feitas
+    durante o envio do corpo não entram na contagem.
+    """
+    
+    def init_app(self, app):
+        if not app.config['SQL_INSTRUMENTACAO']:
+            return
+        
+        self.consulta_lenta = app.config['SQL_CONSULTA_LENTA_MS'] / 1000
+        self.mais_lentas = app.config['SQL_MAIS_LENTAS']
+        app.extensions['instrumentacao_sql'] = self
+        
+        with app.app_context():
+            engines = list(db.engines.values())
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', _antes_da_consulta)
+            event.listen(engine, 'after_cursor_execute', self._depois_da_consulta)
+            event.listen(engine, 'handle_error', _consulta_com_erro)
+        
+        app.before_request(self._iniciar_requisicao)
+        app.after_request(self._finalizar_requisicao)
+    
+    def _depois_da_consulta(self, conn, cursor, statement, parameters, context, executemany):
+        duracao = time.perf_counter() - conn.info['inicio_consultas'].pop()
+        
+        if duracao >= self.consulta_lenta:
+            logger.warning('Consulta lenta (%.1f ms): %s | parâmetros: %s', duracao * 1000, _sql(statement),
+                           json.dumps(formato_parametros(parameters, executemany), ensure_ascii=False))
+        
+        # Consultas fora de uma requisição (comandos CLI, inicialização) não são contadas
+        estatisticas = g.get('estatisticas_sql') if has_request_context() else None
+        if estatisticas is None:
+            return
+        
+        estatisticas['consultas'] += 1
+        estatisticas['tempo'] += duracao
+        
+        # Heap com as N consultas mais lentas da requisição
+        mais_lentas = estatisticas['mais_lentas']
+        if len(mais_lentas) < self.mais_lentas:
+            heapq.heappush(mais_lentas, (duracao, statement))
+        elif self.mais_lentas and duracao > mais_lentas[0][0]:
+            heapq.heapreplace(mais_lentas, (duracao, statement))
+    
+    def _iniciar_requisicao(self):
+        g.estatisticas_sql = {'inicio': time.perf_counter(), 'consultas': 0, 'tempo': 0.0, 'mais_lentas': []}
+    
+    def _finalizar_requisicao(self, resposta):
+        estatisticas = g.pop('estatisticas_sql', None)
+        if estatisticas is None:
+            return resposta
+        
+        tempo_db = estatisticas['tempo'] * 1000
+        tempo_total = (time.perf_counter() - estatisticas['inicio']) * 1000
+        resposta.headers.add(
+            'Server-Timing', f'db;dur={tempo_db:.2f};desc="{estatisticas["consultas"]} consultas", app;dur={tempo_total:.2f}'
+        )
+        
+        logger.info(json.dumps({
+            'metodo': request.method,
+            'rota': request.url_rule.rule if request.url_rule else request.path,
+            'status': resposta.status_code,
+            'consultas': estatisticas['consultas'],
+            'tempo_db_ms': round(tempo_db, 2),
+            'tempo_total_ms': round(tempo_total, 2),
+            'mais_lentas': [
+                {'ms': round(duracao * 1000, 2), 'sql': _sql(statement)[:TAMANHO_SQL_LOG]}
+                for duracao, statement in sorted(estatisticas['mais_lentas'], reverse=True)
+            ]
+        }, ensure_ascii=False))
+        return resposta
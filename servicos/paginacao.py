@@ -0,0 +1,85 @@
+import base64
+import json
+from datetime import datetime, date
+from sqlalchemy import tuple_
+
+# Limites aceitos para o parâmetro 'limit'
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 500
+
+class ParametroPaginacaoInvalido(ValueError):
+    pass
+
+def paginacao_solicitada(args):
+    # A paginação é ativada quando o cliente informa 'limit' ou 'cursor'
+    return 'limit' in args or 'cursor' in args
+
+def codificar_cursor(valores):
+    # Cursor opaco: valores da chave de ordenação do último item, em base64
+    valores = [v.isoformat() if isinstance(v, (datetime, date)) else v for v in valores]
+    texto = json.dumps(valores, separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decodificar_cursor(cursor, tipos):
+    # 'tipos': tipo Python de cada valor da chave (ex.: (datetime, int))
+    try:
+        preenchimento = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+    except (ValueError, TypeError):
+        raise ParametroPaginacaoInvalido('Cursor inválido')
+
+    if not isinstance(valores, list) or len(valores) != len(tipos):
+        raise ParametroPaginacaoInvalido('Cursor inválido')
+
+    # Datas voltam ao tipo da coluna para que a comparação seja feita pelo banco
+    try:
+        for i, tipo in enumerate(tipos):
+            if tipo is datetime:
+                valores[i] = datetime.fromisoformat(valores[i])
+            elif tipo is date:
+                valores[i] = date.fromisoformat(valores[i])
+            elif tipo is int and (not isinstance(valores[i], int) or isinstance(valores[i], bool)):
+                raise ValueError(valores[i])
+    except (TypeError, ValueError):
+        raise ParametroPaginacaoInvalido('Cursor inválido')
+
+    return valores
+
+def obter_limite(args):
+    limite = args.get('limit', LIMITE_PADRAO)
+    try:
+        limite = int(limite)
+    except (TypeError, ValueError):
+        raise ParametroPaginacaoInvalido('Parâmetro limit deve ser um número inteiro')
+
+    if limite < 1 or limite > LIMITE_MAXIMO:
+        raise ParametroPaginacaoInvalido(f'Parâmetro limit deve estar entre 1 e {LIMITE_MAXIMO}')
+
+    return limite
+
+def paginar(query, colunas, args):
+    """Aplica paginação por chave (keyset) à consulta.
+
+    As linhas são ordenadas pelas colunas informadas (a última deve ser única,
+    normalmente o id) e a página seguinte começa estritamente depois da chave
+    do último item entregue. Assim o custo de qualquer página é o mesmo da
+    primeira e inserções concorrentes não duplicam nem pulam itens.
+
+    Retorna a lista de itens e o cursor da próxima página (ou None).
+    """
+    limite = obter_limite(args)
+
+    cursor = args.get('cursor')
+    if cursor:
+        valores = decodificar_cursor(cursor, [coluna.type.python_type for coluna in colunas])
+        query = query.filter(tuple_(*colunas) > tuple_(*valores))
+
+    itens = query.order_by(*colunas).limit(limite + 1).all()
+
+    proximo_cursor = None
+    if len(itens) > limite:
+        itens = itens[:limite]
+        ultimo = itens[-1]
+        proximo_cursor = codificar_cursor(getattr(ultimo, coluna.key) for coluna in colunas)
+
+    return itens, proximo_cursor
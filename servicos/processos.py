@@ -0,0 +1,49 @@
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+class PoolProcessos:
+    """Pool de processos para trabalho de CPU fora das threads de requisição.
+
+    O pool é criado sob demanda, com o contexto 'spawn', para não herdar
+    threads e conexões do processo web; por isso as funções enviadas a ele
+    precisam ser importáveis (definidas no nível de um módulo). Com 0
+    processos, as funções rodam na própria thread. Os processos são
+    encerrados por encerrar() ou, no máximo, na saída do interpretador.
+    """
+    
+    def __init__(self, processos):
+        self.processos = processos
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    def _obter_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processos,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                atexit.register(self.encerrar)
+            return self._executor
+    
+    def executar(self, funcao, *args):
+        if not self.processos:
+            return funcao(*args)
+        return self._obter_executor().submit(funcao, *args).result()
+    
+    def mapear(self, funcao, *iteraveis):
+        # As tarefas são divididas em partes entre os processos do pool
+        if not self.processos:
+            return list(map(funcao, *iteraveis))
+        iteraveis = [list(iteravel) for iteravel in iteraveis]
+        partes = max(1, len(iteraveis[0]) // (self.processos * 4))
+        return list(self._obter_executor().map(funcao, *iteraveis, chunksize=partes))
+    
+    def encerrar(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+                atexit.unregister(self.encerrar)
@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+from extensions import db
+from models.agendamento import Agendamento
+from models.prontuario_medico import ProntuarioMedico
+from servicos.datas import filtrar_periodo
+
+DIAS_SEMANA = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
+
+def carregar_dados(psicologo_id, inicio=None, fim=None):
+    """Agendamentos e prontuários do psicólogo no período, como DataFrames.
+    
+    Uma leitura SQL por tabela, apenas com as colunas usadas nos relatórios.
+    """
+    query = db.session.query(
+        Agendamento.inicio, Agendamento.status, Agendamento.paciente_id
+    ).filter(Agendamento.psicologo_id == psicologo_id)
+    query = filtrar_periodo(query, Agendamento.inicio, inicio, fim)
+    agendamentos = pd.read_sql(query.statement, db.session.connection())
+    agendamentos['inicio'] = pd.to_datetime(agendamentos['inicio'])
+    
+    query = db.session.query(ProntuarioMedico.data).filter(ProntuarioMedico.psicologo_id == psicologo_id)
+    query = filtrar_periodo(query, ProntuarioMedico.data, inicio, fim)
+    prontuarios = pd.read_sql(query.statement, db.session.connection())
+    prontuarios['data'] = pd.to_datetime(prontuarios['data'])
+    
+    return agendamentos, prontuarios
+
+def taxa_comparecimento_movel(agendamentos, janela_dias):
+    # Concluídos / (concluídos + cancelados) nos 'janela_dias' dias até cada data
+    if agendamentos.empty:
+        return []
+    
+    dias = agendamentos['inicio'].to_numpy().astype('datetime64[D]')
+    primeiro = dias.min()
+    indices = (dias - primeiro).astype(np.int64)
+    total_dias = int(indices.max()) + 1
+    
+    # Contagens diárias e somas acumuladas: a janela é a diferença entre duas posições
+    status = agendamentos['status'].to_numpy()
+    acumulados = []
+    for valor in ('concluído', 'cancelado'):
+        por_dia = np.bincount(indices, weights=status == valor, minlength=total_dias)
+        soma = np.concatenate(([0], np.cumsum(por_dia)))
+        inicio_janela = np.maximum(np.arange(1, total_dias + 1) - janela_dias, 0)
+        acumulados.append(soma[1:] - soma[inicio_janela])
+    concluidos, cancelados = acumulados
+    
+    passados = concluidos + cancelados
+    with np.errstate(invalid='ignore', divide='ignore'):
+        taxas = np.round(concluidos / passados * 100, 2)
+    
+    datas = np.datetime_as_string(primeiro + np.arange(total_dias), unit='D')
+    return [
+        {'data': data, 'taxa': taxa if total else None}
+        for data, taxa, total in zip(datas.tolist(), taxas.tolist(), passados.tolist())
+    ]
+
+def ocupacao_semana_hora(agendamentos):
+    # Matriz 7 × 24 (dia da semana × hora de início); só as horas com agendamentos
+    datas = agendamentos['inicio'].dt
+    ocupacao = np.bincount(
+        (datas.weekday * 24 + datas.hour).to_numpy(dtype=np.int64), minlength=7 * 24
+    ).reshape(7, 24)
+    
+    horas = np.flatnonzero(ocupacao.sum(axis=0))
+    return {
+        dia: {f'{hora:02d}:00': int(ocupacao[indice, hora]) for hora in horas}
+        for indice, dia in enumerate(DIAS_SEMANA)
+    }
+
+def volume_mensal(agendamentos, prontuarios):
+    # Agendamentos e prontuários por mês, com a variação percentual de agendamentos
+    volume = pd.concat([
+        agendamentos['inicio'].dt.to_period('M').value_counts().rename('agendamentos'),
+        prontuarios['data'].dt.to_period('M').value_counts().rename('prontuarios')
+    ], axis=1).fillna(0).astype(int).sort_index()
+    
+    if volume.empty:
+        return []
+    
+    volume = volume.reindex(pd.period_range(volume.index.min(), volume.index.max(), freq='M'), fill_value=0)
+    anterior = volume['agendamentos'].shift(1)
+    variacao = ((volume['agendamentos'] - anterior) / anterior.where(anterior > 0) * 100).round(2)
+    
+    return [
+        {
+            'mes': mes,
+            'agendamentos': agendamentos_mes,
+            'prontuarios': prontuarios_mes,
+            'variacao_agendamentos': None if np.isnan(taxa) else taxa
+        }
+        for mes, agendamentos_mes, prontuarios_mes, taxa in zip(
+            volume.index.strftime('%Y-%m'), volume['agendamentos'].tolist(),
+            volume['prontuarios'].tolist(), variacao.tolist()
+        )
+    ]
+
+def cadencia_pacientes(agendamentos):
+    # Intervalo médio, em dias, entre sessões não canceladas de cada paciente
+    sessoes = agendamentos['status'].to_numpy() != 'cancelado'
+    pacientes = agendamentos['paciente_id'].to_numpy()[sessoes]
+    momentos = agendamentos['inicio'].to_numpy()[sessoes].astype('datetime64[s]').astype(np.int64)
+    if not len(pacientes):
+        return []
+    
+    # Ordenadas por paciente e data; intervalos só entre sessões do mesmo paciente
+    ordem = np.lexsort((momentos, pacientes))
+    pacientes, momentos = pacientes[ordem], momentos[ordem]
+    mesmo_paciente = pacientes[1:] == pacientes[:-1]
+    
+    ids, posicoes, totais = np.unique(pacientes, return_inverse=True, return_counts=True)
+    soma_intervalos = np.bincount(
+        posicoes[1:][mesmo_paciente], weights=np.diff(momentos)[mesmo_paciente] / 86400, minlength=len(ids)
+    )
+    
+    return [
+        {
+            'paciente_id': paciente_id,
+            'sessoes': total,
+            'intervalo_medio_dias': round(soma / (total - 1), 2) if total > 1 else None
+        }
+        for paciente_id, total, soma in zip(ids.tolist(), totais.tolist(), soma_intervalos.tolist())
+    ]
+
+def gerar_relatorios(agendamentos, prontuarios, janela_dias=30):
+    return {
+        'taxa_comparecimento_movel': {
+            'janela_dias': janela_dias,
+            'serie': taxa_comparecimento_movel(agendamentos, janela_dias)
+        },
+        'ocupacao_semana_hora': ocupacao_semana_hora(agendamentos),
+        'volume_mensal': volume_mensal(agendamentos, prontuarios),
+        'cadencia_pacientes': cadencia_pacientes(agendamentos)
+    }
@@ -0,0 +1,192 @@
+from collections import Counter
+import click
+from sqlalchemy import event, func, cast, Date, delete, insert, select, inspect, update
+from sqlalchemy.dialects import sqlite, postgresql
+from sqlalchemy.orm import object_session
+from extensions import db
+from models.agendamento import Agendamento
+from models.prontuario_medico import ProntuarioMedico
+from models.resumo_analitico import ResumoAgendamentosDia, ResumoAgendamentosPaciente, ResumoProntuariosMes
+
+# Chaves de cada tabela de resumo, além da coluna 'total'
+CHAVES_RESUMO = {
+    ResumoAgendamentosDia: ('psicologo_id', 'dia', 'status'),
+    ResumoAgendamentosPaciente: ('psicologo_id', 'paciente_id', 'status'),
+    ResumoProntuariosMes: ('psicologo_id', 'paciente_id', 'mes'),
+}
+
+# Dia (data) de uma coluna de data/hora calculado no banco
+def dia_sql(coluna):
+    if db.engine.dialect.name == 'sqlite':
+        return func.date(coluna)
+    return cast(coluna, Date)
+
+# Mês no formato YYYY-MM calculado no banco
+def mes_sql(coluna):
+    if db.engine.dialect.name == 'sqlite':
+        return func.strftime('%Y-%m', coluna)
+    return func.to_char(coluna, 'YYYY-MM')
+
+def deltas_agendamento(linha, sinal=1):
+    # Contribuição de um agendamento (objeto ou dicionário de colunas) para os resumos
+    valor = linha.get if isinstance(linha, dict) else lambda campo: getattr(linha, campo)
+    return {
+        (ResumoAgendamentosDia, (valor('psicologo_id'), valor('inicio').date(), valor('status'))): sinal,
+        (ResumoAgendamentosPaciente, (valor('psicologo_id'), valor('paciente_id'), valor('status'))): sinal,
+    }
+
+def deltas_prontuario(linha, sinal=1):
+    valor = linha.get if isinstance(linha, dict) else lambda campo: getattr(linha, campo)
+    return {
+        (ResumoProntuariosMes, (valor('psicologo_id'), valor('paciente_id'), valor('data').strftime('%Y-%m'))): sinal,
+    }
+
+class _ValoresAnteriores:
+    # Valores do objeto antes das alterações ainda não gravadas
+    def __init__(self, objeto):
+        self._estado = inspect(objeto)
+    
+    def __getattr__(self, campo):
+        historico = self._estado.attrs[campo].history
+        if historico.deleted:
+            return historico.deleted[0]
+        return self._estado.attrs[campo].value
+
+def aplicar_deltas(conexao, deltas):
+    """Soma os deltas ({(tabela, chave): delta}) às tabelas de resumo.
+    
+    Uma instrução (executemany) por tabela, independente do número de linhas.
+    Linhas que chegam a zero são mantidas; as consultas filtram total > 0.
+    """
+    por_tabela = {}
+    for (modelo, chave), delta in deltas.items():
+        if delta:
+            valores = dict(zip(CHAVES_RESUMO[modelo], chave), total=delta)
+            por_tabela.setdefault(modelo, []).append(valores)
+    
+    for modelo, linhas in por_tabela.items():
+        tabela = modelo.__table__
+        dialeto = conexao.dialect.name
+        
+        if dialeto in ('sqlite', 'postgresql'):
+            modulo = sqlite if dialeto == 'sqlite' else postgresql
+            instrucao = modulo.insert(tabela)
+            instrucao = instrucao.on_conflict_do_update(
+                index_elements=list(CHAVES_RESUMO[modelo]),
+                set_={'total': tabela.c.total + instrucao.excluded.total}
+            )
+            conexao.execute(instrucao, linhas)
+            continue
+        
+        # Demais bancos: atualiza e insere as chaves que ainda não existem
+        for valores in linhas:
+            filtro = [tabela.c[campo] == valores[campo] for campo in CHAVES_RESUMO[modelo]]
+            resultado = conexao.execute(
+                update(tabela).where(*filtro).values(total=tabela.c.total + valores['total'])
+            )
+            if not resultado.rowcount:
+                conexao.execute(insert(tabela), valores)
+
+def marcar_psicologos_alterados(sessao, deltas):
+    # Psicólogos cujas análises mudam com a transação, para o cache das análises
+    sessao.info.setdefault('psicologos_alterados', set()).update(chave[0] for _, chave in deltas)
+
+def registrar_agendamentos_inseridos(linhas):
+    # Para inserções em massa (Core), que não passam pelos eventos do ORM
+    deltas = Counter()
+    for linha in linhas:
+        deltas.update(deltas_agendamento(linha))
+    aplicar_deltas(db.session.connection(), deltas)
+    marcar_psicologos_alterados(db.session, deltas)
+
+def reconstruir(conexao):
+    # Recalcula todos os resumos a partir das tabelas de agendamentos e prontuários
+    for modelo in CHAVES_RESUMO:
+        conexao.execute(delete(modelo.__table__))
+    
+    dia = dia_sql(Agendamento.inicio)
+    conexao.execute(insert(ResumoAgendamentosDia.__table__).from_select(
+        ['psicologo_id', 'dia', 'status', 'total'],
+        select(Agendamento.psicologo_id, dia, Agendamento.status, func.count(Agendamento.id))
+        .group_by(Agendamento.psicologo_id, dia, Agendamento.status)
+    ))
+    
+    conexao.execute(insert(ResumoAgendamentosPaciente.__table__).from_select(
+        ['psicologo_id', 'paciente_id', 'status', 'total'],
+        select(Agendamento.psicologo_id, Agendamento.paciente_id, Agendamento.status, func.count(Agendamento.id))
+        .group_by(Agendamento.psicologo_id, Agendamento.paciente_id, Agendamento.status)
+    ))
+    
+    mes = mes_sql(ProntuarioMedico.data)
+    conexao.execute(insert(ResumoProntuariosMes.__table__).from_select(
+        ['psicologo_id', 'paciente_id', 'mes', 'total'],
+        select(ProntuarioMedico.psicologo_id, ProntuarioMedico.paciente_id, mes, func.count(ProntuarioMedico.id))
+        .group_by(ProntuarioMedico.psicologo_id, ProntuarioMedico.paciente_id, mes)
+    ))
+
+def _pendentes(objeto):
+    return object_session(objeto).info.setdefault('resumos_pendentes', Counter())
+
+def _campos_alterados(objeto, campos):
+    estado = inspect(objeto)
+    return any(estado.attrs[campo].history.has_changes() for campo in campos)
+
+def _registrar_eventos(modelo, calcular_deltas, campos):
+    # As alterações de cada linha (inclusive exclusões em cascata) são acumuladas
+    # durante o flush e gravadas de uma vez ao final dele, na mesma transação
+    @event.listens_for(modelo, 'after_insert')
+    def inserido(mapper, conexao, objeto):
+        _pendentes(objeto).update(calcular_deltas(objeto))
+    
+    @event.listens_for(modelo, 'after_update')
+    def atualizado(mapper, conexao, objeto):
+        if _campos_alterados(objeto, campos):
+            pendentes = _pendentes(objeto)
+            pendentes.update(calcular_deltas(_ValoresAnteriores(objeto), -1))
+            pendentes.update(calcular_deltas(objeto))
+    
+    @event.listens_for(modelo, 'after_delete')
+    def excluido(mapper, conexao, objeto):
+        _pendentes(objeto).update(calcular_deltas(_ValoresAnteriores(objeto), -1))
+
+def _gravar_pendentes(sessao, contexto):
+    pendentes = sessao.info.pop('resumos_pendentes', None)
+    if pendentes:
+        aplicar_deltas(sessao.connection(), pendentes)
+        marcar_psicologos_alterados(sessao, pendentes)
+
+def _descartar_pendentes(sessao, *args):
+    sessao.info.pop('resumos_pendentes', None)
+    sessao.info.pop('psicologos_alterados', None)
+
+class ResumosAnaliticos:
+    """Mantém as tabelas de resumo usadas pelas análises.
+    
+    Agendamentos e prontuários criados, alterados ou excluídos pelo ORM
+    atualizam os resumos no mesmo flush (e portanto na mesma transação);
+    inserções em massa devem chamar registrar_agendamentos_inseridos. O
+    comando 'flask reconstruir-resumos' recalcula tudo a partir das tabelas
+    de origem, para carga inicial ou correção de divergências.
+    """
+    
+    _eventos_registrados = False
+    
+    def init_app(self, app):
+        if not ResumosAnaliticos._eventos_registrados:
+            _registrar_eventos(Agendamento, deltas_agendamento, ('psicologo_id', 'paciente_id', 'inicio', 'status'))
+            _registrar_eventos(ProntuarioMedico, deltas_prontuario, ('psicologo_id', 'paciente_id', 'data'))
+            event.listen(db.session, 'after_flush', _gravar_pendentes)
+            event.listen(db.session, 'after_rollback', _descartar_pendentes)
+            ResumosAnaliticos._eventos_registrados = True
+        
+        @app.cli.command('reconstruir-resumos')
+        def reconstruir_resumos():
+            """Recalcula as tabelas de resumo das análises."""
+            reconstruir(db.session.connection())
+            db.session.commit()
+            
+            # Resultados calculados com os resumos antigos deixam de valer
+            cache = app.extensions.get('cache_analises')
+            if cache:
+                cache.limpar()
+            click.echo('Resumos reconstruídos com sucesso')
@@ -0,0 +1,102 @@
+import os
+import threading
+from flask import current_app, has_app_context
+from passlib.hash import pbkdf2_sha256
+from servicos.processos import PoolProcessos
+
+class ServicoSenhasIndisponivel(Exception):
+    pass
+
+# Cálculos enviados ao pool de processos
+def _gerar_hash(senha, rounds):
+    return pbkdf2_sha256.using(rounds=rounds).hash(senha)
+
+def _verificar(senha, senha_hash):
+    return pbkdf2_sha256.verify(senha, senha_hash)
+
+class _PoolSenhas(PoolProcessos):
+    def __init__(self, processos, max_concorrencia, timeout_fila):
+        super().__init__(processos)
+        self.timeout_fila = timeout_fila
+        self._vagas = threading.BoundedSemaphore(max_concorrencia)
+    
+    def executar(self, funcao, *args):
+        # Limita quantas operações podem aguardar/rodar ao mesmo tempo
+        if not self._vagas.acquire(timeout=self.timeout_fila):
+            raise ServicoSenhasIndisponivel('Serviço de autenticação sobrecarregado, tente novamente')
+        try:
+            return super().executar(funcao, *args)
+        finally:
+            self._vagas.release()
+    
+    def mapear(self, funcao, *iteraveis):
+        # Um lote inteiro (ex.: importação) ocupa uma única vaga
+        if not self._vagas.acquire(timeout=self.timeout_fila):
+            raise ServicoSenhasIndisponivel('Serviço de autenticação sobrecarregado, tente novamente')
+        try:
+            return super().mapear(funcao, *iteraveis)
+        finally:
+            self._vagas.release()
+
+class ServicoSenhas:
+    """Geração e verificação de hashes PBKDF2 fora das threads de requisição.
+
+    O cálculo é enviado a um pool de processos limitado, de modo que um pico
+    de logins não ocupa todas as threads do servidor com trabalho de CPU.
+    Configuração (por ambiente):
+
+    - SENHA_PBKDF2_ROUNDS: rounds usados em novos hashes
+    - SENHA_POOL_PROCESSOS: processos do pool (0 executa na própria thread)
+    - SENHA_MAX_CONCORRENCIA: operações simultâneas (em execução ou na fila)
+    - SENHA_TIMEOUT_FILA: segundos aguardando uma vaga antes de responder 503
+    """
+    
+    def init_app(self, app):
+        app.config.setdefault('SENHA_PBKDF2_ROUNDS', pbkdf2_sha256.default_rounds)
+        app.config.setdefault('SENHA_POOL_PROCESSOS', os.cpu_count() or 1)
+        app.config.setdefault('SENHA_MAX_CONCORRENCIA', 2 * app.config['SENHA_POOL_PROCESSOS'] or 4)
+        app.config.setdefault('SENHA_TIMEOUT_FILA', 5)
+        
+        app.extensions['senhas'] = _PoolSenhas(
+            app.config['SENHA_POOL_PROCESSOS'],
+            app.config['SENHA_MAX_CONCORRENCIA'],
+            app.config['SENHA_TIMEOUT_FILA']
+        )
+    
+    def _pool(self):
+        # Fora de uma aplicação (scripts), o cálculo é feito na própria thread
+        if has_app_context() and 'senhas' in current_app.extensions:
+            return current_app.extensions['senhas']
+        return None
+    
+    def _rounds(self):
+        if has_app_context():
+            return current_app.config.get('SENHA_PBKDF2_ROUNDS', pbkdf2_sha256.default_rounds)
+        return pbkdf2_sha256.default_rounds
+    
+    def gerar_hash(self, senha):
+        pool = self._pool()
+        if pool is None:
+            return _gerar_hash(senha, self._rounds())
+        return pool.executar(_gerar_hash, senha, self._rounds())
+    
+    def gerar_hashes(self, senhas):
+        # Hashes de várias senhas de uma vez, calculados em paralelo no pool
+        pool = self._pool()
+        rounds = [self._rounds()] * len(senhas)
+        if pool is None:
+            return list(map(_gerar_hash, senhas, rounds))
+        return pool.mapear(_gerar_hash, senhas, rounds)
+    
+    def verificar(self, senha, senha_hash):
+        pool = self._pool()
+        if pool is None:
+            return _verificar(senha, senha_hash)
+        return pool.executar(_verificar, senha, senha_hash)
+    
+    def precisa_atualizar(self, senha_hash):
+        # Hashes gerados com outro número de rounds são refeitos no próximo login
+        try:
+            return pbkdf2_sha256.from_string(senha_hash).rounds != self._rounds()
+        except ValueError:
+            return False
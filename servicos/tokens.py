@@ -0,0 +1,115 @@
+import heapq
+import logging
+import threading
+import time
+from flask import current_app
+from flask_jwt_extended import create_access_token, create_refresh_token
+
+logger = logging.getLogger(__name__)
+
+class ListaRevogacaoCheia(Exception):
+    pass
+
+class _Revogacoes:
+    # chave -> (expiração, valor), com um heap ordenado pela expiração para remoção barata
+    def __init__(self, max_itens):
+        self.max_itens = max_itens
+        self._entradas = {}
+        self._heap = []
+        self._lock = threading.Lock()
+    
+    def _remover_expirados(self, agora):
+        while self._heap and self._heap[0][0] <= agora:
+            expira, chave = heapq.heappop(self._heap)
+            if self._entradas.get(chave, (None,))[0] == expira:
+                del self._entradas[chave]
+    
+    def adicionar(self, chave, expira, valor=True):
+        agora = time.time()
+        if expira <= agora:
+            return
+        
+        with self._lock:
+            self._remover_expirados(agora)
+            
+            # Limite de memória: entradas ainda válidas nunca são descartadas, pois o
+            # token voltaria a ser aceito; sem espaço, a revogação é recusada
+            if chave not in self._entradas and len(self._entradas) >= self.max_itens:
+                logger.error('Lista de revogação cheia (%d entradas); aumente JWT_REVOGACAO_MAX_ITENS', self.max_itens)
+                raise ListaRevogacaoCheia('Não foi possível revogar a sessão, tente novamente mais tarde')
+            
+            self._entradas[chave] = (expira, valor)
+            heapq.heappush(self._heap, (expira, chave))
+    
+    def obter(self, chave):
+        with self._lock:
+            self._remover_expirados(time.time())
+            entrada = self._entradas.get(chave)
+            return entrada[1] if entrada else None
+    
+    def contem(self, chave):
+        return self.obter(chave) is not None
+    
+    def __len__(self):
+        return len(self._entradas)
+
+def _segundos(expiracao):
+    # JWT_*_TOKEN_EXPIRES aceita timedelta, segundos ou False (sem expiração)
+    if expiracao is False:
+        return float('inf')
+    if hasattr(expiracao, 'total_seconds'):
+        return expiracao.total_seconds()
+    return float(expiracao)
+
+class ListaRevogacao:
+    """Tokens revogados (logout e refresh tokens já usados), mantidos em memória.
+
+    Cada entrada fica na lista apenas até a expiração do próprio token, pois
+    depois disso o token já é recusado pela verificação da assinatura. Na
+    exclusão de uma conta, todos os tokens do usuário emitidos até aquele
+    momento são revogados por uma única entrada, mantida pelo maior tempo de
+    vida de token configurado. A lista é local ao processo: com vários
+    workers, um token revogado em um deles continua válido nos demais até
+    expirar.
+
+    O total de entradas é limitado por JWT_REVOGACAO_MAX_ITENS. Como cada
+    renovação revoga um refresh token mantido até expirar, o limite deve
+    cobrir as revogações esperadas durante JWT_REFRESH_TOKEN_EXPIRES. Com a
+    lista cheia, logout, renovação e exclusão de conta respondem 503 em vez de
+    descartar revogações ainda válidas.
+    """
+    
+    def init_app(self, app, jwt):
+        app.extensions['revogacoes'] = _Revogacoes(app.config['JWT_REVOGACAO_MAX_ITENS'])
+        
+        @jwt.token_in_blocklist_loader
+        def token_revogado(jwt_header, jwt_payload):
+            return self.esta_revogado(jwt_payload)
+    
+    def revogar(self, jwt_payload):
+        # Tokens sem expiração nunca saem da lista
+        expira = jwt_payload.get('exp', float('inf'))
+        current_app.extensions['revogacoes'].adicionar(jwt_payload['jti'], expira)
+    
+    def revogar_usuario(self, usuario_id):
+        # Tokens emitidos até agora para o usuário; a entrada dura até o último deles expirar
+        agora = time.time()
+        duracao = max(_segundos(current_app.config['JWT_ACCESS_TOKEN_EXPIRES']),
+                      _segundos(current_app.config['JWT_REFRESH_TOKEN_EXPIRES']))
+        current_app.extensions['revogacoes'].adicionar(f'usuario:{usuario_id}', agora + duracao, agora)
+    
+    def esta_revogado(self, jwt_payload):
+        revogacoes = current_app.extensions['revogacoes']
+        if revogacoes.contem(jwt_payload['jti']):
+            return True
+        
+        # O id de uma conta excluída pode ser reaproveitado: só valem os tokens emitidos depois
+        revogado_em = revogacoes.obter(f'usuario:{jwt_payload["sub"]}')
+        return revogado_em is not None and jwt_payload.get('iat', 0) <= revogado_em
+
+def emitir_tokens(identidade, claims):
+    # Par de tokens com as mesmas claims; as expirações vêm da configuração
+    return {
+        'token': create_access_token(identity=identidade, additional_claims=claims),
+        'refresh_token': create_refresh_token(identity=identidade, additional_claims=claims)
+    }
@@ -0,0 +1,56 @@
+from flask import current_app, stream_with_context
+
+TIPO_NDJSON = 'application/x-ndjson'
+
+# Linhas carregadas do banco por vez (yield_per) e tamanho aproximado de cada envio
+LINHAS_POR_LOTE = 500
+BYTES_POR_ENVIO = 64 * 1024
+
+def formato_transmissao(requisicao):
+    """Formato da resposta em stream pedido pelo cliente, ou None para a resposta comum.
+
+    'Accept: application/x-ndjson' devolve um objeto JSON por linha; o
+    parâmetro 'stream=true' devolve a mesma lista JSON da resposta comum,
+    mas enviada em partes.
+    """
+    aceitos = requisicao.accept_mimetypes
+    if aceitos.best_match(['application/json', TIPO_NDJSON]) == TIPO_NDJSON:
+        return 'ndjson'
+    if requisicao.args.get('stream', '').lower() in ('1', 'true'):
+        return 'json'
+    return None
+
+def transmitir(itens, formato):
+    # 'itens' é um gerador de dicionários: cada item é serializado e descartado,
+    # então a memória por requisição não depende do tamanho do resultado
+    def gerar():
+        partes = ['['] if formato == 'json' else []
+        tamanho = 0
+        separador = ''
+        
+        for item in itens:
+            texto = current_app.json.dumps(item)
+            if formato == 'json':
+                partes.append(separador + texto)
+                separador = ','
+            else:
+                partes.append(texto + '\n')
+            tamanho += len(texto)
+            
+            if tamanho >= BYTES_POR_ENVIO:
+                yield ''.join(partes)
+                partes = []
+                tamanho = 0
+        
+        if formato == 'json':
+            partes.append(']')
+        yield ''.join(partes)
+    
+    return resposta_em_stream(gerar(), 'application/json' if formato == 'json' else TIPO_NDJSON)
+
+def resposta_em_stream(partes, mimetype):
+    # Resposta enviada à medida que 'partes' (um gerador) é consumido
+    resposta = current_app.response_class(stream_with_context(partes), mimetype=mimetype)
+    # Proxies como o nginx não devem acumular a resposta antes de repassá-la
+    resposta.headers['X-Accel-Buffering'] = 'no'
+    return resposta
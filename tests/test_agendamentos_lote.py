@@ -0,0 +1,182 @@
+import pytest
+from app import create_app
+from extensions import db
+from models.usuario import Usuario
+from models.psicologo import Psicologo
+from models.paciente import Paciente
+from models.agendamento import Agendamento
+from sqlalchemy import event
+from contextlib import contextmanager
+from datetime import datetime
+import json
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+
+        # Criar usuário de teste (psicólogo)
+        usuario_psicologo = Usuario(
+            nome_usuario='psicologo_teste',
+            email='psicologo@teste.com',
+            nome='Psicólogo Teste',
+            telefone='11999999999',
+            tipo_usuario='psicologo'
+        )
+        usuario_psicologo.definir_senha('senha123')
+        usuario_psicologo.psicologo = Psicologo(
+            registro='CRP 12345',
+            especializacao='Terapia Cognitivo-Comportamental'
+        )
+        db.session.add(usuario_psicologo)
+
+        # Criar usuário de teste (paciente)
+        usuario_paciente = Usuario(
+            nome_usuario='paciente_teste',
+            email='paciente@teste.com',
+            nome='Paciente Teste',
+            telefone='11988888888',
+            tipo_usuario='paciente'
+        )
+        usuario_paciente.definir_senha('senha123')
+        usuario_paciente.paciente = Paciente()
+        db.session.add(usuario_paciente)
+        db.session.commit()
+
+        # Horário já ocupado na agenda do psicólogo
+        db.session.add(Agendamento(
+            data='2024-01-01',
+            hora='09:00',
+            status='pendente',
+            psicologo_id=usuario_psicologo.psicologo.id,
+            paciente_id=usuario_paciente.paciente.id
+        ))
+        db.session.commit()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def token_psicologo(client):
+    resposta = client.post('/api/auth/login', json={
+        'nome_usuario': 'psicologo_teste',
+        'senha': 'senha123'
+    })
+    return json.loads(resposta.data)['token']
+
+@pytest.fixture
+def paciente_id(app):
+    with app.app_context():
+        return Paciente.query.first().id
+
+@contextmanager
+def contar_consultas(app):
+    # Registra as instruções SQL emitidas enquanto o bloco estiver ativo
+    consultas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append((statement, executemany))
+
+    with app.app_context():
+        engine = db.engine
+
+    event.listen(engine, 'before_cursor_execute', registrar)
+    try:
+        yield consultas
+    finally:
+        event.remove(engine, 'before_cursor_execute', registrar)
+
+def criar_lote(client, token, itens):
+    return client.post('/api/appointments/agendamentos/lote', json={'agendamentos': itens}, headers={
+        'Authorization': f'Bearer {token}'
+    })
+
+def test_lote_com_resultados_por_item(app, client, token_psicologo, paciente_id):
+    resposta = criar_lote(client, token_psicologo, [
+        {'data': '2024-01-02', 'hora': '09:00', 'paciente_id': paciente_id, 'duracao_minutos': 50},
+        {'data': '2024-01-01', 'hora': '09:00', 'paciente_id': paciente_id},
+        {'data': '2024-01-03', 'hora': '09:00', 'paciente_id': paciente_id},
+        {'data': '2024-01-03', 'hora': '09:00', 'paciente_id': paciente_id},
+        {'data': '03/01/2024', 'hora': '10:00', 'paciente_id': paciente_id},
+        {'data': '2024-01-04', 'hora': '09:00', 'paciente_id': 999},
+        {'data': '2024-01-05', 'paciente_id': paciente_id}
+    ])
+
+    dados = json.loads(resposta.data)
+
+    assert resposta.status_code == 201
+    assert dados['criados'] == 2
+    assert dados['erros'] == 5
+    assert [r['status'] for r in dados['resultados']] == ['criado', 'erro', 'criado', 'erro', 'erro', 'erro', 'erro']
+    assert dados['resultados'][1]['mensagem'] == 'Já existe um agendamento para esta data e hora'
+    assert dados['resultados'][3]['mensagem'] == 'Já existe um agendamento para esta data e hora'
+    assert 'formato inválido' in dados['resultados'][4]['mensagem']
+    assert dados['resultados'][5]['mensagem'] == 'Paciente não encontrado'
+    assert dados['resultados'][6]['mensagem'] == 'Campo hora é obrigatório'
+
+    with app.app_context():
+        criado = db.session.get(Agendamento, dados['resultados'][0]['id'])
+        assert criado.inicio == datetime(2024, 1, 2, 9, 0)
+        assert criado.duracao_minutos == 50
+        assert criado.status == 'pendente'
+        assert criado.criado_em is not None
+        assert Agendamento.query.count() == 3
+
+def test_lote_em_consultas_constantes(app, client, token_psicologo, paciente_id):
+    itens = [
+        {'data': f'2024-02-{dia:02d}', 'hora': f'{hora:02d}:00', 'paciente_id': paciente_id}
+        for dia in range(1, 29) for hora in range(8, 18)
+    ]
+
+    with contar_consultas(app) as consultas:
+        resposta = criar_lote(client, token_psicologo, itens)
+
+    assert resposta.status_code == 201
+    assert json.loads(resposta.data)['criados'] == len(itens)
+
+    # Perfil do psicólogo, pacientes, horários ocupados, séries e ids gerados; inserção em um único executemany
+    assert len([sql for sql, _ in consultas if sql.startswith('SELECT')]) == 5
+    assert [muitos for sql, muitos in consultas if sql.startswith('INSERT INTO agendamentos')] == [True]
+
+    # Resumos das análises: uma instrução por tabela de resumo
+    assert len([sql for sql, _ in consultas if sql.startswith('INSERT INTO resumos_')]) == 2
+
+def test_lote_sem_itens_validos(app, client, token_psicologo, paciente_id):
+    resposta = criar_lote(client, token_psicologo, [
+        {'data': '2024-01-01', 'hora': '09:00', 'paciente_id': paciente_id}
+    ])
+
+    assert resposta.status_code == 400
+    assert json.loads(resposta.data)['criados'] == 0
+
+    with app.app_context():
+        assert Agendamento.query.count() == 1
+
+@pytest.mark.parametrize('corpo', [{}, {'agendamentos': []}, {'agendamentos': 'x'}])
+def test_lote_invalido(client, token_psicologo, corpo):
+    resposta = client.post('/api/appointments/agendamentos/lote', json=corpo, headers={
+        'Authorization': f'Bearer {token_psicologo}'
+    })
+
+    assert resposta.status_code == 400
+
+def test_paciente_nao_pode_criar_lote(client, paciente_id):
+    resposta = client.post('/api/auth/login', json={
+        'nome_usuario': 'paciente_teste',
+        'senha': 'senha123'
+    })
+    token = json.loads(resposta.data)['token']
+
+    resposta = criar_lote(client, token, [
+        {'data': '2024-01-02', 'hora': '09:00', 'paciente_id': paciente_id}
+    ])
+
+    assert resposta.status_code == 403
@@ -0,0 +1,225 @@
+import pytest
+from app import create_app
+from extensions import db
+from models.usuario import Usuario
+from models.psicologo import Psicologo
+from models.paciente import Paciente
+from models.agendamento import Agendamento
+from models.prontuario_medico import ProntuarioMedico
+from sqlalchemy import event
+from contextlib import contextmanager
+import json
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+
+        # Criar usuário de teste (psicólogo)
+        usuario_psicologo = Usuario(
+            nome_usuario='psicologo_teste',
+            email='psicologo@teste.com',
+            nome='Psicólogo Teste',
+            telefone='11999999999',
+            tipo_usuario='psicologo'
+        )
+        usuario_psicologo.definir_senha('senha123')
+        db.session.add(usuario_psicologo)
+        db.session.commit()
+
+        # Criar registro de psicólogo
+        psicologo = Psicologo(
+            usuario_id=usuario_psicologo.id,
+            registro='CRP 12345',
+            especializacao='Terapia Cognitivo-Comportamental'
+        )
+        db.session.add(psicologo)
+        db.session.commit()
+
+        # Criar usuário de teste (paciente)
+        usuario_paciente = Usuario(
+            nome_usuario='paciente_teste',
+            email='paciente@teste.com',
+            nome='Paciente Teste',
+            telefone='11988888888',
+            tipo_usuario='paciente'
+        )
+        usuario_paciente.definir_senha('senha123')
+        db.session.add(usuario_paciente)
+        db.session.commit()
+
+        # Criar registro de paciente
+        paciente = Paciente(
+            usuario_id=usuario_paciente.id
+        )
+        db.session.add(paciente)
+        db.session.commit()
+
+        # 2024-01-01 é segunda-feira e 2024-01-06 é sábado
+        agendamentos = [
+            ('2024-01-01', '09:00', 'concluído'),
+            ('2024-01-01', '10:00', 'concluído'),
+            ('2024-01-02', '09:00', 'concluído'),
+            ('2024-01-06', '09:00', 'cancelado'),
+            ('2024-01-08', '09:00', 'pendente')
+        ]
+        for data, hora, status in agendamentos:
+            db.session.add(Agendamento(
+                data=data,
+                hora=hora,
+                status=status,
+                psicologo_id=psicologo.id,
+                paciente_id=paciente.id
+            ))
+
+        for data in ['2024-01-01', '2024-01-15', '2024-02-03']:
+            db.session.add(ProntuarioMedico(
+                data=data,
+                conteudo='Evolução da sessão',
+                psicologo_id=psicologo.id,
+                paciente_id=paciente.id
+            ))
+        db.session.commit()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def token_psicologo(client):
+    # Obter token JWT para o psicólogo
+    resposta = client.post('/api/auth/login', json={
+        'nome_usuario': 'psicologo_teste',
+        'senha': 'senha123'
+    })
+
+    dados = json.loads(resposta.data)
+    return dados['token']
+
+def test_analise_agendamentos(client, token_psicologo):
+    resposta = client.get('/api/analytics/analises/agendamentos', headers={
+        'Authorization': f'Bearer {token_psicologo}'
+    })
+
+    dados = json.loads(resposta.data)
+
+    assert resposta.status_code == 200
+    assert dados['total_agendamentos'] == 5
+    assert dados['por_status'] == {'concluído': 3, 'cancelado': 1, 'pendente': 1}
+    assert dados['por_dia_semana'] == {
+        'Segunda': 3,
+        'Terça': 1,
+        'Quarta': 0,
+        'Quinta': 0,
+        'Sexta': 0,
+        'Sábado': 1,
+        'Domingo': 0
+    }
+    assert dados['taxa_comparecimento'] == 75.0
+
+@contextmanager
+def contar_consultas(app):
+    # Registra as instruções SQL emitidas enquanto o bloco estiver ativo
+    consultas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+
+    event.listen(engine, 'before_cursor_execute', registrar)
+    try:
+        yield consultas
+    finally:
+        event.remove(engine, 'before_cursor_execute', registrar)
+
+def adicionar_pacientes(app, quantidade, inicio=0):
+    # Cada paciente novo recebe dois agendamentos e um prontuário
+    with app.app_context():
+        psicologo = Psicologo.query.first()
+
+        for i in range(inicio, inicio + quantidade):
+            usuario = Usuario(
+                nome_usuario=f'paciente_{i}',
+                email=f'paciente_{i}@teste.com',
+                nome=f'Paciente {i}',
+                tipo_usuario='paciente',
+                senha_hash='x'
+            )
+            usuario.paciente = Paciente()
+            db.session.add(usuario)
+            db.session.flush()
+
+            for hora, status in [('09:00', 'concluído'), ('10:00', 'cancelado')]:
+                db.session.add(Agendamento(
+                    data='2024-03-04',
+                    hora=hora,
+                    status=status,
+                    psicologo_id=psicologo.id,
+                    paciente_id=usuario.paciente.id
+                ))
+            db.session.add(ProntuarioMedico(
+                data='2024-03-04',
+                conteudo='Evolução da sessão',
+                psicologo_id=psicologo.id,
+                paciente_id=usuario.paciente.id
+            ))
+
+        db.session.commit()
+
+def test_analise_prontuarios(client, token_psicologo):
+    resposta = client.get('/api/analytics/analises/prontuarios', headers={
+        'Authorization': f'Bearer {token_psicologo}'
+    })
+
+    dados = json.loads(resposta.data)
+
+    assert resposta.status_code == 200
+    assert dados['total_prontuarios'] == 3
+    assert dados['por_paciente'] == {'Paciente Teste': 3}
+    assert dados['por_mes'] == {'2024-01': 2, '2024-02': 1}
+
+def test_analise_pacientes(app, client, token_psicologo):
+    adicionar_pacientes(app, 1)
+
+    resposta = client.get('/api/analytics/analises/pacientes', headers={
+        'Authorization': f'Bearer {token_psicologo}'
+    })
+
+    dados = json.loads(resposta.data)
+
+    assert resposta.status_code == 200
+    assert [p['nome'] for p in dados] == ['Paciente Teste', 'Paciente 0']
+    assert dados[0]['total_agendamentos'] == 5
+    assert dados[0]['agendamentos_por_status'] == {'concluído': 3, 'cancelado': 1, 'pendente': 1}
+    assert dados[0]['taxa_comparecimento'] == 75.0
+    assert dados[0]['total_prontuarios'] == 3
+    assert dados[1]['taxa_comparecimento'] == 50.0
+    assert dados[1]['total_prontuarios'] == 1
+
+@pytest.mark.parametrize('url', [
+    '/api/analytics/analises/pacientes',
+    '/api/analytics/analises/prontuarios'
+])
+def test_analises_consultas_constantes(app, client, token_psicologo, url):
+    # O número de consultas não deve crescer com o número de pacientes
+    headers = {'Authorization': f'Bearer {token_psicologo}'}
+
+    adicionar_pacientes(app, 2)
+    with contar_consultas(app) as consultas_poucos:
+        assert client.get(url, headers=headers).status_code == 200
+
+    adicionar_pacientes(app, 40, inicio=2)
+    with contar_consultas(app) as consultas_muitos:
+        resposta = client.get(url, headers=headers)
+    assert resposta.status_code == 200
+
+    assert len(consultas_muitos) == len(consultas_poucos)
@@ -0,0 +1,48 @@
+from benchmarks.bench_endpoints import comparar, melhor_rodada
+
+def metricas(p95_ms=10.0, consultas=3, memoria_kb=100.0):
+    return {'p50_ms': p95_ms / 2, 'p95_ms': p95_ms, 'p99_ms': p95_ms, 'consultas': consultas, 'memoria_kb': memoria_kb}
+
+BASELINE = {'pequeno': {'login': metricas(), 'listar_agendamentos': metricas(p95_ms=20.0, consultas=2)}}
+
+def test_dentro_da_tolerancia_sem_regressoes():
+    # 10 × 1,25 + 2 = 14,5 ms; 100 × 1,25 + 32 = 157 KB
+    resultados = {'pequeno': {
+        'login': metricas(p95_ms=14.5, consultas=3, memoria_kb=157.0),
+        'listar_agendamentos': metricas(p95_ms=5.0, consultas=1)
+    }}
+    
+    assert comparar(resultados, BASELINE, 0.25, 2) == []
+
+def test_regressoes_de_latencia_consultas_e_memoria():
+    resultados = {'pequeno': {
+        'login': metricas(p95_ms=14.6, memoria_kb=157.1),
+        'listar_agendamentos': metricas(p95_ms=20.0, consultas=3)
+    }}
+    
+    assert comparar(resultados, BASELINE, 0.25, 2) == [
+        'pequeno/login: p95 10.0 -> 14.6 ms',
+        'pequeno/login: memória 100.0 -> 157.1 KB',
+        'pequeno/listar_agendamentos: consultas 2 -> 3'
+    ]
+
+def test_endpoints_e_tamanhos_fora_da_baseline_ignorados():
+    resultados = {
+        'pequeno': {'novo_endpoint': metricas(p95_ms=1000.0)},
+        'grande': {'login': metricas(p95_ms=1000.0)}
+    }
+    
+    assert comparar(resultados, BASELINE, 0.25, 2) == []
+
+def test_melhor_rodada_fica_com_o_menor_valor_de_cada_metrica():
+    rodadas = [
+        {'pequeno': {'login': metricas(p95_ms=12.0, memoria_kb=90.0)}},
+        {'pequeno': {'login': metricas(p95_ms=9.0, memoria_kb=110.0)}, 'medio': {'login': metricas()}}
+    ]
+    
+    assert melhor_rodada(rodadas) == {
+        'pequeno': {'login': {'p50_ms': 4.5, 'p95_ms': 9.0, 'p99_ms': 9.0, 'consultas': 3, 'memoria_kb': 90.0}},
+        'medio': {'login': metricas()}
+    }
+    # As rodadas medidas não são alteradas
+    assert rodadas[0]['pequeno']['login']['p95_ms'] == 12.0
@@ -0,0 +1,229 @@
+import pytest
+from app import create_app
+from config import config, TestingConfig
+from extensions import db
+from models.usuario import Usuario
+from models.psicologo import Psicologo
+from models.paciente import Paciente
+from models.agendamento import Agendamento
+from servicos.cache_analises import _CacheMemoria
+from sqlalchemy import event
+from contextlib import contextmanager
+from unittest import mock
+import json
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+
+        # Dois psicólogos e um paciente
+        for nome_usuario in ['psicologo_teste', 'outro_psicologo']:
+            usuario = Usuario(
+                nome_usuario=nome_usuario,
+                email=f'{nome_usuario}@teste.com',
+                nome=nome_usuario,
+                tipo_usuario='psicologo'
+            )
+            usuario.definir_senha('senha123')
+            usuario.psicologo = Psicologo(registro=f'CRP {nome_usuario}')
+            db.session.add(usuario)
+
+        usuario_paciente = Usuario(
+            nome_usuario='paciente_teste',
+            email='paciente@teste.com',
+            nome='Paciente Teste',
+            tipo_usuario='paciente'
+        )
+        usuario_paciente.definir_senha('senha123')
+        usuario_paciente.paciente = Paciente()
+        db.session.add(usuario_paciente)
+        db.session.commit()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def token_psicologo(client):
+    # Obter token JWT para o psicólogo
+    resposta = client.post('/api/auth/login', json={
+        'nome_usuario': 'psicologo_teste',
+        'senha': 'senha123'
+    })
+
+    dados = json.loads(resposta.data)
+    return dados['token']
+
+@contextmanager
+def contar_consultas(app):
+    # Registra as instruções SQL emitidas enquanto o bloco estiver ativo
+    consultas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+
+    event.listen(engine, 'before_cursor_execute', registrar)
+    try:
+        yield consultas
+    finally:
+        event.remove(engine, 'before_cursor_execute', registrar)
+
+def adicionar_agendamento(app, nome_usuario, status='concluído'):
+    with app.app_context():
+        psicologo = Usuario.query.filter_by(nome_usuario=nome_usuario).first().psicologo
+        db.session.add(Agendamento(
+            data='2024-01-01',
+            hora='09:00',
+            status=status,
+            psicologo_id=psicologo.id,
+            paciente_id=Paciente.query.first().id
+        ))
+        db.session.commit()
+
+def total_agendamentos(client, token):
+    resposta = client.get('/api/analytics/analises/agendamentos', headers={'Authorization': f'Bearer {token}'})
+    assert resposta.status_code == 200
+    return json.loads(resposta.data)['total_agendamentos']
+
+def estatisticas(client, token):
+    resposta = client.get('/api/analytics/analises/cache', headers={'Authorization': f'Bearer {token}'})
+    return json.loads(resposta.data)
+
+def test_resposta_servida_do_cache(app, client, token_psicologo):
+    adicionar_agendamento(app, 'psicologo_teste')
+    assert total_agendamentos(client, token_psicologo) == 1
+
+    with contar_consultas(app) as consultas:
+        assert total_agendamentos(client, token_psicologo) == 1
+
+    # Os resumos não são consultados de novo
+    assert not [sql for sql in consultas if 'resumos_' in sql]
+
+    dados = estatisticas(client, token_psicologo)
+    assert dados['backend'] == 'memoria'
+    assert dados['acertos'] == 1
+    assert dados['falhas'] == 1
+    assert dados['itens'] == 1
+
+def test_commit_invalida_apenas_o_psicologo_alterado(app, client, token_psicologo):
+    assert total_agendamentos(client, token_psicologo) == 0
+
+    # Alteração de outro psicólogo não invalida a resposta em cache
+    adicionar_agendamento(app, 'outro_psicologo')
+    assert total_agendamentos(client, token_psicologo) == 0
+    assert estatisticas(client, token_psicologo)['acertos'] == 1
+
+    adicionar_agendamento(app, 'psicologo_teste')
+    assert total_agendamentos(client, token_psicologo) == 1
+    assert estatisticas(client, token_psicologo)['falhas'] == 2
+
+def test_invalidacao_pelas_rotas(app, client, token_psicologo):
+    cabecalhos = {'Authorization': f'Bearer {token_psicologo}'}
+    with app.app_context():
+        paciente_id = Paciente.query.first().id
+
+    assert total_agendamentos(client, token_psicologo) == 0
+
+    resposta = client.post('/api/appointments/agendamentos/lote', headers=cabecalhos, json={'agendamentos': [
+        {'data': '2024-01-02', 'hora': '10:00', 'paciente_id': paciente_id}
+    ]})
+    assert resposta.status_code == 201
+    assert total_agendamentos(client, token_psicologo) == 1
+
+    agendamento_id = json.loads(resposta.data)['resultados'][0]['id']
+    resposta = client.delete(f'/api/appointments/agendamentos/{agendamento_id}', headers=cabecalhos)
+    assert resposta.status_code == 200
+    assert total_agendamentos(client, token_psicologo) == 0
+
+def test_renomear_paciente_invalida_analises_com_o_nome(app, client, token_psicologo):
+    cabecalhos = {'Authorization': f'Bearer {token_psicologo}'}
+    token_outro = json.loads(client.post('/api/auth/login', json={
+        'nome_usuario': 'outro_psicologo',
+        'senha': 'senha123'
+    }).data)['token']
+    adicionar_agendamento(app, 'psicologo_teste')
+
+    def nomes_pacientes():
+        resposta = client.get('/api/analytics/analises/pacientes', headers=cabecalhos)
+        return [paciente['nome'] for paciente in json.loads(resposta.data)]
+
+    assert nomes_pacientes() == ['Paciente Teste']
+    assert total_agendamentos(client, token_outro) == 0
+
+    # O próprio paciente muda o nome pela rota de usuários
+    token_paciente = json.loads(client.post('/api/auth/login', json={
+        'nome_usuario': 'paciente_teste',
+        'senha': 'senha123'
+    }).data)['token']
+    with app.app_context():
+        usuario_id = Usuario.query.filter_by(nome_usuario='paciente_teste').first().id
+    resposta = client.put(f'/api/users/usuarios/{usuario_id}', headers={'Authorization': f'Bearer {token_paciente}'}, json={
+        'nome': 'Paciente Renomeado'
+    })
+    assert resposta.status_code == 200
+
+    assert nomes_pacientes() == ['Paciente Renomeado']
+
+    # Psicólogos que não atendem o paciente mantêm o cache
+    assert total_agendamentos(client, token_outro) == 0
+    assert estatisticas(client, token_outro)['acertos'] == 1
+
+def test_rollback_nao_invalida(app, client, token_psicologo):
+    assert total_agendamentos(client, token_psicologo) == 0
+
+    with app.app_context():
+        db.session.add(Agendamento(
+            data='2024-01-01',
+            hora='09:00',
+            status='pendente',
+            psicologo_id=Psicologo.query.first().id,
+            paciente_id=Paciente.query.first().id
+        ))
+        db.session.flush()
+        db.session.rollback()
+
+        # Um commit posterior, sem alterações, também não invalida
+        db.session.commit()
+
+    assert total_agendamentos(client, token_psicologo) == 0
+    assert estatisticas(client, token_psicologo)['acertos'] == 1
+
+def test_cache_desativado(monkeypatch):
+    class SemCacheConfig(TestingConfig):
+        ANALISES_CACHE_BACKEND = 'nenhum'
+
+    monkeypatch.setitem(config, 'sem_cache', SemCacheConfig)
+    app = create_app('sem_cache')
+    assert app.extensions['cache_analises'] is None
+
+def test_cache_memoria_lru_e_ttl():
+    cache = _CacheMemoria(max_itens=2, ttl=60)
+    cache.guardar(1, 'a', {'total': 1})
+    cache.guardar(1, 'b', {'total': 2})
+    assert cache.obter(1, 'a') == {'total': 1}
+
+    # 'b' é o item usado há mais tempo
+    cache.guardar(2, 'a', {'total': 3})
+    assert cache.obter(1, 'b') is None
+    assert cache.obter(1, 'a') == {'total': 1}
+
+    cache.invalidar(1)
+    assert cache.obter(1, 'a') is None
+    assert cache.obter(2, 'a') == {'total': 3}
+
+    # Expiração pelo TTL
+    with mock.patch('servicos.cache_analises.time.monotonic', return_value=10 ** 9):
+        assert cache.obter(2, 'a') is None
+
+    assert cache.estatisticas() == {'backend': 'memoria', 'itens': 0, 'acertos': 3, 'falhas': 3, 'remocoes': 2}
@@ -0,0 +1,170 @@
+import pytest
+from app import create_app
+from extensions import db
+from models.usuario import Usuario
+from models.psicologo import Psicologo
+from models.paciente import Paciente
+from models.agendamento import Agendamento
+from models.serie_agendamento import SerieAgendamento
+from sqlalchemy import event
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import json
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+
+        # Criar usuário de teste (psicólogo)
+        usuario_psicologo = Usuario(
+            nome_usuario='psicologo_teste',
+            email='psicologo@teste.com',
+            nome='Psicólogo Teste',
+            telefone='11999999999',
+            tipo_usuario='psicologo'
+        )
+        usuario_psicologo.definir_senha('senha123')
+        usuario_psicologo.psicologo = Psicologo(
+            registro='CRP 12345',
+            especializacao='Terapia Cognitivo-Comportamental'
+        )
+        db.session.add(usuario_psicologo)
+
+        # Criar pacientes de teste
+        for i in range(1, 4):
+            usuario_paciente = Usuario(
+                nome_usuario=f'paciente_{i}',
+                email=f'paciente_{i}@teste.com',
+                nome=f'Paciente {i}',
+                telefone='11988888888',
+                tipo_usuario='paciente'
+            )
+            usuario_paciente.definir_senha('senha123')
+            usuario_paciente.paciente = Paciente()
+            db.session.add(usuario_paciente)
+        db.session.commit()
+
+        for data, hora, status, paciente_id in [
+            ('2024-01-02', '10:00', 'confirmado', 2),
+            ('2024-01-02', '08:00', 'pendente', 1),
+            ('2024-01-05', '09:00', 'cancelado', 2),
+            ('2024-02-01', '09:00', 'pendente', 3)
+        ]:
+            db.session.add(Agendamento(
+                data=data,
+                hora=hora,
+                status=status,
+                psicologo_id=1,
+                paciente_id=paciente_id
+            ))
+
+        # Série semanal às quintas (2024-01-04), paciente 1
+        db.session.add(SerieAgendamento(
+            regra='semanal',
+            intervalo=1,
+            inicio=datetime(2024, 1, 4, 15, 0),
+            fim=datetime(2024, 1, 11).date(),
+            excecoes=[],
+            psicologo_id=1,
+            paciente_id=1
+        ))
+        db.session.commit()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def fazer_login(client, nome_usuario):
+    resposta = client.post('/api/auth/login', json={
+        'nome_usuario': nome_usuario,
+        'senha': 'senha123'
+    })
+    return {'Authorization': f"Bearer {json.loads(resposta.data)['token']}"}
+
+@contextmanager
+def contar_consultas(app):
+    # Registra as instruções SQL emitidas enquanto o bloco estiver ativo
+    consultas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+
+    event.listen(engine, 'before_cursor_execute', registrar)
+    try:
+        yield consultas
+    finally:
+        event.remove(engine, 'before_cursor_execute', registrar)
+
+def test_calendario_agrupado_por_dia(client):
+    headers = fazer_login(client, 'psicologo_teste')
+
+    resposta = client.get('/api/appointments/agendamentos/calendario?inicio=2024-01-01&fim=2024-01-31', headers=headers)
+    dados = json.loads(resposta.data)
+
+    assert resposta.status_code == 200
+    assert dados['dias'] == {
+        '2024-01-02': {
+            'id': [2, 1], 'hora': ['08:00', '10:00'], 'status': ['pendente', 'confirmado'],
+            'paciente_id': [1, 2], 'serie_id': [None, None]
+        },
+        '2024-01-04': {'id': [None], 'hora': ['15:00'], 'status': ['pendente'], 'paciente_id': [1], 'serie_id': [1]},
+        '2024-01-05': {'id': [3], 'hora': ['09:00'], 'status': ['cancelado'], 'paciente_id': [2], 'serie_id': [None]},
+        '2024-01-11': {'id': [None], 'hora': ['15:00'], 'status': ['pendente'], 'paciente_id': [1], 'serie_id': [1]}
+    }
+    assert dados['pacientes'] == {'1': 'Paciente 1', '2': 'Paciente 2'}
+
+def test_calendario_do_paciente(client):
+    headers = fazer_login(client, 'paciente_2')
+
+    resposta = client.get('/api/appointments/agendamentos/calendario?inicio=2024-01-01&fim=2024-12-31', headers=headers)
+    dados = json.loads(resposta.data)
+
+    assert resposta.status_code == 200
+    assert sorted(dados['dias']) == ['2024-01-02', '2024-01-05']
+    assert dados['pacientes'] == {'2': 'Paciente 2'}
+
+@pytest.mark.parametrize('parametros', ['', '?inicio=2024-01-01', '?inicio=2024-01-01&fim=2025-06-01', '?inicio=2024-02-01&fim=2024-01-01'])
+def test_calendario_exige_periodo_valido(client, parametros):
+    headers = fazer_login(client, 'psicologo_teste')
+
+    resposta = client.get(f'/api/appointments/agendamentos/calendario{parametros}', headers=headers)
+
+    assert resposta.status_code == 400
+
+def test_calendario_compacto(app, client):
+    # Mês cheio: oito agendamentos por dia útil
+    with app.app_context():
+        dia = datetime(2024, 3, 1)
+        while dia.month == 3:
+            if dia.weekday() < 5:
+                for hora in range(8, 16):
+                    db.session.add(Agendamento(
+                        inicio=dia.replace(hour=hora), status='pendente',
+                        psicologo_id=1, paciente_id=1 + hora % 3
+                    ))
+            dia += timedelta(days=1)
+        db.session.commit()
+
+    headers = fazer_login(client, 'psicologo_teste')
+    periodo = 'inicio=2024-03-01&fim=2024-03-31'
+
+    completa = client.get(f'/api/appointments/agendamentos?{periodo}', headers=headers)
+    with contar_consultas(app) as consultas:
+        compacta = client.get(f'/api/appointments/agendamentos/calendario?{periodo}', headers=headers)
+
+    assert compacta.status_code == 200
+    assert sum(len(dia['id']) for dia in json.loads(compacta.data)['dias'].values()) == len(json.loads(completa.data))
+    assert len(compacta.data) * 10 < len(completa.data)
+    # Agendamentos, séries e nomes dos pacientes
+    assert len(consultas) == 3
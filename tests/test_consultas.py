@@ -0,0 +1,340 @@
+import pytest
+from app import create_app
+from extensions import db
+from models.usuario import Usuario
+from models.psicologo import Psicologo
+from models.paciente import Paciente
+from models.agendamento import Agendamento
+from models.prontuario_medico import ProntuarioMedico
+from sqlalchemy import event
+from contextlib import contextmanager
+import json
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+
+        # Criar usuário de teste (psicólogo)
+        usuario_psicologo = Usuario(
+            nome_usuario='psicologo_teste',
+            email='psicologo@teste.com',
+            nome='Psicólogo Teste',
+            telefone='11999999999',
+            tipo_usuario='psicologo'
+        )
+        usuario_psicologo.definir_senha('senha123')
+        db.session.add(usuario_psicologo)
+        db.session.commit()
+
+        # Criar registro de psicólogo
+        psicologo = Psicologo(
+            usuario_id=usuario_psicologo.id,
+            registro='CRP 12345',
+            especializacao='Terapia Cognitivo-Comportamental'
+        )
+        db.session.add(psicologo)
+        db.session.commit()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def token_psicologo(client):
+    # Obter token JWT para o psicólogo
+    resposta = client.post('/api/auth/login', json={
+        'nome_usuario': 'psicologo_teste',
+        'senha': 'senha123'
+    })
+
+    dados = json.loads(resposta.data)
+    return dados['token']
+
+def criar_pacientes_com_historico(app, quantidade, inicio=0):
+    # Cria pacientes distintos, cada um com um agendamento e um prontuário
+    with app.app_context():
+        psicologo = Psicologo.query.first()
+
+        for i in range(inicio, inicio + quantidade):
+            usuario = Usuario(
+                nome_usuario=f'paciente_{i}',
+                email=f'paciente_{i}@teste.com',
+                nome=f'Paciente {i}',
+                telefone='11988888888',
+                tipo_usuario='paciente',
+                senha_hash='x'
+            )
+            usuario.paciente = Paciente()
+            db.session.add(usuario)
+            db.session.flush()
+
+            db.session.add(Agendamento(
+                data=f'2024-01-{(i % 28) + 1:02d}',
+                hora=f'{8 + (i % 10):02d}:00',
+                status='pendente',
+                psicologo_id=psicologo.id,
+                paciente_id=usuario.paciente.id
+            ))
+            db.session.add(ProntuarioMedico(
+                data=f'2024-01-{(i % 28) + 1:02d}',
+                conteudo=f'Sessão do paciente {i}',
+                psicologo_id=psicologo.id,
+                paciente_id=usuario.paciente.id
+            ))
+
+        db.session.commit()
+
+@contextmanager
+def contar_consultas(app):
+    # Registra as instruções SQL emitidas enquanto o bloco estiver ativo
+    consultas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+
+    event.listen(engine, 'before_cursor_execute', registrar)
+    try:
+        yield consultas
+    finally:
+        event.remove(engine, 'before_cursor_execute', registrar)
+
+def consultas_por_requisicao(app, client, url, token):
+    with contar_consultas(app) as consultas:
+        resposta = client.get(url, headers={'Authorization': f'Bearer {token}'})
+
+    assert resposta.status_code == 200
+    return len(consultas), json.loads(resposta.data)
+
+def test_listar_agendamentos_consultas_constantes(app, client, token_psicologo):
+    # O número de consultas não deve crescer com o número de agendamentos
+    url = '/api/appointments/agendamentos'
+
+    criar_pacientes_com_historico(app, 3)
+    consultas_poucos, dados = consultas_por_requisicao(app, client, url, token_psicologo)
+    assert len(dados) == 3
+    assert dados[0]['paciente']['usuario']['nome'].startswith('Paciente')
+    assert dados[0]['psicologo']['usuario']['nome'] == 'Psicólogo Teste'
+
+    criar_pacientes_com_historico(app, 30, inicio=3)
+    consultas_muitos, dados = consultas_por_requisicao(app, client, url, token_psicologo)
+    assert len(dados) == 33
+
+    assert consultas_muitos == consultas_poucos
+
+def test_listar_prontuarios_consultas_constantes(app, client, token_psicologo):
+    url = '/api/medical-records/prontuarios'
+
+    criar_pacientes_com_historico(app, 3)
+    consultas_poucos, dados = consultas_por_requisicao(app, client, url, token_psicologo)
+    assert len(dados) == 3
+    assert dados[0]['paciente']['usuario']['nome'].startswith('Paciente')
+
+    criar_pacientes_com_historico(app, 30, inicio=3)
+    consultas_muitos, dados = consultas_por_requisicao(app, client, url, token_psicologo)
+    assert len(dados) == 33
+
+    assert consultas_muitos == consultas_poucos
+
+def test_listar_pacientes_consultas_constantes(app, client, token_psicologo):
+    url = '/api/users/pacientes'
+
+    criar_pacientes_com_historico(app, 3)
+    consultas_poucos, dados = consultas_por_requisicao(app, client, url, token_psicologo)
+    assert len(dados) == 3
+
+    criar_pacientes_com_historico(app, 30, inicio=3)
+    consultas_muitos, dados = consultas_por_requisicao(app, client, url, token_psicologo)
+    assert len(dados) == 33
+    assert all(p['usuario'] for p in dados)
+
+    assert consultas_muitos == consultas_poucos
+
+def test_obter_agendamento_carrega_detalhes(app, client, token_psicologo):
+    criar_pacientes_com_historico(app, 1)
+
+    with app.app_context():
+        agendamento_id = Agendamento.query.first().id
+
+    consultas, dados = consultas_por_requisicao(
+        app, client, f'/api/appointments/agendamentos/{agendamento_id}', token_psicologo
+    )
+
+    assert dados['paciente']['usuario']['nome'] == 'Paciente 0'
+    assert dados['psicologo']['usuario']['nome'] == 'Psicólogo Teste'
+    # Autorização e carga do agendamento (com joins) em uma única consulta
+    assert consultas == 1
+
+def percorrer_paginas(client, url, token, limite):
+    # Segue os cursores até o fim e devolve as páginas obtidas
+    paginas = []
+    cursor = None
+    while True:
+        parametros = f'?limit={limite}' + (f'&cursor={cursor}' if cursor else '')
+        resposta = client.get(url + parametros, headers={'Authorization': f'Bearer {token}'})
+        assert resposta.status_code == 200
+
+        dados = json.loads(resposta.data)
+        paginas.append(dados['itens'])
+        cursor = dados['next_cursor']
+        if not cursor:
+            return paginas
+
+def test_paginacao_agendamentos_por_cursor(app, client, token_psicologo):
+    criar_pacientes_com_historico(app, 25)
+
+    paginas = percorrer_paginas(client, '/api/appointments/agendamentos', token_psicologo, 10)
+    itens = [item for pagina in paginas for item in pagina]
+
+    assert [len(pagina) for pagina in paginas] == [10, 10, 5]
+    assert len({item['id'] for item in itens}) == 25
+    chaves = [(item['data'], item['hora'], item['id']) for item in itens]
+    assert chaves == sorted(chaves)
+
+def test_paginacao_estavel_com_insercao_concorrente(app, client, token_psicologo):
+    criar_pacientes_com_historico(app, 20)
+    headers = {'Authorization': f'Bearer {token_psicologo}'}
+
+    resposta = client.get('/api/medical-records/prontuarios?limit=10', headers=headers)
+    primeira = json.loads(resposta.data)
+
+    # Um prontuário inserido antes do cursor não desloca a página seguinte
+    with app.app_context():
+        psicologo = Psicologo.query.first()
+        paciente = Paciente.query.first()
+        db.session.add(ProntuarioMedico(
+            data='2000-01-01',
+            conteudo='Registro retroativo',
+            psicologo_id=psicologo.id,
+            paciente_id=paciente.id
+        ))
+        db.session.commit()
+
+    resposta = client.get(
+        f"/api/medical-records/prontuarios?limit=10&cursor={primeira['next_cursor']}", headers=headers
+    )
+    segunda = json.loads(resposta.data)
+
+    ids_primeira = {item['id'] for item in primeira['itens']}
+    ids_segunda = {item['id'] for item in segunda['itens']}
+    assert len(ids_segunda) == 10
+    assert not ids_primeira & ids_segunda
+    assert segunda['next_cursor'] is None
+
+def test_paginacao_usuarios_e_pacientes(app, client, token_psicologo):
+    criar_pacientes_com_historico(app, 7)
+
+    paginas = percorrer_paginas(client, '/api/users/pacientes', token_psicologo, 3)
+    assert [len(pagina) for pagina in paginas] == [3, 3, 1]
+
+    paginas = percorrer_paginas(client, '/api/users/usuarios', token_psicologo, 5)
+    assert sum(len(pagina) for pagina in paginas) == 8
+
+def test_paginacao_parametros_invalidos(client, token_psicologo):
+    headers = {'Authorization': f'Bearer {token_psicologo}'}
+
+    resposta = client.get('/api/appointments/agendamentos?cursor=invalido', headers=headers)
+    assert resposta.status_code == 400
+
+    resposta = client.get('/api/users/psicologos?limit=0', headers=headers)
+    assert resposta.status_code == 400
+
+def test_filtro_por_periodo(app, client, token_psicologo):
+    criar_pacientes_com_historico(app, 20)
+    headers = {'Authorization': f'Bearer {token_psicologo}'}
+
+    resposta = client.get('/api/appointments/agendamentos?inicio=2024-01-05&fim=2024-01-10', headers=headers)
+    dados = json.loads(resposta.data)
+    assert resposta.status_code == 200
+    assert sorted(item['data'] for item in dados) == [f'2024-01-{dia:02d}' for dia in range(5, 11)]
+
+    resposta = client.get('/api/medical-records/prontuarios?inicio=2024-01-15', headers=headers)
+    dados = json.loads(resposta.data)
+    assert len(dados) == 6
+    assert all(item['data'] >= '2024-01-15' for item in dados)
+
+    resposta = client.get('/api/appointments/agendamentos?inicio=05/01/2024', headers=headers)
+    assert resposta.status_code == 400
+
+def test_criar_agendamento_com_data_invalida(app, client, token_psicologo):
+    criar_pacientes_com_historico(app, 1)
+
+    with app.app_context():
+        paciente_id = Paciente.query.first().id
+
+    resposta = client.post('/api/appointments/agendamentos',
+        headers={'Authorization': f'Bearer {token_psicologo}'},
+        json={'data': '31/12/2024', 'hora': '10:00', 'paciente_id': paciente_id}
+    )
+    assert resposta.status_code == 400
+
+    resposta = client.post('/api/appointments/agendamentos',
+        headers={'Authorization': f'Bearer {token_psicologo}'},
+        json={'data': '2024-12-31', 'hora': '10:00', 'duracao_minutos': 50, 'paciente_id': paciente_id}
+    )
+    dados = json.loads(resposta.data)
+    assert resposta.status_code == 201
+    assert dados['agendamento']['inicio'] == '2024-12-31T10:00:00'
+    assert dados['agendamento']['duracao_minutos'] == 50
+
+def test_obter_prontuario_em_uma_consulta(app, client, token_psicologo):
+    criar_pacientes_com_historico(app, 1)
+
+    with app.app_context():
+        prontuario_id = ProntuarioMedico.query.first().id
+
+    consultas, dados = consultas_por_requisicao(
+        app, client, f'/api/medical-records/prontuarios/{prontuario_id}', token_psicologo
+    )
+
+    assert dados['paciente']['usuario']['nome'] == 'Paciente 0'
+    assert consultas == 1
+
+def test_acesso_a_registro_de_outro_usuario(app, client, token_psicologo):
+    criar_pacientes_com_historico(app, 1)
+
+    # Token de um paciente sem relação com os registros
+    with app.app_context():
+        usuario = Usuario(
+            nome_usuario='outro_paciente',
+            email='outro@teste.com',
+            nome='Outro Paciente',
+            tipo_usuario='paciente'
+        )
+        usuario.definir_senha('senha123')
+        usuario.paciente = Paciente()
+        db.session.add(usuario)
+        db.session.commit()
+
+        agendamento_id = Agendamento.query.first().id
+        prontuario_id = ProntuarioMedico.query.first().id
+
+    resposta = client.post('/api/auth/login', json={'nome_usuario': 'outro_paciente', 'senha': 'senha123'})
+    headers = {'Authorization': f"Bearer {json.loads(resposta.data)['token']}"}
+
+    assert client.get(f'/api/appointments/agendamentos/{agendamento_id}', headers=headers).status_code == 403
+    assert client.get(f'/api/medical-records/prontuarios/{prontuario_id}', headers=headers).status_code == 403
+    assert client.get('/api/appointments/agendamentos/9999', headers=headers).status_code == 404
+    assert client.get('/api/medical-records/prontuarios/9999', headers=headers).status_code == 404
+
+def test_excluir_registros_do_psicologo(app, client, token_psicologo):
+    criar_pacientes_com_historico(app, 1)
+    headers = {'Authorization': f'Bearer {token_psicologo}'}
+
+    with app.app_context():
+        agendamento_id = Agendamento.query.first().id
+        prontuario_id = ProntuarioMedico.query.first().id
+
+    assert client.delete(f'/api/appointments/agendamentos/{agendamento_id}', headers=headers).status_code == 200
+    assert client.delete(f'/api/medical-records/prontuarios/{prontuario_id}', headers=headers).status_code == 200
+    assert client.delete(f'/api/appointments/agendamentos/{agendamento_id}', headers=headers).status_code == 404
@@ -0,0 +1,224 @@
+import pytest
+from app import create_app
+from extensions import db
+from models.usuario import Usuario
+from models.psicologo import Psicologo
+from models.paciente import Paciente
+from models.agendamento import Agendamento
+from models.serie_agendamento import SerieAgendamento
+from sqlalchemy import event
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import time
+import json
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+
+        # Criar usuário de teste (psicólogo)
+        usuario_psicologo = Usuario(
+            nome_usuario='psicologo_teste',
+            email='psicologo@teste.com',
+            nome='Psicólogo Teste',
+            telefone='11999999999',
+            tipo_usuario='psicologo'
+        )
+        usuario_psicologo.definir_senha('senha123')
+        usuario_psicologo.psicologo = Psicologo(
+            registro='CRP 12345',
+            especializacao='Terapia Cognitivo-Comportamental'
+        )
+        db.session.add(usuario_psicologo)
+
+        # Criar usuário de teste (paciente)
+        usuario_paciente = Usuario(
+            nome_usuario='paciente_teste',
+            email='paciente@teste.com',
+            nome='Paciente Teste',
+            telefone='11988888888',
+            tipo_usuario='paciente'
+        )
+        usuario_paciente.definir_senha('senha123')
+        usuario_paciente.paciente = Paciente()
+        db.session.add(usuario_paciente)
+        db.session.commit()
+
+        # 2024-01-01 é segunda-feira
+        for data, hora, duracao, status in [
+            ('2024-01-01', '09:00', 60, 'pendente'),
+            ('2024-01-01', '10:30', None, 'confirmado'),
+            ('2024-01-01', '13:00', 50, 'cancelado')
+        ]:
+            db.session.add(Agendamento(
+                data=data,
+                hora=hora,
+                duracao_minutos=duracao,
+                status=status,
+                psicologo_id=usuario_psicologo.psicologo.id,
+                paciente_id=usuario_paciente.paciente.id
+            ))
+
+        # Série semanal às terças, 14:00
+        db.session.add(SerieAgendamento(
+            regra='semanal',
+            intervalo=1,
+            inicio=datetime(2024, 1, 2, 14, 0),
+            duracao_minutos=60,
+            excecoes=[],
+            psicologo_id=usuario_psicologo.psicologo.id,
+            paciente_id=usuario_paciente.paciente.id
+        ))
+        db.session.commit()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def headers_paciente(client):
+    resposta = client.post('/api/auth/login', json={
+        'nome_usuario': 'paciente_teste',
+        'senha': 'senha123'
+    })
+    return {'Authorization': f"Bearer {json.loads(resposta.data)['token']}"}
+
+@contextmanager
+def contar_consultas(app):
+    # Registra as instruções SQL emitidas enquanto o bloco estiver ativo
+    consultas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+
+    event.listen(engine, 'before_cursor_execute', registrar)
+    try:
+        yield consultas
+    finally:
+        event.remove(engine, 'before_cursor_execute', registrar)
+
+def buscar(client, headers, **parametros):
+    parametros.setdefault('psicologo_id', 1)
+    resposta = client.get('/api/appointments/agendamentos/disponibilidade', query_string=parametros, headers=headers)
+    return resposta.status_code, json.loads(resposta.data)
+
+def test_horarios_livres_do_dia(client, headers_paciente):
+    status, dados = buscar(
+        client, headers_paciente,
+        inicio='2024-01-01', fim='2024-01-01', duracao=60, hora_inicio='08:00', hora_fim='14:00'
+    )
+
+    assert status == 200
+    assert dados['duracao_minutos'] == 60
+    # 09:00-10:00, 10:30-11:20 e 13:00-13:50 (cancelado) ocupados
+    assert [h['hora'] for h in dados['horarios']] == ['08:00', '11:20']
+
+def test_series_e_dias_da_semana(client, headers_paciente):
+    status, dados = buscar(
+        client, headers_paciente,
+        inicio='2024-01-01', fim='2024-01-07', duracao=60, hora_inicio='13:00', hora_fim='16:00'
+    )
+
+    assert status == 200
+    # Segunda com o cancelado das 13:00 e terça com a série das 14:00;
+    # sábado e domingo fora do expediente padrão
+    por_dia = {}
+    for horario in dados['horarios']:
+        por_dia.setdefault(horario['data'], []).append(horario['hora'])
+    assert por_dia == {
+        '2024-01-01': ['13:50', '14:50'],
+        '2024-01-02': ['13:00', '15:00'],
+        '2024-01-03': ['13:00', '14:00', '15:00'],
+        '2024-01-04': ['13:00', '14:00', '15:00'],
+        '2024-01-05': ['13:00', '14:00', '15:00']
+    }
+
+    status, dados = buscar(
+        client, headers_paciente,
+        inicio='2024-01-06', fim='2024-01-07', duracao=60, hora_inicio='13:00', hora_fim='15:00', dias_semana='5'
+    )
+    assert [(h['data'], h['hora']) for h in dados['horarios']] == [('2024-01-06', '13:00'), ('2024-01-06', '14:00')]
+
+def test_horario_livre_pode_ser_agendado(client, headers_paciente):
+    resposta = client.post('/api/auth/login', json={
+        'nome_usuario': 'psicologo_teste',
+        'senha': 'senha123'
+    })
+    headers_psicologo = {'Authorization': f"Bearer {json.loads(resposta.data)['token']}"}
+
+    # Sem psicologo_id, o psicólogo consulta a própria agenda
+    resposta = client.get('/api/appointments/agendamentos/disponibilidade', query_string={
+        'inicio': '2024-01-01', 'fim': '2024-01-01', 'hora_inicio': '13:00', 'hora_fim': '15:00'
+    }, headers=headers_psicologo)
+    horario = json.loads(resposta.data)['horarios'][0]
+    assert horario['hora'] == '13:50'
+
+    resposta = client.post('/api/appointments/agendamentos', json={
+        'data': horario['data'], 'hora': horario['hora'], 'paciente_id': 1
+    }, headers=headers_psicologo)
+    assert resposta.status_code == 201
+
+    # O horário de um agendamento cancelado continua ocupado, como na busca
+    resposta = client.post('/api/appointments/agendamentos', json={
+        'data': '2024-01-01', 'hora': '13:00', 'paciente_id': 1
+    }, headers=headers_psicologo)
+    assert resposta.status_code == 400
+
+def test_janela_de_90_dias_em_consultas_constantes(app, client, headers_paciente):
+    # Agenda cheia: um agendamento por dia útil às 09:00, 11:00 e 15:00
+    with app.app_context():
+        linhas = []
+        dia = datetime(2024, 3, 1)
+        for _ in range(90):
+            if dia.weekday() < 5:
+                for hora in (9, 11, 15):
+                    linhas.append(Agendamento(
+                        inicio=dia.replace(hour=hora), duracao_minutos=50,
+                        status='pendente', psicologo_id=1, paciente_id=1
+                    ))
+            dia += timedelta(days=1)
+        db.session.add_all(linhas)
+        db.session.commit()
+
+    with contar_consultas(app) as consultas:
+        inicio = time.perf_counter()
+        status, dados = buscar(client, headers_paciente, inicio='2024-03-01', fim='2024-05-29')
+        duracao = time.perf_counter() - inicio
+
+    assert status == 200
+    assert len(dados['horarios']) > 0
+    assert not any(h['hora'] in ('09:00', '11:00', '15:00') for h in dados['horarios'])
+    # Psicólogo, agendamentos do período e séries
+    assert len(consultas) == 3
+    assert duracao < 1
+
+@pytest.mark.parametrize('parametros, status_esperado', [
+    ({'psicologo_id': 999}, 404),
+    ({'inicio': '2024-01-01', 'fim': '2025-06-01'}, 400),
+    ({'duracao': 0}, 400),
+    ({'duracao': 'abc'}, 400),
+    ({'hora_inicio': '18:00', 'hora_fim': '08:00'}, 400),
+    ({'hora_inicio': '8h'}, 400),
+    ({'inicio': '01/01/2024'}, 400)
+])
+def test_parametros_invalidos(client, headers_paciente, parametros, status_esperado):
+    status, dados = buscar(client, headers_paciente, **parametros)
+
+    assert status == status_esperado
+    assert 'mensagem' in dados
+
+def test_paciente_sem_psicologo_id(client, headers_paciente):
+    resposta = client.get('/api/appointments/agendamentos/disponibilidade', headers=headers_paciente)
+
+    assert resposta.status_code == 400
@@ -0,0 +1,167 @@
+import pytest
+from app import create_app
+from extensions import db
+from models.usuario import Usuario
+from models.psicologo import Psicologo
+from models.paciente import Paciente
+from models.agendamento import Agendamento
+from models.prontuario_medico import ProntuarioMedico
+from servicos import exportacao
+from sqlalchemy import event
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import pyarrow.parquet as pq
+import csv
+import gzip
+import io
+import json
+
+@contextmanager
+def contar_consultas(app):
+    consultas = []
+    
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+    
+    engine = db.engines[None]
+    event.listen(engine, 'before_cursor_execute', registrar)
+    try:
+        yield consultas
+    finally:
+        event.remove(engine, 'before_cursor_execute', registrar)
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    
+    with app.app_context():
+        db.create_all()
+        
+        # Dois psicólogos, cada um com o seu paciente
+        for indice in (1, 2):
+            usuario_psicologo = Usuario(
+                nome_usuario=f'psicologo{indice}',
+                email=f'psicologo{indice}@teste.com',
+                nome=f'Psicólogo {indice}',
+                tipo_usuario='psicologo'
+            )
+            usuario_psicologo.definir_senha('senha123')
+            usuario_psicologo.psicologo = Psicologo(registro=f'CRP {indice}')
+            
+            usuario_paciente = Usuario(
+                nome_usuario=f'paciente{indice}',
+                email=f'paciente{indice}@teste.com',
+                nome=f'Paciente {indice}',
+                tipo_usuario='paciente'
+            )
+            usuario_paciente.definir_senha('senha123')
+            usuario_paciente.paciente = Paciente()
+            db.session.add_all([usuario_psicologo, usuario_paciente])
+            db.session.flush()
+            
+            # Um agendamento e um prontuário por semana durante 2023 e 2024
+            for semana in range(104):
+                data = datetime(2023, 1, 2, 9, 0) + timedelta(weeks=semana)
+                db.session.add(Agendamento(
+                    inicio=data,
+                    status='concluído',
+                    observacoes='Sessão, com vírgula e "aspas"',
+                    psicologo_id=usuario_psicologo.psicologo.id,
+                    paciente_id=usuario_paciente.paciente.id
+                ))
+                db.session.add(ProntuarioMedico(
+                    data=data.date(),
+                    conteudo=f'Evolução {semana}\nsegunda linha',
+                    psicologo_id=usuario_psicologo.psicologo.id,
+                    paciente_id=usuario_paciente.paciente.id
+                ))
+        db.session.commit()
+    
+    yield app
+    
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def obter_token(client, nome_usuario):
+    resposta = client.post('/api/auth/login', json={
+        'nome_usuario': nome_usuario,
+        'senha': 'senha123'
+    })
+    return json.loads(resposta.data)['token']
+
+def exportar(client, nome_usuario, url, **kwargs):
+    return client.get(url, headers={'Authorization': f'Bearer {obter_token(client, nome_usuario)}'}, **kwargs)
+
+def test_exportar_prontuarios_csv_gzip(client):
+    resposta = exportar(client, 'psicologo1', '/api/medical-records/prontuarios/exportar?inicio=2024-01-01&fim=2024-12-31')
+    
+    assert resposta.status_code == 200
+    assert resposta.mimetype == 'application/gzip'
+    assert 'prontuarios_2024-01-01_2024-12-31.csv.gz' in resposta.headers['Content-Disposition']
+    
+    linhas = list(csv.DictReader(io.StringIO(gzip.decompress(resposta.data).decode('utf-8'))))
+    assert len(linhas) == 52
+    assert {linha['psicologo_id'] for linha in linhas} == {'1'}
+    assert linhas[0]['data'] == '2024-01-01'
+    assert linhas[0]['conteudo'] == 'Evolução 52\nsegunda linha'
+    assert [linha['data'] for linha in linhas] == sorted(linha['data'] for linha in linhas)
+
+def test_exportar_agendamentos_ndjson(client):
+    resposta = exportar(client, 'paciente2', '/api/appointments/agendamentos/exportar?formato=ndjson&compressao=nenhuma')
+    
+    assert resposta.status_code == 200
+    assert resposta.mimetype == 'application/x-ndjson'
+    
+    # O paciente exporta apenas os próprios agendamentos
+    itens = [json.loads(linha) for linha in resposta.data.decode('utf-8').splitlines()]
+    assert len(itens) == 104
+    assert {item['paciente_id'] for item in itens} == {2}
+    assert itens[0]['inicio'] == '2023-01-02T09:00:00'
+    assert itens[0]['observacoes'] == 'Sessão, com vírgula e "aspas"'
+
+def test_exportacao_em_lotes_com_uma_consulta(app, client, monkeypatch):
+    monkeypatch.setattr(exportacao, 'LINHAS_POR_LOTE', 10)
+    token = obter_token(client, 'psicologo1')
+    
+    with contar_consultas(app) as consultas:
+        resposta = client.get('/api/appointments/agendamentos/exportar?compressao=nenhuma', headers={
+            'Authorization': f'Bearer {token}'
+        }, buffered=False)
+        partes = [parte for parte in resposta.response if parte]
+        resposta.close()
+    
+    # Um SELECT lido em lotes: cabeçalho + 104 linhas enviados em 11 partes
+    assert len([consulta for consulta in consultas if 'FROM agendamentos' in consulta]) == 1
+    assert len(partes) == 11
+    assert len(b''.join(partes).decode('utf-8').splitlines()) == 105
+
+def test_exportacao_sem_linhas(client):
+    resposta = exportar(client, 'psicologo1', '/api/medical-records/prontuarios/exportar?inicio=2030-01-01&compressao=nenhuma')
+    
+    assert resposta.status_code == 200
+    assert resposta.data.decode('utf-8').splitlines() == [
+        'id,data,conteudo,paciente_id,psicologo_id,criado_em,atualizado_em'
+    ]
+
+@pytest.mark.parametrize('parametros', ['formato=xlsx', 'compressao=zip', 'inicio=2024-13-01'])
+def test_exportacao_parametros_invalidos(client, parametros):
+    resposta = exportar(client, 'psicologo1', f'/api/medical-records/prontuarios/exportar?{parametros}')
+    assert resposta.status_code == 400
+
+def test_exportar_parquet(client):
+    resposta = exportar(client, 'psicologo2', '/api/medical-records/prontuarios/exportar?formato=parquet&paciente_id=2')
+    
+    assert resposta.status_code == 200
+    tabela = pq.read_table(io.BytesIO(resposta.data))
+    assert tabela.num_rows == 104
+    assert set(tabela.column('psicologo_id').to_pylist()) == {2}
+
+def test_exportar_parquet_sem_pyarrow(client, monkeypatch):
+    monkeypatch.setattr('routes.prontuarios_medicos.parquet_disponivel', lambda: False)
+    
+    resposta = exportar(client, 'psicologo1', '/api/medical-records/prontuarios/exportar?formato=parquet')
+    assert resposta.status_code == 501
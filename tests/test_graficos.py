@@ -0,0 +1,182 @@
+import pytest
+from app import create_app
+from extensions import db
+from models.usuario import Usuario
+from models.psicologo import Psicologo
+from models.paciente import Paciente
+from models.agendamento import Agendamento
+from models.prontuario_medico import ProntuarioMedico
+from servicos import graficos
+import json
+import os
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing')
+    app.extensions['graficos'].diretorio = str(tmp_path / 'graficos')
+
+    with app.app_context():
+        db.create_all()
+
+        # Criar usuário de teste (psicólogo)
+        usuario_psicologo = Usuario(
+            nome_usuario='psicologo_teste',
+            email='psicologo@teste.com',
+            nome='Psicólogo Teste',
+            tipo_usuario='psicologo'
+        )
+        usuario_psicologo.definir_senha('senha123')
+        usuario_psicologo.psicologo = Psicologo(registro='CRP 12345')
+        db.session.add(usuario_psicologo)
+
+        usuario_paciente = Usuario(
+            nome_usuario='paciente_teste',
+            email='paciente@teste.com',
+            nome='Paciente Teste',
+            tipo_usuario='paciente',
+            senha_hash='x'
+        )
+        usuario_paciente.paciente = Paciente()
+        db.session.add(usuario_paciente)
+        db.session.flush()
+
+        db.session.add(Agendamento(
+            data='2024-01-01',
+            hora='09:00',
+            status='concluído',
+            psicologo_id=usuario_psicologo.psicologo.id,
+            paciente_id=usuario_paciente.paciente.id
+        ))
+        db.session.add(ProntuarioMedico(
+            data='2024-01-01',
+            conteudo='Evolução da sessão',
+            psicologo_id=usuario_psicologo.psicologo.id,
+            paciente_id=usuario_paciente.paciente.id
+        ))
+        db.session.commit()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def token_psicologo(client):
+    # Obter token JWT para o psicólogo
+    resposta = client.post('/api/auth/login', json={
+        'nome_usuario': 'psicologo_teste',
+        'senha': 'senha123'
+    })
+
+    dados = json.loads(resposta.data)
+    return dados['token']
+
+@pytest.fixture
+def renderizacoes(monkeypatch):
+    # Conta as renderizações feitas pelo matplotlib
+    chamadas = []
+    renderizar = graficos._renderizar
+
+    def contar(*args):
+        chamadas.append(args)
+        return renderizar(*args)
+
+    monkeypatch.setattr(graficos, '_renderizar', contar)
+    return chamadas
+
+def obter_grafico(client, token, url, etag=None):
+    headers = {'Authorization': f'Bearer {token}'}
+    if etag:
+        headers['If-None-Match'] = etag
+    return client.get(url, headers=headers)
+
+@pytest.mark.parametrize('url', [
+    '/api/analytics/analises/agendamentos/grafico',
+    '/api/analytics/analises/prontuarios/grafico'
+])
+def test_grafico_png(client, token_psicologo, url):
+    resposta = obter_grafico(client, token_psicologo, url)
+
+    assert resposta.status_code == 200
+    assert resposta.mimetype == 'image/png'
+    assert resposta.data.startswith(b'\x89PNG')
+    assert resposta.headers['ETag']
+    assert resposta.headers['Cache-Control'] == 'private, no-cache'
+
+def test_grafico_svg(client, token_psicologo):
+    resposta = obter_grafico(client, token_psicologo, '/api/analytics/analises/agendamentos/grafico?formato=svg')
+
+    assert resposta.status_code == 200
+    assert resposta.mimetype == 'image/svg+xml'
+    assert b'<svg' in resposta.data
+
+def test_grafico_formato_invalido(client, token_psicologo):
+    resposta = obter_grafico(client, token_psicologo, '/api/analytics/analises/agendamentos/grafico?formato=gif')
+
+    assert resposta.status_code == 400
+    assert 'mensagem' in json.loads(resposta.data)
+
+def test_grafico_renderizado_uma_vez(app, client, token_psicologo, renderizacoes):
+    url = '/api/analytics/analises/agendamentos/grafico'
+
+    primeira = obter_grafico(client, token_psicologo, url)
+    segunda = obter_grafico(client, token_psicologo, url)
+
+    # Dados inalterados: imagem lida do disco, com o mesmo ETag
+    assert len(renderizacoes) == 1
+    assert segunda.data == primeira.data
+    assert segunda.headers['ETag'] == primeira.headers['ETag']
+
+    # Revalidação do navegador
+    resposta = obter_grafico(client, token_psicologo, url, etag=primeira.headers['ETag'])
+    assert resposta.status_code == 304
+    assert resposta.data == b''
+    assert len(renderizacoes) == 1
+
+def test_grafico_muda_com_os_dados(app, client, token_psicologo, renderizacoes):
+    url = '/api/analytics/analises/agendamentos/grafico'
+    etag = obter_grafico(client, token_psicologo, url).headers['ETag']
+
+    with app.app_context():
+        agendamento = Agendamento.query.first()
+        agendamento.status = 'cancelado'
+        db.session.commit()
+
+    resposta = obter_grafico(client, token_psicologo, url, etag=etag)
+
+    assert resposta.status_code == 200
+    assert resposta.headers['ETag'] != etag
+    assert len(renderizacoes) == 2
+
+def test_grafico_em_processo_separado(app, client, token_psicologo):
+    # Pool real com um processo
+    pool = app.extensions['graficos'].pool
+    pool.processos = 1
+
+    try:
+        resposta = obter_grafico(client, token_psicologo, '/api/analytics/analises/prontuarios/grafico')
+        assert resposta.status_code == 200
+        assert resposta.data.startswith(b'\x89PNG')
+        assert pool._executor is not None
+    finally:
+        pool.encerrar()
+
+def test_diretorio_limitado_aos_usados_recentemente(tmp_path, monkeypatch):
+    monkeypatch.setattr(graficos, '_renderizar', lambda tipo, dados, formato: b'imagem')
+    diretorio = tmp_path / 'graficos'
+    renderizador = graficos._RenderizadorGraficos(str(diretorio), 0, max_arquivos=2)
+
+    renderizador.obter('a', 'agendamentos', {}, 'png')
+    os.utime(diretorio / 'a.png', (1000, 1000))
+    renderizador.obter('b', 'agendamentos', {}, 'png')
+    os.utime(diretorio / 'b.png', (2000, 2000))
+
+    # A leitura de 'a' o torna o mais recente; ao gravar 'c', 'b' é removido
+    renderizador.obter('a', 'agendamentos', {}, 'png')
+    renderizador.obter('c', 'agendamentos', {}, 'png')
+
+    assert sorted(arquivo.name for arquivo in diretorio.iterdir()) == ['a.png', 'c.png']
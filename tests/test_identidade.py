@@ -0,0 +1,210 @@
+import pytest
+from app import create_app
+from extensions import db
+from models.usuario import Usuario
+from models.psicologo import Psicologo
+from models.paciente import Paciente
+from flask_jwt_extended import create_access_token, decode_token, verify_jwt_in_request
+from servicos.identidade import obter_psicologo, obter_psicologo_id
+from sqlalchemy import event
+from contextlib import contextmanager
+import json
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+
+        # Criar usuário de teste (psicólogo)
+        usuario_psicologo = Usuario(
+            nome_usuario='psicologo_teste',
+            email='psicologo@teste.com',
+            nome='Psicólogo Teste',
+            telefone='11999999999',
+            tipo_usuario='psicologo'
+        )
+        usuario_psicologo.definir_senha('senha123')
+        db.session.add(usuario_psicologo)
+        db.session.commit()
+
+        # Criar registro de psicólogo
+        psicologo = Psicologo(
+            usuario_id=usuario_psicologo.id,
+            registro='CRP 12345',
+            especializacao='Terapia Cognitivo-Comportamental'
+        )
+        db.session.add(psicologo)
+        db.session.commit()
+
+        # Criar usuário de teste (paciente)
+        usuario_paciente = Usuario(
+            nome_usuario='paciente_teste',
+            email='paciente@teste.com',
+            nome='Paciente Teste',
+            telefone='11988888888',
+            tipo_usuario='paciente'
+        )
+        usuario_paciente.definir_senha('senha123')
+        db.session.add(usuario_paciente)
+        db.session.commit()
+
+        # Criar registro de paciente
+        paciente = Paciente(
+            usuario_id=usuario_paciente.id
+        )
+        db.session.add(paciente)
+        db.session.commit()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@contextmanager
+def contar_consultas(app):
+    # Registra as instruções SQL emitidas enquanto o bloco estiver ativo
+    consultas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+
+    event.listen(engine, 'before_cursor_execute', registrar)
+    try:
+        yield consultas
+    finally:
+        event.remove(engine, 'before_cursor_execute', registrar)
+
+def fazer_login(client, nome_usuario):
+    resposta = client.post('/api/auth/login', json={
+        'nome_usuario': nome_usuario,
+        'senha': 'senha123'
+    })
+    return json.loads(resposta.data)['token']
+
+def test_login_inclui_id_do_perfil(app, client):
+    token_psicologo = fazer_login(client, 'psicologo_teste')
+    token_paciente = fazer_login(client, 'paciente_teste')
+
+    with app.app_context():
+        psicologo = Psicologo.query.first()
+        paciente = Paciente.query.first()
+
+        claims = decode_token(token_psicologo)
+        assert claims['tipo_usuario'] == 'psicologo'
+        assert claims['psicologo_id'] == psicologo.id
+
+        claims = decode_token(token_paciente)
+        assert claims['tipo_usuario'] == 'paciente'
+        assert claims['paciente_id'] == paciente.id
+
+def test_rotas_nao_consultam_perfil(app, client):
+    token = fazer_login(client, 'psicologo_teste')
+
+    with contar_consultas(app) as consultas:
+        resposta = client.get('/api/analytics/analises/agendamentos', headers={
+            'Authorization': f'Bearer {token}'
+        })
+
+    assert resposta.status_code == 200
+    assert not [sql for sql in consultas if 'FROM psicologos' in sql]
+
+def test_token_sem_claim_de_perfil(app, client):
+    # Tokens emitidos antes da claim existir continuam válidos
+    with app.app_context():
+        usuario = Usuario.query.filter_by(nome_usuario='psicologo_teste').first()
+        token = create_access_token(identity=usuario.id, additional_claims={'tipo_usuario': 'psicologo'})
+
+    resposta = client.get('/api/appointments/agendamentos', headers={
+        'Authorization': f'Bearer {token}'
+    })
+
+    assert resposta.status_code == 200
+
+def test_perfil_resolvido_uma_vez_por_requisicao(app):
+    with app.app_context():
+        usuario = Usuario.query.filter_by(nome_usuario='psicologo_teste').first()
+        token = create_access_token(identity=usuario.id, additional_claims={'tipo_usuario': 'psicologo'})
+
+    with contar_consultas(app) as consultas:
+        with app.test_request_context(headers={'Authorization': f'Bearer {token}'}):
+            verify_jwt_in_request()
+
+            assert obter_psicologo_id() == obter_psicologo_id()
+            assert obter_psicologo() is obter_psicologo()
+
+    # Uma consulta para o id (sem claim no token) e outra para o perfil completo
+    assert len(consultas) == 2
+
+def test_memo_separado_por_token(app):
+    # Requisições de usuários diferentes no mesmo contexto de aplicação (e no mesmo g)
+    with app.app_context():
+        tokens = [
+            create_access_token(identity=usuario_id, additional_claims={
+                'tipo_usuario': 'psicologo',
+                'psicologo_id': psicologo_id
+            })
+            for usuario_id, psicologo_id in ((1, 1), (3, 2))
+        ]
+
+        for token, psicologo_id in zip(tokens, (1, 2)):
+            with app.test_request_context(headers={'Authorization': f'Bearer {token}'}):
+                verify_jwt_in_request()
+
+                assert obter_psicologo_id() == psicologo_id
+
+def test_escrita_com_token_de_perfil_excluido(app, client):
+    # O token continua válido depois da exclusão do perfil do psicólogo
+    token = fazer_login(client, 'psicologo_teste')
+    headers = {'Authorization': f'Bearer {token}'}
+
+    with app.app_context():
+        paciente_id = Paciente.query.first().id
+        db.session.delete(Psicologo.query.first())
+        db.session.commit()
+
+    respostas = [
+        client.post('/api/appointments/agendamentos', headers=headers, json={
+            'data': '2030-01-07', 'hora': '14:00', 'paciente_id': paciente_id
+        }),
+        client.post('/api/appointments/agendamentos/lote', headers=headers, json={
+            'agendamentos': [{'data': '2030-01-08', 'hora': '14:00', 'paciente_id': paciente_id}]
+        }),
+        client.post('/api/appointments/series', headers=headers, json={
+            'data': '2030-01-09', 'hora': '14:00', 'paciente_id': paciente_id
+        }),
+        client.post('/api/medical-records/prontuarios', headers=headers, json={
+            'data': '2030-01-07', 'conteudo': 'Sessão', 'paciente_id': paciente_id
+        })
+    ]
+
+    assert [resposta.status_code for resposta in respostas] == [404] * 4
+    assert all(resposta.get_json()['mensagem'] == 'Psicólogo não encontrado' for resposta in respostas)
+
+    # Nenhuma linha gravada apontando para o perfil excluído
+    with app.app_context():
+        for tabela in ('agendamentos', 'series_agendamentos', 'prontuarios_medicos'):
+            assert db.session.execute(db.text(f'SELECT COUNT(*) FROM {tabela}')).scalar() == 0
+
+def test_confirmacao_do_perfil_uma_vez_por_requisicao(app, client):
+    token = fazer_login(client, 'psicologo_teste')
+
+    with contar_consultas(app) as consultas:
+        with app.test_request_context(headers={'Authorization': f'Bearer {token}'}):
+            verify_jwt_in_request()
+
+            # Leituras usam a claim; a confirmação no banco acontece uma única vez
+            psicologo_id = obter_psicologo_id()
+            assert consultas == []
+            assert obter_psicologo_id(confirmar=True) == psicologo_id
+            assert obter_psicologo_id(confirmar=True) == psicologo_id
+
+    assert len([sql for sql in consultas if 'FROM psicologos' in sql]) == 1
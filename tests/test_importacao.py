@@ -0,0 +1,182 @@
+import pytest
+from app import create_app
+from extensions import db
+from models.usuario import Usuario
+from models.psicologo import Psicologo
+from models.paciente import Paciente
+from servicos.importacao import importar_pacientes
+from sqlalchemy import event
+from contextlib import contextmanager
+import openpyxl
+import io
+import json
+
+@contextmanager
+def contar_consultas(app):
+    consultas = []
+    
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+    
+    engine = db.engines[None]
+    event.listen(engine, 'before_cursor_execute', registrar)
+    try:
+        yield consultas
+    finally:
+        event.remove(engine, 'before_cursor_execute', registrar)
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    
+    with app.app_context():
+        db.create_all()
+        
+        # Criar usuário de teste (psicólogo)
+        usuario_psicologo = Usuario(
+            nome_usuario='psicologo_teste',
+            email='psicologo@teste.com',
+            nome='Psicólogo Teste',
+            tipo_usuario='psicologo'
+        )
+        usuario_psicologo.definir_senha('senha123')
+        usuario_psicologo.psicologo = Psicologo(registro='CRP 12345')
+        
+        # Paciente já cadastrado
+        usuario_paciente = Usuario(
+            nome_usuario='paciente_existente',
+            email='existente@teste.com',
+            nome='Paciente Existente',
+            tipo_usuario='paciente'
+        )
+        usuario_paciente.definir_senha('senha123')
+        usuario_paciente.paciente = Paciente()
+        db.session.add_all([usuario_psicologo, usuario_paciente])
+        db.session.commit()
+    
+    yield app
+    
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def token_psicologo(client):
+    resposta = client.post('/api/auth/login', json={
+        'nome_usuario': 'psicologo_teste',
+        'senha': 'senha123'
+    })
+    return json.loads(resposta.data)['token']
+
+def gerar_csv(quantidade, extras=()):
+    linhas = ['nome_usuario,email,nome,telefone,senha']
+    linhas += [f'paciente{i},paciente{i}@teste.com,Paciente {i},1199999{i:04d},senha{i}' for i in range(quantidade)]
+    linhas += list(extras)
+    return '\n'.join(linhas) + '\n'
+
+def test_importar_pacientes_em_blocos(app):
+    conteudo = gerar_csv(25)
+    
+    with app.app_context():
+        with contar_consultas(app) as consultas:
+            relatorio = importar_pacientes(io.StringIO(conteudo), 'pacientes.csv', linhas_por_bloco=10)
+        
+        assert relatorio == {'linhas': 25, 'importados': 25, 'erros': []}
+        
+        # Por bloco: uma consulta de duplicados, duas inserções e a leitura dos ids
+        selects = [c for c in consultas if c.startswith('SELECT')]
+        inserts = [c for c in consultas if c.startswith('INSERT')]
+        assert len(selects) == 3 * 2
+        assert len(inserts) == 3 * 2
+        
+        usuario = Usuario.query.filter_by(nome_usuario='paciente7').first()
+        assert usuario.tipo_usuario == 'paciente'
+        assert usuario.paciente is not None
+        assert usuario.telefone == '11999990007'
+        assert usuario.verificar_senha('senha7')
+
+def test_relatorio_de_erros_por_linha(app):
+    conteudo = gerar_csv(3, extras=[
+        'paciente_existente,novo@teste.com,Repetido no banco,,senha',
+        'novo,existente@teste.com,Email repetido no banco,,senha',
+        'paciente1,outro@teste.com,Repetido no arquivo,,senha',
+        ',sem_usuario@teste.com,Sem nome de usuário,,senha',
+        'sem_senha,sem_senha@teste.com,Sem senha,,',
+        f"{'x' * 65},longo@teste.com,Nome de usuário longo,,senha"
+    ])
+    
+    with app.app_context():
+        relatorio = importar_pacientes(io.StringIO(conteudo), 'pacientes.csv', linhas_por_bloco=4)
+        
+        assert relatorio['linhas'] == 9
+        assert relatorio['importados'] == 3
+        assert relatorio['erros'] == [
+            {'linha': 5, 'mensagem': 'Nome de usuário já existe'},
+            {'linha': 6, 'mensagem': 'Email já está em uso'},
+            {'linha': 7, 'mensagem': 'Nome de usuário já existe'},
+            {'linha': 8, 'mensagem': 'Campo nome_usuario é obrigatório'},
+            {'linha': 9, 'mensagem': 'Campo senha é obrigatório'},
+            {'linha': 10, 'mensagem': 'Campo nome_usuario deve ter no máximo 64 caracteres'}
+        ]
+        assert Usuario.query.filter_by(tipo_usuario='paciente').count() == 4
+
+def test_repetido_no_mesmo_bloco(app):
+    conteudo = gerar_csv(2, extras=['paciente0,outro@teste.com,Repetido,,senha'])
+    
+    with app.app_context():
+        relatorio = importar_pacientes(io.StringIO(conteudo), 'pacientes.csv')
+        
+        assert relatorio['importados'] == 2
+        assert relatorio['erros'] == [{'linha': 4, 'mensagem': 'Nome de usuário ou email repetido no arquivo'}]
+
+def test_endpoint_importar(client, token_psicologo):
+    resposta = client.post('/api/users/pacientes/importar', data={
+        'arquivo': (io.BytesIO(gerar_csv(5).encode('utf-8')), 'pacientes.csv')
+    }, headers={'Authorization': f'Bearer {token_psicologo}'}, content_type='multipart/form-data')
+    
+    assert resposta.status_code == 201
+    assert json.loads(resposta.data) == {'linhas': 5, 'importados': 5, 'erros': []}
+    
+    # Pacientes importados conseguem fazer login com a senha inicial
+    resposta = client.post('/api/auth/login', json={'nome_usuario': 'paciente3', 'senha': 'senha3'})
+    assert resposta.status_code == 200
+
+@pytest.mark.parametrize('conteudo, nome, mensagem', [
+    (b'nome_usuario,email\na,a@teste.com\n', 'pacientes.csv', 'Colunas obrigatórias ausentes: nome, senha'),
+    (b'', 'pacientes.csv', 'Arquivo vazio'),
+    (b'nome_usuario', 'pacientes.txt', 'Arquivo deve estar no formato CSV ou XLSX')
+])
+def test_endpoint_arquivo_invalido(client, token_psicologo, conteudo, nome, mensagem):
+    resposta = client.post('/api/users/pacientes/importar', data={
+        'arquivo': (io.BytesIO(conteudo), nome)
+    }, headers={'Authorization': f'Bearer {token_psicologo}'}, content_type='multipart/form-data')
+    
+    assert resposta.status_code == 400
+    assert json.loads(resposta.data)['mensagem'] == mensagem
+
+def test_importar_xlsx(app):
+    planilha = openpyxl.Workbook()
+    planilha.active.append(['nome_usuario', 'email', 'nome', 'telefone', 'senha'])
+    planilha.active.append(['paciente_xlsx', 'xlsx@teste.com', 'Paciente XLSX', 11977776666, 'senha'])
+    arquivo = io.BytesIO()
+    planilha.save(arquivo)
+    arquivo.seek(0)
+    
+    with app.app_context():
+        relatorio = importar_pacientes(arquivo, 'pacientes.xlsx')
+        
+        assert relatorio == {'linhas': 1, 'importados': 1, 'erros': []}
+        assert Usuario.query.filter_by(nome_usuario='paciente_xlsx').first().telefone == '11977776666'
+
+def test_comando_importar_pacientes(app, tmp_path):
+    arquivo = tmp_path / 'pacientes.csv'
+    arquivo.write_text(gerar_csv(3, extras=['paciente_existente,x@teste.com,Repetido,,senha']), encoding='utf-8')
+    
+    resultado = app.test_cli_runner().invoke(args=['importar-pacientes', str(arquivo)])
+    
+    assert resultado.exit_code == 0
+    assert '3 de 4 pacientes importados' in resultado.output
+    assert 'Linha 5: Nome de usuário já existe' in resultado.output
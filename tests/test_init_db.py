@@ -0,0 +1,85 @@
+import pytest
+from app import create_app
+from extensions import db, senhas
+from models import Usuario, Psicologo, Paciente, Agendamento, ProntuarioMedico, ResumoAgendamentosDia
+from init_db import gerar_dados_sinteticos
+from sqlalchemy import func
+from datetime import date, datetime
+
+HOJE = date(2024, 6, 30)
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    
+    with app.app_context():
+        db.create_all()
+    
+    yield app
+    
+    with app.app_context():
+        db.drop_all()
+
+def gerar(app, **parametros):
+    with app.app_context():
+        totais = gerar_dados_sinteticos(3, 5, anos=1, hoje=HOJE, **parametros)
+        agendamentos = db.session.query(
+            Agendamento.inicio, Agendamento.status, Agendamento.psicologo_id, Agendamento.paciente_id
+        ).order_by(Agendamento.id).all()
+        prontuarios = db.session.query(ProntuarioMedico.data, ProntuarioMedico.conteudo).order_by(ProntuarioMedico.id).all()
+    return totais, agendamentos, prontuarios
+
+def test_gerar_dados_sinteticos(app):
+    totais, agendamentos, prontuarios = gerar(app)
+    
+    # 15 pacientes com uma sessão por semana: 52 semanas passadas e 4 futuras
+    assert totais == {'psicologos': 3, 'pacientes': 15, 'agendamentos': 15 * 56, 'prontuarios': len(prontuarios)}
+    assert len(agendamentos) == 15 * 56
+    
+    # Horários sem conflito na agenda de cada psicólogo, em ordem cronológica
+    assert len({(psicologo_id, inicio) for inicio, _, psicologo_id, _ in agendamentos}) == len(agendamentos)
+    assert [inicio for inicio, _, _, _ in agendamentos] == sorted(inicio for inicio, _, _, _ in agendamentos)
+    
+    agora = datetime(2024, 6, 30)
+    assert {status for inicio, status, _, _ in agendamentos if inicio < agora} == {'concluído', 'cancelado'}
+    assert {status for inicio, status, _, _ in agendamentos if inicio >= agora} == {'confirmado', 'pendente'}
+    
+    concluidos = sum(status == 'concluído' for _, status, _, _ in agendamentos)
+    assert 0 < len(prontuarios) <= concluidos
+    assert all(100 <= len(conteudo) <= 800 for _, conteudo in prontuarios)
+
+def test_geracao_deterministica(app):
+    _, agendamentos, prontuarios = gerar(app, semente=7)
+    
+    outra = create_app('testing')
+    with outra.app_context():
+        db.create_all()
+    _, outros_agendamentos, outros_prontuarios = gerar(outra, semente=7)
+    
+    assert agendamentos == outros_agendamentos
+    assert prontuarios == outros_prontuarios
+
+def test_senha_com_hash_unico_e_resumos(app, monkeypatch):
+    chamadas = []
+    gerar_hash = senhas.gerar_hash
+    monkeypatch.setattr(senhas, 'gerar_hash', lambda senha: chamadas.append(senha) or gerar_hash(senha))
+    
+    gerar(app, tamanho_prontuario=(10, 20))
+    
+    assert chamadas == ['senha123']
+    with app.app_context():
+        # Todos os usuários gerados compartilham o hash e conseguem entrar
+        assert db.session.query(func.count(func.distinct(Usuario.senha_hash))).scalar() == 1
+        nome_usuario = db.session.query(Usuario.nome_usuario).join(Psicologo).first()[0]
+        
+        # Resumos das análises recalculados após as inserções em massa
+        assert db.session.query(func.sum(ResumoAgendamentosDia.total)).scalar() == Agendamento.query.count()
+    
+    resposta = app.test_client().post('/api/auth/login', json={'nome_usuario': nome_usuario, 'senha': 'senha123'})
+    assert resposta.status_code == 200
+
+def test_pacientes_acima_dos_horarios_da_semana(app):
+    with app.app_context():
+        with pytest.raises(ValueError):
+            gerar_dados_sinteticos(1, 100, hoje=HOJE)
+        assert Paciente.query.count() == 0
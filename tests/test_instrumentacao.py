@@ -0,0 +1,122 @@
+import pytest
+from app import create_app
+from config import config, TestingConfig
+from extensions import db
+from models.usuario import Usuario
+from models.psicologo import Psicologo
+from servicos.instrumentacao import formato_parametros, _antes_da_consulta
+from sqlalchemy import event
+from datetime import date
+import json
+import logging
+
+class InstrumentacaoConfig(TestingConfig):
+    SQL_INSTRUMENTACAO = True
+    SQL_CONSULTA_LENTA_MS = 100
+    SQL_MAIS_LENTAS = 2
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setitem(config, 'instrumentacao', InstrumentacaoConfig)
+    app = create_app('instrumentacao')
+    
+    with app.app_context():
+        db.create_all()
+        
+        # Criar usuário de teste (psicólogo)
+        usuario_psicologo = Usuario(
+            nome_usuario='psicologo_teste',
+            email='psicologo@teste.com',
+            nome='Psicólogo Teste',
+            tipo_usuario='psicologo'
+        )
+        usuario_psicologo.definir_senha('senha123')
+        usuario_psicologo.psicologo = Psicologo(registro='CRP 12345')
+        db.session.add(usuario_psicologo)
+        db.session.commit()
+    
+    yield app
+    
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def login(client):
+    return client.post('/api/auth/login', json={
+        'nome_usuario': 'psicologo_teste',
+        'senha': 'senha123'
+    })
+
+def linhas_requisicao(caplog):
+    return [
+        json.loads(registro.getMessage()) for registro in caplog.records
+        if registro.name == 'servicos.instrumentacao' and registro.levelno == logging.INFO
+    ]
+
+def test_server_timing_e_log_da_requisicao(app, client, caplog):
+    consultas = []
+    event.listen(db.engines[None], 'before_cursor_execute', lambda *args: consultas.append(1))
+    
+    with caplog.at_level(logging.INFO, logger='servicos.instrumentacao'):
+        resposta = login(client)
+        token = resposta.get_json()['token']
+        consultas_login = len(consultas)
+        resposta_lista = client.get('/api/appointments/agendamentos/7', headers={'Authorization': f'Bearer {token}'})
+    
+    assert resposta.status_code == 200
+    server_timing = resposta.headers['Server-Timing']
+    assert f'desc="{consultas_login} consultas"' in server_timing
+    assert server_timing.startswith('db;dur=') and ', app;dur=' in server_timing
+    
+    # Uma linha JSON por requisição, com a regra da rota (sem ids) e as mais lentas
+    linha_login, linha_agendamento = linhas_requisicao(caplog)
+    assert linha_login['metodo'] == 'POST'
+    assert linha_login['rota'] == '/api/auth/login'
+    assert linha_login['status'] == 200
+    assert linha_login['consultas'] == consultas_login
+    assert linha_login['tempo_db_ms'] <= linha_login['tempo_total_ms']
+    assert len(linha_login['mais_lentas']) == min(consultas_login, 2)
+    assert all(lenta['sql'].startswith('SELECT') for lenta in linha_login['mais_lentas'])
+    
+    assert resposta_lista.status_code == 404
+    assert linha_agendamento['rota'] == '/api/appointments/agendamentos/<int:agendamento_id>'
+    assert linha_agendamento['status'] == 404
+
+def test_consulta_lenta_sem_valores_dos_parametros(app, client, caplog, monkeypatch):
+    monkeypatch.setattr(app.extensions['instrumentacao_sql'], 'consulta_lenta', 0)
+    
+    with caplog.at_level(logging.WARNING, logger='servicos.instrumentacao'):
+        assert login(client).status_code == 200
+    
+    lentas = [registro.getMessage() for registro in caplog.records if registro.levelno == logging.WARNING]
+    assert lentas
+    assert any('FROM usuarios' in mensagem and '"str"' in mensagem for mensagem in lentas)
+    assert not any('psicologo_teste' in mensagem for mensagem in lentas)
+
+def test_consultas_fora_de_requisicao_nao_contadas(app, client):
+    with app.app_context():
+        assert Usuario.query.count() == 1
+    
+    # O contador da próxima requisição começa do zero
+    resposta = client.get('/api/health')
+    assert 'desc="0 consultas"' in resposta.headers['Server-Timing']
+
+def test_instrumentacao_desativada():
+    app = create_app('testing')
+    
+    assert 'instrumentacao_sql' not in app.extensions
+    with app.app_context():
+        assert not event.contains(db.engines[None], 'before_cursor_execute', _antes_da_consulta)
+    assert 'Server-Timing' not in app.test_client().get('/api/health').headers
+
+def test_formato_parametros():
+    assert formato_parametros({'id_1': 7, 'data_1': date(2024, 1, 1), 'obs': None}) == {
+        'id_1': 'int', 'data_1': 'date', 'obs': 'NoneType'
+    }
+    assert formato_parametros(('Maria', 3)) == ['str', 'int']
+    assert formato_parametros([('a', 1), ('b', 2), ('c', 3)], executemany=True) == {
+        'linhas': 3, 'formato': ['str', 'int']
+    }
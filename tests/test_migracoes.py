@@ -0,0 +1,149 @@
+import os
+import pytest
+from datetime import datetime, date
+from flask_migrate import upgrade
+from sqlalchemy import inspect, select, text
+from app import create_app
+from config import config, TestingConfig
+from extensions import db
+from models.psicologo import Psicologo
+from models.paciente import Paciente
+from models.agendamento import Agendamento
+from models.prontuario_medico import ProntuarioMedico
+from models.resumo_analitico import ResumoAgendamentosDia, ResumoAgendamentosPaciente, ResumoProntuariosMes
+
+DIRETORIO_MIGRACOES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # As migrações precisam de um banco em arquivo (cada conexão do Alembic é nova)
+    class MigracaoConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'migracoes.db'}"
+
+    monkeypatch.setitem(config, 'migracao', MigracaoConfig)
+    app = create_app('migracao')
+
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+def plano_de_execucao(consulta):
+    # EXPLAIN QUERY PLAN da consulta compilada com os valores literais
+    sql = str(consulta.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    linhas = db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}')).all()
+    return ' | '.join(linha[-1] for linha in linhas)
+
+def test_migracoes_criam_indices(app):
+    with app.app_context():
+        upgrade(directory=DIRETORIO_MIGRACOES)
+        inspetor = inspect(db.engine)
+
+        indices = {i['name']: i for i in inspetor.get_indexes('psicologos')}
+        assert indices['ix_psicologos_usuario_id']['unique']
+
+        indices = {i['name']: i for i in inspetor.get_indexes('pacientes')}
+        assert indices['ix_pacientes_usuario_id']['unique']
+
+        indices = {i['name']: i['column_names'] for i in inspetor.get_indexes('agendamentos')}
+        assert indices['ix_agendamentos_psicologo_inicio'] == ['psicologo_id', 'inicio']
+        assert indices['ix_agendamentos_paciente_inicio'] == ['paciente_id', 'inicio']
+        assert indices['ix_agendamentos_serie_id'] == ['serie_id']
+
+        indices = {i['name']: i['column_names'] for i in inspetor.get_indexes('series_agendamentos')}
+        assert indices['ix_series_agendamentos_psicologo_inicio'] == ['psicologo_id', 'inicio']
+        assert indices['ix_series_agendamentos_paciente_inicio'] == ['paciente_id', 'inicio']
+
+        indices = {i['name']: i['column_names'] for i in inspetor.get_indexes('prontuarios_medicos')}
+        assert indices['ix_prontuarios_psicologo_paciente_data'] == ['psicologo_id', 'paciente_id', 'data']
+
+def test_planejador_usa_indices(app):
+    with app.app_context():
+        upgrade(directory=DIRETORIO_MIGRACOES)
+
+        plano = plano_de_execucao(select(Psicologo).filter_by(usuario_id=1))
+        assert 'ix_psicologos_usuario_id' in plano
+
+        plano = plano_de_execucao(select(Paciente).filter_by(usuario_id=1))
+        assert 'ix_pacientes_usuario_id' in plano
+
+        plano = plano_de_execucao(
+            select(Agendamento).filter_by(psicologo_id=1, inicio=datetime(2024, 1, 1, 9, 0))
+        )
+        assert 'ix_agendamentos_psicologo_inicio' in plano
+
+        # Intervalo de datas ("próximos 7 dias") usa o mesmo índice
+        plano = plano_de_execucao(
+            select(Agendamento).filter(
+                Agendamento.psicologo_id == 1,
+                Agendamento.inicio >= datetime(2024, 1, 1),
+                Agendamento.inicio < datetime(2024, 1, 8)
+            )
+        )
+        assert 'ix_agendamentos_psicologo_inicio' in plano
+
+        plano = plano_de_execucao(
+            select(Agendamento).filter_by(paciente_id=1).order_by(Agendamento.inicio)
+        )
+        assert 'ix_agendamentos_paciente_inicio' in plano
+
+        plano = plano_de_execucao(
+            select(ProntuarioMedico).filter_by(psicologo_id=1, paciente_id=2)
+        )
+        assert 'ix_prontuarios_psicologo_paciente_data' in plano
+
+def inserir_dados_legados(agendamentos, prontuarios):
+    # Linhas no formato anterior à revisão 0003 (data e hora como texto)
+    db.session.execute(text(
+        "INSERT INTO usuarios (id, nome_usuario, senha_hash, email, nome, tipo_usuario) "
+        "VALUES (1, 'psi', 'x', 'psi@teste.com', 'Psi', 'psicologo'), "
+        "(2, 'pac', 'x', 'pac@teste.com', 'Pac', 'paciente')"
+    ))
+    db.session.execute(text("INSERT INTO psicologos (id, usuario_id, registro) VALUES (1, 1, 'CRP')"))
+    db.session.execute(text("INSERT INTO pacientes (id, usuario_id) VALUES (1, 2)"))
+    for data, hora in agendamentos:
+        db.session.execute(text(
+            "INSERT INTO agendamentos (data, hora, status, psicologo_id, paciente_id) "
+            "VALUES (:data, :hora, 'pendente', 1, 1)"
+        ), {'data': data, 'hora': hora})
+    for data in prontuarios:
+        db.session.execute(text(
+            "INSERT INTO prontuarios_medicos (data, conteudo, psicologo_id, paciente_id) "
+            "VALUES (:data, 'Sessão', 1, 1)"
+        ), {'data': data})
+    db.session.commit()
+
+def test_migracao_converte_datas_existentes(app):
+    with app.app_context():
+        upgrade(directory=DIRETORIO_MIGRACOES, revision='0002')
+        inserir_dados_legados([('2024-01-01', '09:30'), ('2024-02-29', '18:00')], ['2024-03-05'])
+
+        upgrade(directory=DIRETORIO_MIGRACOES)
+
+        agendamentos = Agendamento.query.order_by(Agendamento.id).all()
+        assert [a.inicio for a in agendamentos] == [datetime(2024, 1, 1, 9, 30), datetime(2024, 2, 29, 18, 0)]
+        assert agendamentos[0].data == '2024-01-01'
+        assert agendamentos[0].hora == '09:30'
+        assert ProntuarioMedico.query.one().data == date(2024, 3, 5)
+
+        # Resumos das análises preenchidos pela revisão 0005
+        assert {(r.dia, r.status, r.total) for r in ResumoAgendamentosDia.query} == {
+            (date(2024, 1, 1), 'pendente', 1), (date(2024, 2, 29), 'pendente', 1)
+        }
+        assert ResumoAgendamentosPaciente.query.one().total == 2
+        assert ResumoProntuariosMes.query.one().mes == '2024-03'
+
+def test_migracao_interrompida_com_datas_invalidas(app):
+    with app.app_context():
+        upgrade(directory=DIRETORIO_MIGRACOES, revision='0002')
+        inserir_dados_legados([('2024-01-01', '09:30'), ('01/02/2024', '10:00')], [])
+
+        # O Flask-Migrate registra o erro da migração e encerra com código 1
+        with pytest.raises(SystemExit):
+            upgrade(directory=DIRETORIO_MIGRACOES)
+
+        # O esquema antigo permanece intacto
+        colunas = {c['name'] for c in inspect(db.engine).get_columns('agendamentos')}
+        assert {'data', 'hora'} <= colunas
+        assert 'inicio' not in colunas
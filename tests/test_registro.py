@@ -0,0 +1,151 @@
+import pytest
+from app import create_app
+from extensions import db
+from models.usuario import Usuario
+from models.psicologo import Psicologo
+from models.paciente import Paciente
+from sqlalchemy import event
+from contextlib import contextmanager
+import json
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+
+        # Criar usuário de teste (paciente)
+        usuario_paciente = Usuario(
+            nome_usuario='paciente_teste',
+            email='paciente@teste.com',
+            nome='Paciente Teste',
+            telefone='11988888888',
+            tipo_usuario='paciente'
+        )
+        usuario_paciente.definir_senha('senha123')
+        usuario_paciente.paciente = Paciente()
+        db.session.add(usuario_paciente)
+        db.session.commit()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@contextmanager
+def contar_consultas(app):
+    # Registra as instruções SQL e os commits emitidos enquanto o bloco estiver ativo
+    consultas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+
+    def registrar_commit(conn):
+        consultas.append('COMMIT')
+
+    with app.app_context():
+        engine = db.engine
+
+    event.listen(engine, 'before_cursor_execute', registrar)
+    event.listen(engine, 'commit', registrar_commit)
+    try:
+        yield consultas
+    finally:
+        event.remove(engine, 'before_cursor_execute', registrar)
+        event.remove(engine, 'commit', registrar_commit)
+
+def dados_psicologo(**alteracoes):
+    dados = {
+        'nome_usuario': 'novo_psicologo',
+        'senha': 'senha123',
+        'email': 'psicologo@teste.com',
+        'nome': 'Novo Psicólogo',
+        'telefone': '11966666666',
+        'tipo_usuario': 'psicologo',
+        'registro': 'CRP 54321',
+        'especializacao': 'Psicanálise'
+    }
+    dados.update(alteracoes)
+    return dados
+
+def test_registro_em_uma_transacao(app, client):
+    with contar_consultas(app) as consultas:
+        resposta = client.post('/api/auth/registro', json=dados_psicologo())
+
+    assert resposta.status_code == 201
+    assert consultas.count('COMMIT') == 1
+    assert len([sql for sql in consultas if sql.startswith('SELECT')]) == 1
+    assert len([sql for sql in consultas if sql.startswith('INSERT')]) == 2
+
+    with app.app_context():
+        usuario = db.session.get(Usuario, json.loads(resposta.data)['id'])
+        assert usuario.psicologo.registro == 'CRP 54321'
+
+def test_registro_paciente_cria_perfil(app, client):
+    resposta = client.post('/api/auth/registro', json=dados_psicologo(
+        nome_usuario='novo_paciente', email='novo@teste.com', tipo_usuario='paciente'
+    ))
+
+    assert resposta.status_code == 201
+
+    with app.app_context():
+        usuario = db.session.get(Usuario, json.loads(resposta.data)['id'])
+        assert usuario.paciente is not None
+
+def test_registro_psicologo_sem_crp_nao_deixa_usuario(app, client):
+    dados = dados_psicologo()
+    del dados['registro']
+
+    with contar_consultas(app) as consultas:
+        resposta = client.post('/api/auth/registro', json=dados)
+
+    assert resposta.status_code == 400
+    assert 'Registro (CRP)' in json.loads(resposta.data)['mensagem']
+    assert consultas == []
+
+    with app.app_context():
+        assert Usuario.query.filter_by(nome_usuario='novo_psicologo').first() is None
+        assert Psicologo.query.count() == 0
+
+@pytest.mark.parametrize('alteracoes, mensagem', [
+    ({'nome_usuario': 'paciente_teste'}, 'Nome de usuário já existe'),
+    ({'email': 'paciente@teste.com'}, 'Email já está em uso'),
+    ({'nome_usuario': 'paciente_teste', 'email': 'paciente@teste.com'}, 'Nome de usuário já existe')
+])
+def test_registro_duplicado(app, client, alteracoes, mensagem):
+    resposta = client.post('/api/auth/registro', json=dados_psicologo(**alteracoes))
+
+    assert resposta.status_code == 400
+    assert json.loads(resposta.data)['mensagem'] == mensagem
+
+    with app.app_context():
+        assert Usuario.query.count() == 1
+
+def test_registro_concorrente_desfeito(app, client, monkeypatch):
+    # Outro registro com o mesmo email é gravado depois da verificação
+    def registrar_concorrente(usuario, senha):
+        usuario.senha_hash = 'x'
+        db.session.add(Usuario(
+            nome_usuario='concorrente',
+            email='psicologo@teste.com',
+            nome='Concorrente',
+            tipo_usuario='paciente',
+            senha_hash='x'
+        ))
+        db.session.commit()
+
+    monkeypatch.setattr(Usuario, 'definir_senha', registrar_concorrente)
+
+    resposta = client.post('/api/auth/registro', json=dados_psicologo())
+
+    assert resposta.status_code == 400
+    assert 'já está em uso' in json.loads(resposta.data)['mensagem']
+
+    with app.app_context():
+        assert Usuario.query.filter_by(nome_usuario='novo_psicologo').first() is None
+        assert Psicologo.query.count() == 0
@@ -0,0 +1,149 @@
+import pytest
+from app import create_app
+from extensions import db
+from models.usuario import Usuario
+from models.psicologo import Psicologo
+from models.paciente import Paciente
+from models.agendamento import Agendamento
+from models.prontuario_medico import ProntuarioMedico
+import json
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+
+        # Criar usuário de teste (psicólogo)
+        usuario_psicologo = Usuario(
+            nome_usuario='psicologo_teste',
+            email='psicologo@teste.com',
+            nome='Psicólogo Teste',
+            telefone='11999999999',
+            tipo_usuario='psicologo'
+        )
+        usuario_psicologo.definir_senha('senha123')
+        usuario_psicologo.psicologo = Psicologo(registro='CRP 12345')
+        db.session.add(usuario_psicologo)
+
+        pacientes = []
+        for i in range(2):
+            usuario_paciente = Usuario(
+                nome_usuario=f'paciente_{i}',
+                email=f'paciente_{i}@teste.com',
+                nome=f'Paciente {i}',
+                tipo_usuario='paciente',
+                senha_hash='x'
+            )
+            usuario_paciente.paciente = Paciente()
+            db.session.add(usuario_paciente)
+            pacientes.append(usuario_paciente.paciente)
+        db.session.flush()
+
+        # 2024-01-01 é segunda-feira
+        agendamentos = [
+            ('2024-01-01', '09:00', 'concluído', 0),
+            ('2024-01-08', '09:00', 'cancelado', 0),
+            ('2024-01-15', '09:00', 'concluído', 0),
+            ('2024-01-29', '09:00', 'concluído', 0),
+            ('2024-02-06', '14:00', 'pendente', 1)
+        ]
+        for data, hora, status, paciente in agendamentos:
+            db.session.add(Agendamento(
+                data=data,
+                hora=hora,
+                status=status,
+                psicologo_id=usuario_psicologo.psicologo.id,
+                paciente_id=pacientes[paciente].id
+            ))
+
+        for data in ['2024-01-01', '2024-03-10']:
+            db.session.add(ProntuarioMedico(
+                data=data,
+                conteudo='Evolução da sessão',
+                psicologo_id=usuario_psicologo.psicologo.id,
+                paciente_id=pacientes[0].id
+            ))
+        db.session.commit()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def token_psicologo(client):
+    # Obter token JWT para o psicólogo
+    resposta = client.post('/api/auth/login', json={
+        'nome_usuario': 'psicologo_teste',
+        'senha': 'senha123'
+    })
+
+    dados = json.loads(resposta.data)
+    return dados['token']
+
+def obter_relatorios(client, token, parametros=''):
+    return client.get(f'/api/analytics/analises/relatorios{parametros}', headers={
+        'Authorization': f'Bearer {token}'
+    })
+
+def test_relatorios(client, token_psicologo):
+    resposta = obter_relatorios(client, token_psicologo, '?janela=7')
+    dados = json.loads(resposta.data)
+
+    assert resposta.status_code == 200
+
+    serie = {ponto['data']: ponto['taxa'] for ponto in dados['taxa_comparecimento_movel']['serie']}
+    assert dados['taxa_comparecimento_movel']['janela_dias'] == 7
+    assert min(serie) == '2024-01-01' and max(serie) == '2024-02-06'
+    assert serie['2024-01-01'] == 100.0
+    assert serie['2024-01-08'] == 0.0
+    assert serie['2024-01-15'] == 100.0
+    # Sem concluídos nem cancelados nos últimos 7 dias
+    assert serie['2024-01-25'] is None
+
+    assert dados['ocupacao_semana_hora']['Segunda'] == {'09:00': 4, '14:00': 0}
+    assert dados['ocupacao_semana_hora']['Terça'] == {'09:00': 0, '14:00': 1}
+
+    assert dados['volume_mensal'] == [
+        {'mes': '2024-01', 'agendamentos': 4, 'prontuarios': 1, 'variacao_agendamentos': None},
+        {'mes': '2024-02', 'agendamentos': 1, 'prontuarios': 0, 'variacao_agendamentos': -75.0},
+        {'mes': '2024-03', 'agendamentos': 0, 'prontuarios': 1, 'variacao_agendamentos': -100.0}
+    ]
+
+    # Sessões canceladas não entram na cadência
+    cadencia = dados['cadencia_pacientes']
+    assert [(c['sessoes'], c['intervalo_medio_dias']) for c in cadencia] == [(3, 14.0), (1, None)]
+
+def test_relatorios_por_periodo(client, token_psicologo):
+    resposta = obter_relatorios(client, token_psicologo, '?inicio=2024-01-10&fim=2024-01-31')
+    dados = json.loads(resposta.data)
+
+    assert resposta.status_code == 200
+    assert dados['inicio'] == '2024-01-10'
+    assert dados['fim'] == '2024-01-31'
+    assert dados['volume_mensal'] == [
+        {'mes': '2024-01', 'agendamentos': 2, 'prontuarios': 0, 'variacao_agendamentos': None}
+    ]
+    assert [c['sessoes'] for c in dados['cadencia_pacientes']] == [2]
+
+def test_relatorios_sem_dados(client, token_psicologo):
+    resposta = obter_relatorios(client, token_psicologo, '?inicio=2030-01-01')
+    dados = json.loads(resposta.data)
+
+    assert resposta.status_code == 200
+    assert dados['taxa_comparecimento_movel']['serie'] == []
+    assert dados['volume_mensal'] == []
+    assert dados['cadencia_pacientes'] == []
+
+@pytest.mark.parametrize('parametros', ['?inicio=01/01/2024', '?janela=0', '?janela=400', '?janela=abc', '?janela=7.5'])
+def test_relatorios_parametros_invalidos(client, token_psicologo, parametros):
+    resposta = obter_relatorios(client, token_psicologo, parametros)
+
+    assert resposta.status_code == 400
+    assert 'mensagem' in json.loads(resposta.data)
@@ -0,0 +1,237 @@
+import pytest
+from app import create_app
+from extensions import db
+from models.usuario import Usuario
+from models.psicologo import Psicologo
+from models.paciente import Paciente
+from models.agendamento import Agendamento
+from models.resumo_analitico import ResumoAgendamentosDia, ResumoAgendamentosPaciente, ResumoProntuariosMes
+from servicos.resumos import reconstruir
+from datetime import date
+import json
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+
+        # Criar usuário de teste (psicólogo)
+        usuario_psicologo = Usuario(
+            nome_usuario='psicologo_teste',
+            email='psicologo@teste.com',
+            nome='Psicólogo Teste',
+            telefone='11999999999',
+            tipo_usuario='psicologo'
+        )
+        usuario_psicologo.definir_senha('senha123')
+        db.session.add(usuario_psicologo)
+        db.session.commit()
+
+        # Criar registro de psicólogo
+        psicologo = Psicologo(
+            usuario_id=usuario_psicologo.id,
+            registro='CRP 12345',
+            especializacao='Terapia Cognitivo-Comportamental'
+        )
+        db.session.add(psicologo)
+        db.session.commit()
+
+        # Criar usuário de teste (paciente)
+        usuario_paciente = Usuario(
+            nome_usuario='paciente_teste',
+            email='paciente@teste.com',
+            nome='Paciente Teste',
+            telefone='11988888888',
+            tipo_usuario='paciente'
+        )
+        usuario_paciente.definir_senha('senha123')
+        db.session.add(usuario_paciente)
+        db.session.commit()
+
+        # Criar registro de paciente
+        paciente = Paciente(
+            usuario_id=usuario_paciente.id
+        )
+        db.session.add(paciente)
+        db.session.commit()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def token_psicologo(client):
+    # Obter token JWT para o psicólogo
+    resposta = client.post('/api/auth/login', json={
+        'nome_usuario': 'psicologo_teste',
+        'senha': 'senha123'
+    })
+
+    dados = json.loads(resposta.data)
+    return dados['token']
+
+@pytest.fixture
+def paciente_id(app):
+    with app.app_context():
+        return Paciente.query.first().id
+
+def resumos(app):
+    # Conteúdo das tabelas de resumo, ignorando linhas zeradas
+    with app.app_context():
+        return {
+            modelo.__tablename__: {
+                tuple(getattr(linha, coluna.name) for coluna in modelo.__table__.columns)
+                for linha in modelo.query.filter(modelo.total != 0)
+            }
+            for modelo in (ResumoAgendamentosDia, ResumoAgendamentosPaciente, ResumoProntuariosMes)
+        }
+
+def resumos_reconstruidos(app):
+    with app.app_context():
+        reconstruir(db.session.connection())
+        db.session.commit()
+    return resumos(app)
+
+def test_resumos_acompanham_agendamentos(app, client, token_psicologo, paciente_id):
+    cabecalhos = {'Authorization': f'Bearer {token_psicologo}'}
+
+    resposta = client.post('/api/appointments/agendamentos', headers=cabecalhos, json={
+        'data': '2024-01-01', 'hora': '09:00', 'paciente_id': paciente_id
+    })
+    assert resposta.status_code == 201
+    agendamento_id = json.loads(resposta.data)['agendamento']['id']
+
+    atual = resumos(app)
+    assert {linha[1:] for linha in atual['resumos_agendamentos_dia']} == {(date(2024, 1, 1), 'pendente', 1)}
+    assert atual == resumos_reconstruidos(app)
+
+    # Mudança de status e de data no mesmo PUT
+    resposta = client.put(f'/api/appointments/agendamentos/{agendamento_id}', headers=cabecalhos, json={
+        'data': '2024-01-03', 'status': 'concluído'
+    })
+    assert resposta.status_code == 200
+
+    atual = resumos(app)
+    assert {linha[1:] for linha in atual['resumos_agendamentos_dia']} == {(date(2024, 1, 3), 'concluído', 1)}
+    assert {linha[1:] for linha in atual['resumos_agendamentos_paciente']} == {(paciente_id, 'concluído', 1)}
+    assert atual == resumos_reconstruidos(app)
+
+    # Lote inserido em massa, fora dos eventos do ORM
+    resposta = client.post('/api/appointments/agendamentos/lote', headers=cabecalhos, json={'agendamentos': [
+        {'data': '2024-01-03', 'hora': hora, 'paciente_id': paciente_id} for hora in ['10:00', '11:00']
+    ]})
+    assert resposta.status_code == 201
+    assert resumos(app) == resumos_reconstruidos(app)
+
+    resposta = client.delete(f'/api/appointments/agendamentos/{agendamento_id}', headers=cabecalhos)
+    assert resposta.status_code == 200
+
+    atual = resumos(app)
+    assert {linha[1:] for linha in atual['resumos_agendamentos_dia']} == {(date(2024, 1, 3), 'pendente', 2)}
+    assert atual == resumos_reconstruidos(app)
+
+def test_resumos_acompanham_prontuarios(app, client, token_psicologo, paciente_id):
+    cabecalhos = {'Authorization': f'Bearer {token_psicologo}'}
+
+    resposta = client.post('/api/medical-records/prontuarios', headers=cabecalhos, json={
+        'data': '2024-01-15', 'conteudo': 'Evolução da sessão', 'paciente_id': paciente_id
+    })
+    assert resposta.status_code == 201
+    prontuario_id = json.loads(resposta.data)['prontuario']['id']
+    assert {linha[2:] for linha in resumos(app)['resumos_prontuarios_mes']} == {('2024-01', 1)}
+
+    resposta = client.put(f'/api/medical-records/prontuarios/{prontuario_id}', headers=cabecalhos, json={
+        'data': '2024-02-01'
+    })
+    assert resposta.status_code == 200
+
+    atual = resumos(app)
+    assert {linha[2:] for linha in atual['resumos_prontuarios_mes']} == {('2024-02', 1)}
+    assert atual == resumos_reconstruidos(app)
+
+    resposta = client.delete(f'/api/medical-records/prontuarios/{prontuario_id}', headers=cabecalhos)
+    assert resposta.status_code == 200
+    assert resumos(app)['resumos_prontuarios_mes'] == set()
+
+def test_rollback_descarta_resumos(app, paciente_id):
+    with app.app_context():
+        db.session.add(Agendamento(
+            data='2024-01-01',
+            hora='09:00',
+            status='pendente',
+            psicologo_id=Psicologo.query.first().id,
+            paciente_id=paciente_id
+        ))
+        db.session.flush()
+        assert ResumoAgendamentosDia.query.count() == 1
+
+        db.session.rollback()
+
+    assert resumos(app)['resumos_agendamentos_dia'] == set()
+
+def test_exclusao_em_cascata_atualiza_resumos(app, paciente_id):
+    with app.app_context():
+        db.session.add(Agendamento(
+            data='2024-01-01',
+            hora='09:00',
+            status='pendente',
+            psicologo_id=Psicologo.query.first().id,
+            paciente_id=paciente_id
+        ))
+        db.session.commit()
+
+        # Excluir o usuário remove paciente e agendamentos pelo ORM
+        db.session.delete(Usuario.query.filter_by(nome_usuario='paciente_teste').first())
+        db.session.commit()
+
+    assert resumos(app)['resumos_agendamentos_dia'] == set()
+    assert resumos(app)['resumos_agendamentos_paciente'] == set()
+
+def test_comando_reconstruir_corrige_divergencias(app, paciente_id):
+    with app.app_context():
+        psicologo_id = Psicologo.query.first().id
+        db.session.add(Agendamento(
+            data='2024-01-01',
+            hora='09:00',
+            status='pendente',
+            psicologo_id=psicologo_id,
+            paciente_id=paciente_id
+        ))
+        db.session.commit()
+
+        # Divergência: resumo alterado diretamente no banco
+        ResumoAgendamentosDia.query.update({'total': 7})
+        db.session.add(ResumoProntuariosMes(psicologo_id=psicologo_id, paciente_id=paciente_id, mes='2023-12', total=2))
+        db.session.commit()
+
+    resultado = app.test_cli_runner().invoke(args=['reconstruir-resumos'])
+    assert resultado.exit_code == 0
+
+    atual = resumos(app)
+    assert {linha[1:] for linha in atual['resumos_agendamentos_dia']} == {(date(2024, 1, 1), 'pendente', 1)}
+    assert atual['resumos_prontuarios_mes'] == set()
+
+def test_analises_leem_os_resumos(app, client, token_psicologo, paciente_id):
+    with app.app_context():
+        psicologo_id = Psicologo.query.first().id
+        # 2024-01-06 é sábado
+        db.session.add(ResumoAgendamentosDia(psicologo_id=psicologo_id, dia=date(2024, 1, 6), status='concluído', total=40))
+        db.session.add(ResumoAgendamentosPaciente(psicologo_id=psicologo_id, paciente_id=paciente_id, status='concluído', total=40))
+        db.session.commit()
+
+    cabecalhos = {'Authorization': f'Bearer {token_psicologo}'}
+
+    dados = json.loads(client.get('/api/analytics/analises/agendamentos', headers=cabecalhos).data)
+    assert dados['total_agendamentos'] == 40
+    assert dados['por_dia_semana']['Sábado'] == 40
+
+    dados = json.loads(client.get('/api/analytics/analises/pacientes', headers=cabecalhos).data)
+    assert dados[0]['total_agendamentos'] == 40
+    assert dados[0]['taxa_comparecimento'] == 100.0
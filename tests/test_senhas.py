@@ -0,0 +1,119 @@
+import pytest
+from app import create_app
+from extensions import db, senhas
+from models.usuario import Usuario
+from passlib.hash import pbkdf2_sha256
+import json
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+
+        # Criar usuário de teste com hash gerado por outra configuração de rounds
+        usuario = Usuario(
+            nome_usuario='paciente_teste',
+            email='paciente@teste.com',
+            nome='Paciente Teste',
+            telefone='11988888888',
+            tipo_usuario='paciente',
+            senha_hash=pbkdf2_sha256.using(rounds=1500).hash('senha123')
+        )
+        db.session.add(usuario)
+        db.session.commit()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+        app.extensions['senhas'].encerrar()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def rounds_do_hash(app):
+    with app.app_context():
+        usuario = Usuario.query.filter_by(nome_usuario='paciente_teste').first()
+        return pbkdf2_sha256.from_string(usuario.senha_hash).rounds
+
+def test_rounds_configurados_por_ambiente(app):
+    with app.app_context():
+        usuario = Usuario(nome_usuario='novo', email='novo@teste.com', nome='Novo', tipo_usuario='paciente')
+        usuario.definir_senha('segredo')
+
+        assert pbkdf2_sha256.from_string(usuario.senha_hash).rounds == app.config['SENHA_PBKDF2_ROUNDS']
+        assert usuario.verificar_senha('segredo')
+        assert not usuario.verificar_senha('outra')
+
+def test_hash_refeito_no_login(app, client):
+    assert rounds_do_hash(app) == 1500
+
+    resposta = client.post('/api/auth/login', json={
+        'nome_usuario': 'paciente_teste',
+        'senha': 'senha123'
+    })
+
+    assert resposta.status_code == 200
+    assert rounds_do_hash(app) == app.config['SENHA_PBKDF2_ROUNDS']
+
+    # A senha continua válida com o novo hash
+    resposta = client.post('/api/auth/login', json={
+        'nome_usuario': 'paciente_teste',
+        'senha': 'senha123'
+    })
+    assert resposta.status_code == 200
+
+def test_login_com_pool_sem_vagas(app, client):
+    pool = app.extensions['senhas']
+    pool.timeout_fila = 0
+
+    # Ocupar todas as vagas do pool
+    vagas_ocupadas = 0
+    while pool._vagas.acquire(blocking=False):
+        vagas_ocupadas += 1
+
+    try:
+        resposta = client.post('/api/auth/login', json={
+            'nome_usuario': 'paciente_teste',
+            'senha': 'senha123'
+        })
+    finally:
+        for _ in range(vagas_ocupadas):
+            pool._vagas.release()
+
+    dados = json.loads(resposta.data)
+
+    assert resposta.status_code == 503
+    assert resposta.headers['Retry-After'] == '1'
+    assert 'mensagem' in dados
+
+def test_hash_calculado_em_processo_separado(app):
+    # Pool real com um processo
+    pool = app.extensions['senhas']
+    pool.processos = 1
+
+    with app.app_context():
+        usuario = Usuario.query.filter_by(nome_usuario='paciente_teste').first()
+        assert usuario.verificar_senha('senha123')
+
+        usuario.definir_senha('nova_senha')
+        assert usuario.verificar_senha('nova_senha')
+
+    assert pool._executor is not None
+
+def test_hashes_em_lote_no_pool(app):
+    # Lote dividido entre os processos do pool, em uma única vaga
+    pool = app.extensions['senhas']
+    pool.processos = 2
+
+    with app.app_context():
+        hashes = senhas.gerar_hashes(['senha0', 'senha1', 'senha2'])
+
+        assert len(hashes) == 3
+        assert all(senhas.verificar(f'senha{i}', senha_hash) for i, senha_hash in enumerate(hashes))
+
+    assert pool._executor is not None
+    assert pool._vagas._value == app.config['SENHA_MAX_CONCORRENCIA']
@@ -0,0 +1,377 @@
+import pytest
+from app import create_app
+from extensions import db
+from models.usuario import Usuario
+from models.psicologo import Psicologo
+from models.paciente import Paciente
+from models.agendamento import Agendamento
+from models.serie_agendamento import SerieAgendamento
+from datetime import datetime, date, timedelta
+from itertools import islice
+import json
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+
+        # Criar usuário de teste (psicólogo)
+        usuario_psicologo = Usuario(
+            nome_usuario='psicologo_teste',
+            email='psicologo@teste.com',
+            nome='Psicólogo Teste',
+            telefone='11999999999',
+            tipo_usuario='psicologo'
+        )
+        usuario_psicologo.definir_senha('senha123')
+        usuario_psicologo.psicologo = Psicologo(
+            registro='CRP 12345',
+            especializacao='Terapia Cognitivo-Comportamental'
+        )
+        db.session.add(usuario_psicologo)
+
+        # Criar usuário de teste (paciente)
+        usuario_paciente = Usuario(
+            nome_usuario='paciente_teste',
+            email='paciente@teste.com',
+            nome='Paciente Teste',
+            telefone='11988888888',
+            tipo_usuario='paciente'
+        )
+        usuario_paciente.definir_senha('senha123')
+        usuario_paciente.paciente = Paciente()
+        db.session.add(usuario_paciente)
+        db.session.commit()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def fazer_login(client, nome_usuario):
+    resposta = client.post('/api/auth/login', json={
+        'nome_usuario': nome_usuario,
+        'senha': 'senha123'
+    })
+    return {'Authorization': f"Bearer {json.loads(resposta.data)['token']}"}
+
+@pytest.fixture
+def headers_psicologo(client):
+    return fazer_login(client, 'psicologo_teste')
+
+@pytest.fixture
+def headers_paciente(client):
+    return fazer_login(client, 'paciente_teste')
+
+def criar_serie(client, headers, **dados):
+    # Série semanal às segundas (2024-01-01 é segunda-feira), sem fim
+    corpo = {'data': '2024-01-01', 'hora': '09:00', 'paciente_id': 1}
+    corpo.update(dados)
+    return client.post('/api/appointments/series', json=corpo, headers=headers)
+
+def listar(client, headers, inicio, fim):
+    resposta = client.get(f'/api/appointments/agendamentos?inicio={inicio}&fim={fim}', headers=headers)
+    assert resposta.status_code == 200
+    return json.loads(resposta.data)
+
+def test_ocorrencias_calculadas_na_janela():
+    serie = SerieAgendamento(
+        regra='semanal', intervalo=2, inicio=datetime(2024, 1, 1, 9, 0),
+        fim=date(2024, 3, 1), excecoes=['2024-01-29']
+    )
+
+    assert list(serie.ocorrencias(datetime(2024, 1, 10), datetime(2024, 3, 31))) == [
+        datetime(2024, 1, 15, 9, 0), datetime(2024, 2, 12, 9, 0), datetime(2024, 2, 26, 9, 0)
+    ]
+    assert serie.tem_ocorrencia(datetime(2024, 2, 12, 9, 0))
+    assert not serie.tem_ocorrencia(datetime(2024, 1, 29, 9, 0))
+    assert not serie.tem_ocorrencia(datetime(2024, 1, 8, 9, 0))
+    assert not serie.tem_ocorrencia(datetime(2024, 3, 11, 9, 0))
+
+    # Séries sem fim são expandidas sob demanda
+    sem_fim = SerieAgendamento(regra='diaria', intervalo=1, inicio=datetime(2024, 1, 1, 9, 0), excecoes=[])
+    assert len(list(islice(sem_fim.ocorrencias(datetime(2024, 1, 1), datetime.max), 1000))) == 1000
+
+def test_coincidencia_entre_series():
+    semanal = SerieAgendamento(regra='semanal', intervalo=1, inicio=datetime(2024, 1, 1, 9, 0), excecoes=[])
+    quinzenal = SerieAgendamento(regra='semanal', intervalo=2, inicio=datetime(2024, 1, 8, 9, 0), excecoes=[])
+    outro_horario = SerieAgendamento(regra='semanal', intervalo=1, inicio=datetime(2024, 1, 1, 10, 0), excecoes=[])
+    terca = SerieAgendamento(regra='semanal', intervalo=2, inicio=datetime(2024, 1, 2, 9, 0), excecoes=[])
+
+    assert semanal.coincide_com(quinzenal)
+    assert quinzenal.coincide_com(semanal)
+    assert not semanal.coincide_com(outro_horario)
+    assert not quinzenal.coincide_com(terca)
+
+    # Coincidências anuladas por exceções ou pelo fim da série
+    com_excecoes = SerieAgendamento(
+        regra='semanal', intervalo=2, inicio=datetime(2024, 1, 8, 9, 0),
+        fim=date(2024, 1, 31), excecoes=['2024-01-08', '2024-01-22']
+    )
+    assert not semanal.coincide_com(com_excecoes)
+
+def test_listagem_intercala_ocorrencias(app, client, headers_psicologo, headers_paciente):
+    assert criar_serie(client, headers_psicologo).status_code == 201
+    resposta = client.post('/api/appointments/agendamentos', json={
+        'data': '2024-01-10', 'hora': '14:00', 'paciente_id': 1
+    }, headers=headers_psicologo)
+    assert resposta.status_code == 201
+
+    dados = listar(client, headers_psicologo, '2024-01-05', '2024-01-31')
+
+    assert [(a['data'], a['hora']) for a in dados] == [
+        ('2024-01-08', '09:00'), ('2024-01-10', '14:00'), ('2024-01-15', '09:00'),
+        ('2024-01-22', '09:00'), ('2024-01-29', '09:00')
+    ]
+    assert dados[0]['id'] is None and dados[0]['serie_id'] is not None
+    assert dados[0]['paciente']['usuario']['nome'] == 'Paciente Teste'
+
+    # O paciente vê as mesmas ocorrências
+    assert len(listar(client, headers_paciente, '2024-01-05', '2024-01-31')) == 5
+
+    # A série continua sendo uma única linha
+    with app.app_context():
+        assert SerieAgendamento.query.count() == 1
+        assert Agendamento.query.count() == 1
+
+def test_paginacao_inclui_ocorrencias(client, headers_psicologo, headers_paciente):
+    assert criar_serie(client, headers_psicologo, data='2030-01-07').status_code == 201
+    resposta = client.post('/api/appointments/agendamentos', json={
+        'data': '2030-01-16', 'hora': '14:00', 'paciente_id': 1
+    }, headers=headers_psicologo)
+    assert resposta.status_code == 201
+
+    completa = listar(client, headers_psicologo, '2030-01-01', '2030-01-31')
+    assert len(completa) == 5
+
+    for headers in (headers_psicologo, headers_paciente):
+        for limite in (1, 2, 50):
+            # Páginas seguidas até o fim, com cursores que apontam para ocorrências não gravadas
+            paginas = []
+            cursor = None
+            while True:
+                parametros = f'inicio=2030-01-01&fim=2030-01-31&limit={limite}' + (f'&cursor={cursor}' if cursor else '')
+                resposta = client.get(f'/api/appointments/agendamentos?{parametros}', headers=headers)
+                assert resposta.status_code == 200
+
+                dados = json.loads(resposta.data)
+                paginas.append(dados['itens'])
+                cursor = dados['next_cursor']
+                if not cursor:
+                    break
+
+            assert [item for pagina in paginas for item in pagina] == completa
+            assert all(len(pagina) == limite for pagina in paginas[:-1])
+
+def test_criar_agendamento_conflita_com_serie(client, headers_psicologo):
+    assert criar_serie(client, headers_psicologo).status_code == 201
+
+    resposta = client.post('/api/appointments/agendamentos', json={
+        'data': '2030-06-03', 'hora': '09:00', 'paciente_id': 1
+    }, headers=headers_psicologo)
+    assert resposta.status_code == 400
+    assert 'Já existe um agendamento' in json.loads(resposta.data)['mensagem']
+
+    resposta = client.post('/api/appointments/agendamentos', json={
+        'data': '2030-06-04', 'hora': '09:00', 'paciente_id': 1
+    }, headers=headers_psicologo)
+    assert resposta.status_code == 201
+
+    resposta = client.post('/api/appointments/agendamentos/lote', json={'agendamentos': [
+        {'data': '2024-02-05', 'hora': '09:00', 'paciente_id': 1},
+        {'data': '2024-02-05', 'hora': '10:00', 'paciente_id': 1}
+    ]}, headers=headers_psicologo)
+    assert [r['status'] for r in json.loads(resposta.data)['resultados']] == ['erro', 'criado']
+
+def test_criar_serie_com_conflito(client, headers_psicologo):
+    resposta = client.post('/api/appointments/agendamentos', json={
+        'data': '2024-03-04', 'hora': '09:00', 'paciente_id': 1
+    }, headers=headers_psicologo)
+    assert resposta.status_code == 201
+
+    # Conflito com um agendamento avulso
+    assert criar_serie(client, headers_psicologo).status_code == 400
+    assert criar_serie(client, headers_psicologo, fim='2024-02-29').status_code == 201
+
+    # Conflito com outra série (quinzenal cruzando a semanal em 2024-01-15)
+    assert criar_serie(client, headers_psicologo, data='2024-01-15', intervalo=2).status_code == 400
+    assert criar_serie(client, headers_psicologo, data='2024-01-15', hora='10:00', intervalo=2).status_code == 201
+
+@pytest.mark.parametrize('dados', [
+    {'regra': 'mensal'},
+    {'intervalo': 0},
+    {'data': '01/01/2024'},
+    {'fim': '2023-12-31'}
+])
+def test_criar_serie_invalida(client, headers_psicologo, dados):
+    assert criar_serie(client, headers_psicologo, **dados).status_code == 400
+
+def test_ocorrencia_materializada_ao_concluir(app, client, headers_psicologo):
+    serie_id = json.loads(criar_serie(client, headers_psicologo).data)['serie']['id']
+
+    resposta = client.put(f'/api/appointments/series/{serie_id}/ocorrencias/2024-01-15', json={
+        'status': 'concluído', 'observacoes': 'Sessão realizada'
+    }, headers=headers_psicologo)
+    dados = json.loads(resposta.data)
+
+    assert resposta.status_code == 200
+    assert dados['agendamento']['id'] is not None
+    assert dados['agendamento']['ocorrencia'] == '2024-01-15T09:00:00'
+
+    # A ocorrência aparece uma única vez, agora como agendamento gravado
+    lista = listar(client, headers_psicologo, '2024-01-15', '2024-01-15')
+    assert [(a['id'], a['status']) for a in lista] == [(dados['agendamento']['id'], 'concluído')]
+
+    # Materializar de novo a mesma data não é possível
+    resposta = client.put(f'/api/appointments/series/{serie_id}/ocorrencias/2024-01-15', json={
+        'status': 'concluído'
+    }, headers=headers_psicologo)
+    assert resposta.status_code == 404
+
+    with app.app_context():
+        assert db.session.get(SerieAgendamento, serie_id).excecoes == ['2024-01-15']
+
+def test_ocorrencia_remarcada(client, headers_psicologo):
+    serie_id = json.loads(criar_serie(client, headers_psicologo).data)['serie']['id']
+
+    resposta = client.put(f'/api/appointments/series/{serie_id}/ocorrencias/2024-01-15', json={
+        'data': '2024-01-17', 'hora': '16:00'
+    }, headers=headers_psicologo)
+    assert resposta.status_code == 200
+
+    lista = listar(client, headers_psicologo, '2024-01-14', '2024-01-23')
+    assert [(a['data'], a['hora']) for a in lista] == [('2024-01-17', '16:00'), ('2024-01-22', '09:00')]
+
+def test_paciente_cancela_ocorrencia(client, headers_psicologo, headers_paciente):
+    serie_id = json.loads(criar_serie(client, headers_psicologo).data)['serie']['id']
+    url = f'/api/appointments/series/{serie_id}/ocorrencias/2024-01-08'
+
+    resposta = client.put(url, json={'status': 'confirmado'}, headers=headers_paciente)
+    assert resposta.status_code == 403
+
+    resposta = client.put(url, json={'status': 'cancelado'}, headers=headers_paciente)
+    assert resposta.status_code == 200
+    assert json.loads(resposta.data)['agendamento']['status'] == 'cancelado'
+
+    # Só o psicólogo exclui ocorrências
+    resposta = client.delete(f'/api/appointments/series/{serie_id}/ocorrencias/2024-01-15', headers=headers_paciente)
+    assert resposta.status_code == 403
+
+def test_excluir_ocorrencia(client, headers_psicologo):
+    serie_id = json.loads(criar_serie(client, headers_psicologo).data)['serie']['id']
+
+    resposta = client.delete(f'/api/appointments/series/{serie_id}/ocorrencias/2024-01-08', headers=headers_psicologo)
+    assert resposta.status_code == 200
+
+    lista = listar(client, headers_psicologo, '2024-01-01', '2024-01-15')
+    assert [a['data'] for a in lista] == ['2024-01-01', '2024-01-15']
+
+    # Datas fora da regra não são ocorrências
+    resposta = client.delete(f'/api/appointments/series/{serie_id}/ocorrencias/2024-01-09', headers=headers_psicologo)
+    assert resposta.status_code == 404
+
+def test_reagendar_serie(app, client, headers_psicologo):
+    # Série ainda não iniciada: alterada na própria linha
+    serie_id = json.loads(criar_serie(client, headers_psicologo, data='2030-01-07').data)['serie']['id']
+
+    resposta = client.put(f'/api/appointments/series/{serie_id}', json={
+        'hora': '11:00', 'fim': '2030-01-26'
+    }, headers=headers_psicologo)
+    assert resposta.status_code == 200
+    assert json.loads(resposta.data)['serie']['id'] == serie_id
+
+    lista = listar(client, headers_psicologo, '2030-01-01', '2030-01-31')
+    assert [(a['data'], a['hora']) for a in lista] == [
+        ('2030-01-07', '11:00'), ('2030-01-14', '11:00'), ('2030-01-21', '11:00')
+    ]
+
+def test_reagendar_serie_mantem_ocorrencias_passadas(app, client, headers_psicologo):
+    # Série semanal iniciada três semanas antes da segunda-feira desta semana
+    hoje = date.today()
+    inicio = hoje - timedelta(days=hoje.weekday() + 21)
+    serie_id = json.loads(criar_serie(client, headers_psicologo, data=inicio.isoformat()).data)['serie']['id']
+
+    # Uma ocorrência futura excluída e outra materializada antes da alteração
+    excluida = inicio + timedelta(weeks=5)
+    materializada = inicio + timedelta(weeks=6)
+    url = f'/api/appointments/series/{serie_id}'
+    assert client.delete(f'{url}/ocorrencias/{excluida}', headers=headers_psicologo).status_code == 200
+    assert client.put(f'{url}/ocorrencias/{materializada}', json={
+        'observacoes': 'Confirmada'
+    }, headers=headers_psicologo).status_code == 200
+
+    resposta = client.put(url, json={'hora': '11:00'}, headers=headers_psicologo)
+    assert resposta.status_code == 200
+
+    # A série original termina ontem e a alteração vale a partir de hoje, em uma nova série
+    dados = json.loads(resposta.data)
+    nova_id = dados['serie']['id']
+    assert nova_id != serie_id
+    assert dados['serie_anterior']['fim'] == (hoje - timedelta(days=1)).isoformat()
+    assert dados['serie']['excecoes'] == [excluida.isoformat(), materializada.isoformat()]
+
+    esperado = []
+    for semana in range(8):
+        dia = inicio + timedelta(weeks=semana)
+        if dia == excluida:
+            continue
+        if dia < hoje:
+            esperado.append((dia.isoformat(), '09:00', serie_id))
+        else:
+            esperado.append((dia.isoformat(), '09:00' if dia == materializada else '11:00', nova_id))
+
+    lista = listar(client, headers_psicologo, inicio.isoformat(), (inicio + timedelta(weeks=7)).isoformat())
+    assert [(a['data'], a['hora'], a['serie_id']) for a in lista] == esperado
+
+def test_alteracoes_que_mudariam_o_passado(client, headers_psicologo):
+    # Série encerrada: só há ocorrências passadas
+    serie_id = json.loads(criar_serie(client, headers_psicologo, fim='2024-03-01').data)['serie']['id']
+    resposta = client.put(f'/api/appointments/series/{serie_id}', json={'hora': '11:00'}, headers=headers_psicologo)
+    assert resposta.status_code == 400
+
+    # Um fim antes de hoje apagaria ocorrências que já aconteceram
+    serie_id = json.loads(criar_serie(client, headers_psicologo, data='2024-06-03').data)['serie']['id']
+    resposta = client.put(f'/api/appointments/series/{serie_id}', json={'fim': '2024-07-01'}, headers=headers_psicologo)
+    assert resposta.status_code == 400
+
+    lista = listar(client, headers_psicologo, '2024-01-01', '2024-01-01')
+    assert [a['hora'] for a in lista] == ['09:00']
+
+def test_excluir_serie_mantem_agendamentos_materializados(app, client, headers_psicologo):
+    serie_id = json.loads(criar_serie(client, headers_psicologo).data)['serie']['id']
+    client.put(f'/api/appointments/series/{serie_id}/ocorrencias/2024-01-01', json={
+        'status': 'concluído'
+    }, headers=headers_psicologo)
+
+    resposta = client.delete(f'/api/appointments/series/{serie_id}', headers=headers_psicologo)
+    assert resposta.status_code == 200
+
+    lista = listar(client, headers_psicologo, '2024-01-01', '2024-01-31')
+    assert [(a['data'], a['serie_id']) for a in lista] == [('2024-01-01', None)]
+
+def test_series_de_outro_psicologo(app, client, headers_psicologo):
+    serie_id = json.loads(criar_serie(client, headers_psicologo).data)['serie']['id']
+
+    with app.app_context():
+        outro = Usuario(nome_usuario='outro', email='outro@teste.com', nome='Outro', tipo_usuario='psicologo')
+        outro.definir_senha('senha123')
+        outro.psicologo = Psicologo(registro='CRP 99999')
+        db.session.add(outro)
+        db.session.commit()
+
+    headers_outro = fazer_login(client, 'outro')
+
+    resposta = client.put(f'/api/appointments/series/{serie_id}', json={'hora': '10:00'}, headers=headers_outro)
+    assert resposta.status_code == 403
+
+    resposta = client.put('/api/appointments/series/999', json={'hora': '10:00'}, headers=headers_outro)
+    assert resposta.status_code == 404
+
+    resposta = client.get('/api/appointments/series', headers=headers_outro)
+    assert json.loads(resposta.data) == []
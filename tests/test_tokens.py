@@ -0,0 +1,226 @@
+import pytest
+import time
+from app import create_app
+from extensions import db
+from models.usuario import Usuario
+from models.psicologo import Psicologo
+from flask_jwt_extended import decode_token
+from servicos.tokens import _Revogacoes, ListaRevogacaoCheia
+from sqlalchemy import event
+from contextlib import contextmanager
+import json
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+
+        # Criar usuário de teste (psicólogo)
+        usuario_psicologo = Usuario(
+            nome_usuario='psicologo_teste',
+            email='psicologo@teste.com',
+            nome='Psicólogo Teste',
+            telefone='11999999999',
+            tipo_usuario='psicologo'
+        )
+        usuario_psicologo.definir_senha('senha123')
+        db.session.add(usuario_psicologo)
+        db.session.commit()
+
+        # Criar registro de psicólogo
+        psicologo = Psicologo(
+            usuario_id=usuario_psicologo.id,
+            registro='CRP 12345',
+            especializacao='Terapia Cognitivo-Comportamental'
+        )
+        db.session.add(psicologo)
+        db.session.commit()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def tokens(client):
+    resposta = client.post('/api/auth/login', json={
+        'nome_usuario': 'psicologo_teste',
+        'senha': 'senha123'
+    })
+    return json.loads(resposta.data)
+
+@contextmanager
+def contar_consultas(app):
+    # Registra as instruções SQL emitidas enquanto o bloco estiver ativo
+    consultas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+
+    event.listen(engine, 'before_cursor_execute', registrar)
+    try:
+        yield consultas
+    finally:
+        event.remove(engine, 'before_cursor_execute', registrar)
+
+def renovar(client, refresh_token):
+    return client.post('/api/auth/refresh', headers={
+        'Authorization': f'Bearer {refresh_token}'
+    })
+
+def test_login_emite_tokens_de_acesso_e_refresh(app, tokens):
+    with app.app_context():
+        acesso = decode_token(tokens['token'])
+        refresh = decode_token(tokens['refresh_token'])
+
+    assert acesso['type'] == 'access'
+    assert refresh['type'] == 'refresh'
+    assert acesso['exp'] - acesso['iat'] == app.config['JWT_ACCESS_TOKEN_EXPIRES'].total_seconds()
+    assert refresh['psicologo_id'] == acesso['psicologo_id']
+
+def test_refresh_sem_recalcular_senha(app, client, tokens, monkeypatch):
+    # A renovação não deve recalcular o hash da senha
+    monkeypatch.setattr(Usuario, 'verificar_senha', lambda *args: pytest.fail('hash calculado'))
+
+    with contar_consultas(app) as consultas:
+        resposta = renovar(client, tokens['refresh_token'])
+
+    dados = json.loads(resposta.data)
+
+    # Uma única consulta: o usuário e o perfil, para refazer as claims
+    assert resposta.status_code == 200
+    assert len(consultas) == 1
+    assert dados['token'] and dados['refresh_token']
+
+    with app.app_context():
+        assert decode_token(dados['token'])['psicologo_id'] == decode_token(tokens['token'])['psicologo_id']
+
+    # O novo token de acesso funciona nas rotas protegidas
+    resposta = client.get('/api/appointments/agendamentos', headers={
+        'Authorization': f'Bearer {dados["token"]}'
+    })
+    assert resposta.status_code == 200
+
+def test_refresh_token_rotacionado(client, tokens):
+    resposta = renovar(client, tokens['refresh_token'])
+    novo_refresh = json.loads(resposta.data)['refresh_token']
+
+    # O refresh token usado foi revogado
+    assert renovar(client, tokens['refresh_token']).status_code == 401
+    assert renovar(client, novo_refresh).status_code == 200
+
+def test_conta_excluida_nao_renova_sessao(app, client, tokens):
+    acesso = {'Authorization': f'Bearer {tokens["token"]}'}
+
+    with app.app_context():
+        usuario_id = Usuario.query.filter_by(nome_usuario='psicologo_teste').first().id
+
+    resposta = client.delete(f'/api/users/usuarios/{usuario_id}', headers=acesso)
+    assert resposta.status_code == 200
+
+    # Os tokens emitidos antes da exclusão foram revogados
+    assert renovar(client, tokens['refresh_token']).status_code == 401
+    assert client.get('/api/appointments/agendamentos', headers=acesso).status_code == 401
+
+def test_refresh_recusado_sem_usuario_no_banco(app, client, tokens):
+    # Conta removida sem passar pela rota de exclusão: o refresh consulta o banco
+    with app.app_context():
+        db.session.delete(Usuario.query.filter_by(nome_usuario='psicologo_teste').first())
+        db.session.commit()
+
+    resposta = renovar(client, tokens['refresh_token'])
+
+    assert resposta.status_code == 401
+    assert json.loads(resposta.data)['mensagem'] == 'Usuário não encontrado'
+
+def test_refresh_recusado_sem_perfil(app, client, tokens):
+    with app.app_context():
+        db.session.delete(Psicologo.query.first())
+        db.session.commit()
+
+    resposta = renovar(client, tokens['refresh_token'])
+
+    assert resposta.status_code == 401
+    assert json.loads(resposta.data)['mensagem'] == 'Perfil não encontrado'
+
+def test_refresh_exige_refresh_token(client, tokens):
+    resposta = renovar(client, tokens['token'])
+
+    assert resposta.status_code == 422
+
+def test_logout_revoga_token(client, tokens):
+    headers = {'Authorization': f'Bearer {tokens["token"]}'}
+
+    resposta = client.post('/api/auth/logout', headers=headers)
+    assert resposta.status_code == 200
+
+    resposta = client.get('/api/auth/perfil', headers=headers)
+    assert resposta.status_code == 401
+
+def test_lista_revogacao_limitada_e_com_expiracao():
+    revogacoes = _Revogacoes(max_itens=2)
+    agora = time.time()
+
+    revogacoes.adicionar('expirado', agora - 1)
+    assert not revogacoes.contem('expirado')
+
+    revogacoes.adicionar('a', agora + 30)
+    revogacoes.adicionar('b', agora + 10)
+
+    # Sem espaço, a nova revogação é recusada e nenhuma entrada válida é descartada
+    with pytest.raises(ListaRevogacaoCheia):
+        revogacoes.adicionar('c', agora + 20)
+    assert len(revogacoes) == 2
+    assert revogacoes.contem('a') and revogacoes.contem('b')
+    assert not revogacoes.contem('c')
+
+    # Entradas vencidas são removidas na próxima consulta e liberam espaço
+    revogacoes = _Revogacoes(max_itens=1)
+    revogacoes.adicionar('d', time.time() + 0.05)
+    assert revogacoes.contem('d')
+    time.sleep(0.06)
+    assert not revogacoes.contem('d')
+    assert len(revogacoes) == 0
+    revogacoes.adicionar('e', time.time() + 30)
+    assert revogacoes.contem('e')
+
+def test_token_revogado_continua_revogado_com_lista_cheia(app, client, tokens, caplog):
+    app.extensions['revogacoes'].max_itens = 3
+
+    # Rotação do refresh token: o primeiro fica revogado
+    refresh_token = renovar(client, tokens['refresh_token']).get_json()['refresh_token']
+
+    # Sequência de logouts e renovações até encher a lista
+    respostas = []
+    for _ in range(4):
+        novo = client.post('/api/auth/login', json={'nome_usuario': 'psicologo_teste', 'senha': 'senha123'})
+        respostas.append(client.post('/api/auth/logout', headers={
+            'Authorization': f'Bearer {novo.get_json()["token"]}'
+        }).status_code)
+    respostas.append(renovar(client, refresh_token).status_code)
+
+    assert respostas == [200, 200, 503, 503, 503]
+    assert 'Lista de revogação cheia' in caplog.text
+
+    # Tokens já revogados continuam recusados
+    assert renovar(client, tokens['refresh_token']).status_code == 401
+    assert len(app.extensions['revogacoes']) == 3
+
+    # Sem como revogar as sessões, a conta não é excluída
+    with app.app_context():
+        usuario_id = Usuario.query.filter_by(nome_usuario='psicologo_teste').first().id
+    resposta = client.delete(f'/api/users/usuarios/{usuario_id}', headers={
+        'Authorization': f'Bearer {tokens["token"]}'
+    })
+    assert resposta.status_code == 503
+    with app.app_context():
+        assert db.session.get(Usuario, usuario_id)
@@ -0,0 +1,156 @@
+import pytest
+from app import create_app
+from extensions import db
+from models.usuario import Usuario
+from models.psicologo import Psicologo
+from models.paciente import Paciente
+from models.agendamento import Agendamento
+from models.prontuario_medico import ProntuarioMedico
+from models.serie_agendamento import SerieAgendamento
+from servicos import transmissao
+from datetime import datetime, timedelta
+import json
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    
+    with app.app_context():
+        db.create_all()
+        
+        # Criar usuário de teste (psicólogo)
+        usuario_psicologo = Usuario(
+            nome_usuario='psicologo_teste',
+            email='psicologo@teste.com',
+            nome='Psicólogo Teste',
+            tipo_usuario='psicologo'
+        )
+        usuario_psicologo.definir_senha('senha123')
+        usuario_psicologo.psicologo = Psicologo(registro='CRP 12345')
+        db.session.add(usuario_psicologo)
+        
+        usuario_paciente = Usuario(
+            nome_usuario='paciente_teste',
+            email='paciente@teste.com',
+            nome='Paciente Teste',
+            tipo_usuario='paciente'
+        )
+        usuario_paciente.definir_senha('senha123')
+        usuario_paciente.paciente = Paciente()
+        db.session.add(usuario_paciente)
+        db.session.flush()
+        
+        # Um agendamento e um prontuário por dia de janeiro de 2024
+        for dia in range(31):
+            data = datetime(2024, 1, 1, 9, 0) + timedelta(days=dia)
+            db.session.add(Agendamento(
+                inicio=data,
+                status='pendente',
+                psicologo_id=usuario_psicologo.psicologo.id,
+                paciente_id=usuario_paciente.paciente.id
+            ))
+            db.session.add(ProntuarioMedico(
+                data=data.date(),
+                conteudo='Evolução da sessão',
+                psicologo_id=usuario_psicologo.psicologo.id,
+                paciente_id=usuario_paciente.paciente.id
+            ))
+        db.session.commit()
+    
+    yield app
+    
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def token_psicologo(client):
+    # Obter token JWT para o psicólogo
+    resposta = client.post('/api/auth/login', json={
+        'nome_usuario': 'psicologo_teste',
+        'senha': 'senha123'
+    })
+    
+    dados = json.loads(resposta.data)
+    return dados['token']
+
+def obter(client, token, url, ndjson=False):
+    headers = {'Authorization': f'Bearer {token}'}
+    if ndjson:
+        headers['Accept'] = 'application/x-ndjson'
+    return client.get(url, headers=headers)
+
+@pytest.mark.parametrize('url', [
+    '/api/appointments/agendamentos?inicio=2024-01-01&fim=2024-01-31',
+    '/api/medical-records/prontuarios',
+    '/api/users/usuarios'
+])
+def test_lista_json_em_stream(client, token_psicologo, url):
+    comum = obter(client, token_psicologo, url)
+    separador = '&' if '?' in url else '?'
+    resposta = obter(client, token_psicologo, f'{url}{separador}stream=true')
+    
+    assert resposta.status_code == 200
+    assert resposta.is_streamed
+    assert resposta.mimetype == 'application/json'
+    assert json.loads(resposta.data) == json.loads(comum.data)
+
+@pytest.mark.parametrize('url', [
+    '/api/appointments/agendamentos?inicio=2024-01-01&fim=2024-01-31',
+    '/api/medical-records/prontuarios',
+    '/api/users/usuarios'
+])
+def test_lista_ndjson(client, token_psicologo, url):
+    comum = obter(client, token_psicologo, url)
+    resposta = obter(client, token_psicologo, url, ndjson=True)
+    
+    assert resposta.status_code == 200
+    assert resposta.mimetype == 'application/x-ndjson'
+    linhas = resposta.data.decode('utf-8').splitlines()
+    assert [json.loads(linha) for linha in linhas] == json.loads(comum.data)
+
+def test_stream_enviado_em_partes(client, token_psicologo, monkeypatch):
+    monkeypatch.setattr(transmissao, 'BYTES_POR_ENVIO', 1)
+    
+    resposta = client.get('/api/medical-records/prontuarios', headers={
+        'Authorization': f'Bearer {token_psicologo}',
+        'Accept': 'application/x-ndjson'
+    }, buffered=False)
+    
+    # Cada prontuário é enviado assim que serializado
+    partes = [parte for parte in resposta.response if parte]
+    assert len(partes) == 31
+    assert resposta.headers['X-Accel-Buffering'] == 'no'
+    resposta.close()
+
+def test_stream_com_series(app, client, token_psicologo):
+    with app.app_context():
+        psicologo = Psicologo.query.first()
+        db.session.add(SerieAgendamento(
+            regra='semanal',
+            intervalo=1,
+            inicio=datetime(2024, 1, 3, 14, 0),
+            excecoes=[],
+            psicologo_id=psicologo.id,
+            paciente_id=Paciente.query.first().id
+        ))
+        db.session.commit()
+    
+    url = '/api/appointments/agendamentos?inicio=2024-01-01&fim=2024-01-31'
+    comum = json.loads(obter(client, token_psicologo, url).data)
+    resposta = obter(client, token_psicologo, url, ndjson=True)
+    itens = [json.loads(linha) for linha in resposta.data.decode('utf-8').splitlines()]
+    
+    # Agendamentos e ocorrências intercalados, como na resposta comum
+    assert len(itens) == 31 + 5
+    assert itens == comum
+    assert [item['inicio'] for item in itens] == sorted(item['inicio'] for item in itens)
+
+def test_paginacao_ignora_stream(client, token_psicologo):
+    resposta = obter(client, token_psicologo, '/api/medical-records/prontuarios?limit=10', ndjson=True)
+    
+    assert resposta.status_code == 200
+    assert len(json.loads(resposta.data)['itens']) == 10